@@ -1,24 +1,46 @@
-from flask import Flask, render_template, request, redirect, url_for, flash, current_app, send_from_directory, jsonify, send_file
+from flask import Flask, Request, render_template, request, redirect, url_for, flash, current_app, send_from_directory, jsonify, send_file, Response, stream_with_context, abort
 from flask_sqlalchemy import SQLAlchemy
 from flask_login import LoginManager, UserMixin, login_user, login_required, logout_user, current_user
 from werkzeug.security import generate_password_hash, check_password_hash
 from datetime import datetime, timedelta
 import os
+import sys
 from PIL import Image, ImageDraw
 import numpy as np
-from sklearn.cluster import KMeans
-import cv2
 from werkzeug.utils import secure_filename
 import logging
 from dotenv import load_dotenv
-from ultralytics import YOLO
-from collections import Counter
-from sqlalchemy import func
-import pandas as pd
+from collections import Counter, namedtuple
+from sqlalchemy import func, case, and_, or_, insert, select
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import aliased
 import tempfile
 from io import BytesIO
 import json
-from excel_template import create_detection_export, create_summary_export
+import mimetypes
+import threading
+import time
+import atexit
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from excel_template import create_streaming_detection_export, create_summary_export
+from batching import MicroBatcher
+from result_cache import ResultCache, DiskCache, make_cache_key, file_sha256
+from blob_store import BlobStore, normalize_extension
+from jobs import JobRunner
+from write_behind import WriteBehindWriter
+from image_decode import decode_image, image_size, upright
+from tiling import make_tiles, merge_tile_results
+from postprocess import build_class_table, summarize_result
+from tracking import FruitTracker
+from video import is_video_file, sample_frames, track_video, video_info
+from inference_params import (ADAPTIVE_SIZES, DEFAULT_PARAMS, InferenceParams, choose_image_size,
+                              estimate_density, normalize_image_size, params_from_settings)
+from inference_backends import load_backend
+from worker_pool import InferenceWorkerPool
+from migrations import upgrade_schema
+from database import RoutingSession, configure_engines, read_binds, read_only
 
 # Load environment variables
 load_dotenv()
@@ -26,10 +48,78 @@ load_dotenv()
 # Initialize Flask app
 app = Flask(__name__)
 app.config['SECRET_KEY'] = 'your-secret-key'
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///mangosteen.db'
+app.config['SQLALCHEMY_DATABASE_URI'] = os.getenv('DATABASE_URL', 'sqlite:///mangosteen.db')
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+app.config['SQLITE_TUNING'] = os.getenv('SQLITE_TUNING', 'on') == 'on'  # WAL and tuned pragmas on every SQLite connection
+app.config['DATABASE_READ_URL'] = os.getenv('DATABASE_READ_URL')  # Read engine of read-only views; SQLite defaults to the same file
+app.config['DATABASE_READ_POOL_SIZE'] = 8  # Connections kept by the read engine
+if app.config['SQLITE_TUNING'] or app.config['DATABASE_READ_URL']:
+    app.config['SQLALCHEMY_BINDS'] = read_binds(app.config['SQLALCHEMY_DATABASE_URI'], app.config['DATABASE_READ_URL'],
+                                                app.config['DATABASE_READ_POOL_SIZE'])
 app.config['UPLOAD_FOLDER'] = os.path.join('static', 'uploads')
+app.config['BLOB_FOLDER'] = os.path.join(app.config['UPLOAD_FOLDER'], 'blobs')  # Uploaded files by content hash, in shard directories
 app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max file size
+app.config['INFERENCE_MAX_BATCH_SIZE'] = 8  # Images per batched YOLO call
+app.config['INFERENCE_MAX_WAIT_MS'] = 15  # Max time a request waits for its batch to fill
+app.config['BATCH_UPLOAD_WORKERS'] = 8  # Threads running detection for /detect_batch
+app.config['BATCH_MAX_FILES'] = 200
+app.config['MODEL_PATH'] = 'model/best.pt'
+app.config['ONNX_MODEL_PATH'] = 'model/best.onnx'  # Written by export_onnx.py
+app.config['INT8_MODEL_PATH'] = 'model/best.int8.onnx'  # Written by quantize_model.py
+app.config['INFERENCE_BACKEND'] = os.getenv('INFERENCE_BACKEND', 'ultralytics')  # 'ultralytics', 'onnx' or 'onnx-int8'
+app.config['CONFIDENCE_THRESHOLD'] = 0.5  # Defaults for users without inference settings
+app.config['INFERENCE_IOU'] = 0.7
+app.config['INFERENCE_MAX_DET'] = 300
+app.config['DEFAULT_IMAGE_SIZE'] = os.getenv('DEFAULT_IMAGE_SIZE', 'auto')  # Model input size in pixels, or 'auto' to pick it per image
+app.config['DUPLICATE_IOU'] = 1.0  # IoU above which a lower-confidence box of any class is dropped; 1 drops exact duplicates only
+app.config['INFERENCE_IMAGE_SIZE'] = 640  # Backend's load-time default input size; requests set theirs from DEFAULT_IMAGE_SIZE or user settings
+app.config['INFERENCE_TILING'] = os.getenv('INFERENCE_TILING', 'off')  # 'off', 'on', or 'auto' for images over TILING_MIN_SIDE
+app.config['TILING_MIN_SIDE'] = 1920  # Longer side, in pixels, from which 'auto' tiles an image
+app.config['TILE_SIZE'] = 640  # Tile side in full-resolution pixels
+app.config['TILE_OVERLAP'] = 0.2  # Share of a tile overlapping its neighbours
+app.config['TILE_MERGE_THRESHOLD'] = 0.5  # Intersection over the smaller box above which tile detections are merged
+app.config['TILE_FULL_FRAME'] = True  # Also run the whole frame, for fruit larger than a tile
+app.config['ADAPTIVE_IMAGE_SIZES'] = ADAPTIVE_SIZES  # (highest density, imgsz) bands for adaptive sizing
+app.config['INFERENCE_WORKERS'] = int(os.getenv('INFERENCE_WORKERS', 0))  # Model processes; 0 runs the model in this process
+app.config['INFERENCE_WORKER_THREADS'] = int(os.getenv('INFERENCE_WORKER_THREADS', 0))  # Compute threads per worker, 0 for the default
+app.config['INFERENCE_WORKER_RESTART'] = True  # Replace inference workers that crash
+app.config['RESULT_CACHE_FOLDER'] = os.path.join(app.instance_path, 'result_cache')
+app.config['RESULT_CACHE_MEMORY_BYTES'] = 64 * 1024 * 1024
+app.config['RESULT_CACHE_DISK_BYTES'] = 1024 * 1024 * 1024
+app.config['ANNOTATED_CACHE_FOLDER'] = os.path.join(app.instance_path, 'annotated')
+app.config['ANNOTATED_CACHE_BYTES'] = 512 * 1024 * 1024
+app.config['VIDEO_MAX_CONTENT_LENGTH'] = 512 * 1024 * 1024  # Upload limit of /detect_video
+app.config['VIDEO_SAMPLE_FPS'] = 10  # Frames per second run through the model
+app.config['VIDEO_MOTION_THRESHOLD'] = 1.0  # Mean grey-level change below which a sampled frame is skipped as static
+app.config['VIDEO_MAX_SKIP'] = 2  # Most static sampled frames skipped in a row
+app.config['VIDEO_QUEUE_FRAMES'] = 16  # Decoded frames buffered ahead of the model
+app.config['VIDEO_TRACK_LOW_CONF'] = 0.1  # Low-confidence detections still extend existing tracks
+app.config['VIDEO_TRACK_IOU'] = 0.3  # IoU with a track's predicted box needed to extend it
+app.config['VIDEO_TRACK_MAX_AGE'] = 1.0  # Seconds a track survives unseen, e.g. behind a leaf
+app.config['VIDEO_TRACK_MIN_HITS'] = 3  # Frames a fruit must be seen in to be counted
+app.config['DETECTION_WRITE_BEHIND'] = os.getenv('DETECTION_WRITE_BEHIND', 'off') == 'on'  # Queue upload rows for bulk transactions
+app.config['WRITE_BEHIND_MAX_QUEUE'] = 1024  # Uploads waiting to be written before requests block
+app.config['WRITE_BEHIND_MAX_BATCH'] = 256  # Uploads per transaction
+app.config['WRITE_BEHIND_FLUSH_MS'] = 10  # Time a flush waits for more uploads to share its transaction
+app.config['WRITE_BEHIND_WAIT_TIMEOUT'] = 10  # Seconds a page waits for its user's queued rows
+app.config['JOB_WORKERS'] = 2  # Background threads running queued detection jobs
+app.config['HISTORY_PAGE_SIZE'] = 50  # Images per history page
+app.config['LIST_IMAGES_PAGE_SIZE'] = 100  # Default images per /list_images page
+app.config['LIST_IMAGES_MAX_PAGE_SIZE'] = 1000
+app.config['LIST_IMAGES_COUNT_TTL'] = 60  # Seconds a /list_images total is reused before it is counted again
+app.config['JOB_POLL_INTERVAL'] = 1.0  # Seconds between checks for new jobs and job status events
+app.config['JOB_LEASE_SECONDS'] = 60  # Running jobs unrenewed this long belong to a dead process and are run again
+
+class UploadRequest(Request):
+    """Request whose body limit is VIDEO_MAX_CONTENT_LENGTH on the video upload route, MAX_CONTENT_LENGTH elsewhere"""
+    
+    @property
+    def max_content_length(self):
+        if self.endpoint == 'detect_video_upload':
+            return current_app.config['VIDEO_MAX_CONTENT_LENGTH']
+        return super().max_content_length
+
+app.request_class = UploadRequest
 
 # Ensure upload folder exists
 os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
@@ -39,7 +129,11 @@ logging.basicConfig(level=logging.DEBUG)
 logger = logging.getLogger(__name__)
 
 # Initialize extensions
-db = SQLAlchemy(app)
+db = SQLAlchemy(app, session_options={'class_': RoutingSession})
+if app.config['SQLITE_TUNING']:
+    # Engines exist once the extension is set up; connections are only opened on first use
+    with app.app_context():
+        configure_engines(db)
 login_manager = LoginManager()
 login_manager.init_app(app)
 login_manager.login_view = 'login'
@@ -59,11 +153,15 @@ class User(UserMixin, db.Model):
         'dark_mode': False,
         'show_notifications': True,
         'confidence_threshold': 50,
+        'iou_threshold': 70,
+        'max_detections': 300,
+        'image_size': 'auto',
         'save_history': True,
         'email_results': False,
         'email_updates': False
     })
     detections = db.relationship('Detection', backref='user', lazy=True)
+    uploads = db.relationship('Upload', backref='user', lazy=True)
 
     def set_password(self, password):
         self.password_hash = generate_password_hash(password)
@@ -76,15 +174,105 @@ class User(UserMixin, db.Model):
         current_settings.update(settings_dict)
         self.settings = current_settings
 
+# One uploaded image, with its ripeness counts stored when the upload is saved
+class Upload(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    image_path = db.Column(db.String(255), nullable=False, index=True)
+    total_count = db.Column(db.Integer, nullable=False, default=0)
+    ripe_count = db.Column(db.Integer, nullable=False, default=0)
+    unripe_count = db.Column(db.Integer, nullable=False, default=0)
+    inference_ms = db.Column(db.Float, nullable=True)  # None for uploads backfilled from older databases
+    # Uploaded file in the blob store; None for files saved flat in UPLOAD_FOLDER by older versions
+    blob_path = db.Column(db.String(255), nullable=True)
+    file_size = db.Column(db.Integer, nullable=True)  # Bytes of the uploaded file; None where it was not recorded
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    detections = db.relationship('Detection', backref='upload', lazy=True)
+
+    @property
+    def is_video(self):
+        """Whether this is a video upload, which has counts but no annotated image to show"""
+        return is_video_file(self.image_path)
+
+    # History pages and image listings over a user's uploads, or everyone's, newest first
+    __table_args__ = (
+        db.Index('ix_upload_user_created', 'user_id', 'created_at', 'id'),
+        db.Index('ix_upload_created', 'created_at', 'id'),
+    )
+
 # Detection History Model
 class Detection(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    upload_id = db.Column(db.Integer, db.ForeignKey('upload.id'), nullable=True, index=True)
     image_path = db.Column(db.String(255), nullable=False)
     fruit_type = db.Column(db.String(50), nullable=False)
     ripeness = db.Column(db.String(50), nullable=False)
     confidence = db.Column(db.Float, nullable=False)
     timestamp = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    # Raw model class id and pixel box corners, None for detections saved before they were stored
+    class_id = db.Column(db.Integer, nullable=True)
+    box_x1 = db.Column(db.Integer, nullable=True)
+    box_y1 = db.Column(db.Integer, nullable=True)
+    box_x2 = db.Column(db.Integer, nullable=True)
+    box_y2 = db.Column(db.Integer, nullable=True)
+
+    @property
+    def box(self):
+        """(x1, y1, x2, y2) in image pixels, or None if the box was not stored"""
+        if self.box_x1 is None:
+            return None
+        return (self.box_x1, self.box_y1, self.box_x2, self.box_y2)
+
+    @property
+    def is_video(self):
+        """Whether this detection is a tracked fruit of a video upload, which has no annotated image to show"""
+        return is_video_file(self.image_path)
+
+    # Every route filters detections by user first, then by time, image or ripeness
+    __table_args__ = (
+        db.Index('ix_detection_user_timestamp', 'user_id', 'timestamp'),
+        db.Index('ix_detection_user_image_path', 'user_id', 'image_path'),
+        db.Index('ix_detection_user_ripeness', 'user_id', 'ripeness'),
+    )
+
+# Per-user, per-day detection totals, updated in the same transaction as Detection inserts
+class DetectionRollup(db.Model):
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    day = db.Column(db.Date, primary_key=True)
+    fruit_type = db.Column(db.String(50), primary_key=True)
+    ripeness = db.Column(db.String(50), primary_key=True)
+    count = db.Column(db.Integer, nullable=False, default=0)
+    confidence_sum = db.Column(db.Float, nullable=False, default=0.0)
+
+# Asynchronous detection job, persisted so queued uploads survive restarts
+class DetectionJob(db.Model):
+    id = db.Column(db.String(32), primary_key=True, default=lambda: uuid.uuid4().hex)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    filename = db.Column(db.String(255), nullable=False)
+    blob_path = db.Column(db.String(255), nullable=True)  # None for jobs queued by older versions, saved flat in UPLOAD_FOLDER
+    status = db.Column(db.String(20), nullable=False, default='pending', index=True)  # pending, running, done, failed
+    result = db.Column(db.JSON, nullable=True)
+    error = db.Column(db.String(255), nullable=True)
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime, nullable=True)
+    heartbeat_at = db.Column(db.DateTime, nullable=True)  # Renewed while a worker runs the job; see JOB_LEASE_SECONDS
+    finished_at = db.Column(db.DateTime, nullable=True)
+
+    def to_dict(self):
+        data = {
+            'job_id': self.id,
+            'status': self.status,
+            'created_at': self.created_at.isoformat(),
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None
+        }
+        if self.status == 'done':
+            data['result_url'] = url_for('job_result', job_id=self.id)
+        elif self.status == 'failed':
+            data['error'] = self.error
+        return data
 
 # Fruit Model
 class Fruit(db.Model):
@@ -107,7 +295,8 @@ def get_dominant_colors(image_path, num_colors=3):
     # Reshape array to 2D
     pixels = img_array.reshape(-1, 3)
     
-    # Use KMeans to find dominant colors
+    # Use KMeans to find dominant colors; sklearn is slow to import, so only load it here
+    from sklearn.cluster import KMeans
     kmeans = KMeans(n_clusters=num_colors, random_state=42)
     kmeans.fit(pixels)
     
@@ -123,6 +312,7 @@ def allowed_file(filename):
 
 def draw_bounding_box(image, contour):
     """Draw a bounding box around the detected fruit."""
+    import cv2
     try:
         # Get the bounding rectangle
         x, y, w, h = cv2.boundingRect(contour)
@@ -174,6 +364,7 @@ def draw_bounding_box(image, contour):
 
 def draw_adaptive_box(image, contour):
     """Draw an adaptive bounding box around the detected fruit."""
+    import cv2
     try:
         # Get the bounding rectangle
         x, y, w, h = cv2.boundingRect(contour)
@@ -223,88 +414,728 @@ def draw_adaptive_box(image, contour):
         print(f"Error drawing adaptive box: {str(e)}")
         return image
 
-# Load YOLO model at startup
-try:
-    yolo_model = YOLO('model/best.pt')
-    logging.info("YOLO model loaded successfully")
-    logging.debug(f"Model classes: {yolo_model.names}")
-    print("YOLO model class names:", yolo_model.names)
-except Exception as e:
-    logging.error(f"Error loading YOLO model: {str(e)}")
-    yolo_model = None
-
-def detect_fruit(image_path):
-    """Detect fruit and ripeness using YOLOv8 model. Returns a summary of all detections."""
-    if yolo_model is None:
+def inference_model_path():
+    """Model file used by the configured inference backend"""
+    if app.config['INFERENCE_BACKEND'] == 'onnx':
+        return app.config['ONNX_MODEL_PATH']
+    if app.config['INFERENCE_BACKEND'] == 'onnx-int8':
+        return app.config['INT8_MODEL_PATH']
+    return app.config['MODEL_PATH']
+
+inference_backend = None
+model_version = None
+class_table = None
+inference_backend_lock = threading.Lock()
+
+def get_inference_backend():
+    """Load the configured inference backend on first use, or in warm_up(). Returns None if it cannot be loaded."""
+    global inference_backend, model_version, class_table
+    with inference_backend_lock:
+        if inference_backend is None:
+            try:
+                # The INT8 model is an ONNX model too, only the file differs
+                backend_name = 'onnx' if app.config['INFERENCE_BACKEND'] == 'onnx-int8' else app.config['INFERENCE_BACKEND']
+                if app.config['INFERENCE_WORKERS'] > 0:
+                    # Each worker process loads its own copy of the model
+                    backend = InferenceWorkerPool(
+                        load_backend, args=(backend_name, inference_model_path()),
+                        kwargs={'imgsz': app.config['INFERENCE_IMAGE_SIZE']},
+                        num_workers=app.config['INFERENCE_WORKERS'],
+                        max_batch_size=app.config['INFERENCE_MAX_BATCH_SIZE'],
+                        num_threads=app.config['INFERENCE_WORKER_THREADS'],
+                        restart=app.config['INFERENCE_WORKER_RESTART']
+                    ).start()
+                    atexit.register(backend.shutdown)
+                else:
+                    backend = load_backend(backend_name, inference_model_path(),
+                                           imgsz=app.config['INFERENCE_IMAGE_SIZE'])
+                # Cached results are only valid for the weights that produced them
+                model_version = file_sha256(inference_model_path())[:16]
+                # Class name -> (fruit, ripeness) parsing happens once here, not per detected box
+                class_table = build_class_table(backend.names)
+                inference_backend = backend
+                logging.info(f"Inference backend '{backend.name}' loaded {inference_model_path()}")
+                logging.debug(f"Model classes: {backend.names}")
+                print("YOLO model class names:", backend.names)
+            except Exception as e:
+                logging.error(f"Error loading YOLO model: {str(e)}")
+        return inference_backend
+
+def run_yolo_batch(items):
+    """Run batched forward passes over (BGR array, InferenceParams) items; items with equal parameters
+    share a pass. Returns one BackendResult per item."""
+    groups = {}
+    for index, (_, params) in enumerate(items):
+        groups.setdefault(params, []).append(index)
+    results = [None] * len(items)
+    for params, indices in groups.items():
+        predictions = inference_backend.predict([items[i][0] for i in indices], **params._asdict())
+        for i, prediction in zip(indices, predictions):
+            results[i] = prediction
+    return results
+
+# Concurrent requests share batched forward passes instead of running batch-size-1 calls
+inference_batcher = MicroBatcher(
+    run_yolo_batch,
+    max_batch_size=app.config['INFERENCE_MAX_BATCH_SIZE'],
+    max_wait_ms=app.config['INFERENCE_MAX_WAIT_MS']
+)
+
+annotated_cache = None
+result_cache = None
+blob_store = None
+
+def get_blob_store():
+    """Content-addressed store of uploaded files, created on first use"""
+    global blob_store
+    if blob_store is None:
+        blob_store = BlobStore(app.config['BLOB_FOLDER'])
+    return blob_store
+
+def upload_file_path(upload):
+    """Path of an upload's original file: its blob, or the flat file of uploads saved by older versions"""
+    if upload.blob_path:
+        return get_blob_store().path(upload.blob_path)
+    return os.path.join(app.config['UPLOAD_FOLDER'], upload.image_path[len('processed_'):])
+
+def get_annotated_cache():
+    """Annotated processed_ images, rendered on first request and evicted least recently used"""
+    global annotated_cache
+    if annotated_cache is None:
+        annotated_cache = DiskCache(app.config['ANNOTATED_CACHE_FOLDER'], app.config['ANNOTATED_CACHE_BYTES'])
+    return annotated_cache
+
+def get_result_cache():
+    """Repeat uploads of identical bytes reuse earlier results instead of re-running YOLO"""
+    global result_cache
+    if result_cache is None:
+        result_cache = ResultCache(
+            app.config['RESULT_CACHE_FOLDER'],
+            memory_max_bytes=app.config['RESULT_CACHE_MEMORY_BYTES'],
+            disk_max_bytes=app.config['RESULT_CACHE_DISK_BYTES']
+        )
+    return result_cache
+
+def use_tiling(width, height):
+    """Whether an image of this size runs through tiled inference"""
+    mode = app.config['INFERENCE_TILING']
+    if mode == 'auto':
+        return max(width, height) >= app.config['TILING_MIN_SIDE']
+    return mode == 'on'
+
+def predict_images(backend, images, params):
+    """Run BGR arrays through the model, batched together, with confidence, IoU, max_det and imgsz
+    applied inside the model call. Returns one BackendResult per image."""
+    if isinstance(backend, InferenceWorkerPool):
+        # Requests go straight to the least busy worker, which batches whatever queued up behind it
+        return backend.predict(images, **params._asdict())
+    futures = [inference_batcher.submit((image, params)) for image in images]
+    return [future.result() for future in futures]
+
+def default_inference_params():
+    """InferenceParams for users without inference settings; imgsz None means adaptive"""
+    image_size = app.config['DEFAULT_IMAGE_SIZE']
+    return InferenceParams(conf=app.config['CONFIDENCE_THRESHOLD'], iou=app.config['INFERENCE_IOU'],
+                           max_det=app.config['INFERENCE_MAX_DET'],
+                           imgsz=None if image_size == 'auto' else int(image_size))
+
+def user_inference_params(user):
+    """InferenceParams from a user's settings page, falling back to the app defaults"""
+    return params_from_settings(user.settings if user else None, default_inference_params())
+
+def cache_variant(params, tiled):
+    """make_cache_key variant for results of these parameters and of the tiling, adaptive sizing and
+    duplicate settings they run with; None for the original defaults"""
+    parts = []
+    if tiled:
+        parts.append(f"tiled:tile={app.config['TILE_SIZE']}:overlap={app.config['TILE_OVERLAP']}:"
+                     f"merge={app.config['TILE_MERGE_THRESHOLD']}:full_frame={app.config['TILE_FULL_FRAME']}")
+    if params != DEFAULT_PARAMS:
+        parts.append(f"iou={params.iou}:max_det={params.max_det}:imgsz={params.imgsz or 'auto'}")
+        if params.imgsz is None and not tiled:
+            parts.append(f"sizes={app.config['ADAPTIVE_IMAGE_SIZES']}")
+    # 1 is the duplicate handling that keys without this part were stored with
+    if app.config['DUPLICATE_IOU'] != 1.0:
+        parts.append(f"duplicate_iou={app.config['DUPLICATE_IOU']}")
+    return ':'.join(parts) or None
+
+def detect_fruit(image_path, params=None):
+    """Detect fruit and ripeness using YOLOv8 model. Returns a summary of all detections.
+    params are the InferenceParams to run with, the app defaults if None.
+    The annotated processed_ image is not drawn here; /uploads renders it on first request."""
+    backend = get_inference_backend()
+    if backend is None:
         raise ValueError("YOLO model not loaded properly")
     try:
-        results = yolo_model(image_path)
+        params = params or default_inference_params()
+        confidence_threshold = params.conf
+        stage_start = time.perf_counter()
+        with open(image_path, 'rb') as f:
+            data = f.read()
+        width, height = image_size(data)
+        tiled = use_tiling(width, height)
+        cache_key = make_cache_key(data, model_version, confidence_threshold, cache_variant(params, tiled))
+        cached = get_result_cache().get(cache_key)
+        # Entries cached before boxes were stored cannot be rendered later, so they count as misses
+        if cached is not None and all('box' in det for det in cached['detections']):
+            logging.debug("Result cache hit")
+            return [dict(det) for det in cached['detections']]
+        read_ms = (time.perf_counter() - stage_start) * 1000
+        
+        # Decode once, at reduced scale for large JPEGs unless tiles need the full resolution;
+        # the model gets this array instead of the path
+        stage_start = time.perf_counter()
+        # Adaptive sizing may pick up to the largest size, so decode with enough pixels for it
+        decode_size = params.imgsz or max(size for _, size in app.config['ADAPTIVE_IMAGE_SIZES'])
+        array, scale = decode_image(data, None if tiled else decode_size)
+        decode_ms = (time.perf_counter() - stage_start) * 1000
+        if tiled:
+            # Tiles are already model-sized
+            params = params._replace(imgsz=app.config['TILE_SIZE'])
+        elif params.imgsz is None:
+            density = estimate_density(array)
+            params = params._replace(imgsz=choose_image_size(width, height, density,
+                                                             app.config['ADAPTIVE_IMAGE_SIZES']))
+            logging.debug(f"Adaptive image size {params.imgsz} for {width}x{height}, density {density:.3f}")
+        
+        stage_start = time.perf_counter()
+        # Backends take BGR arrays, like cv2.imread output
+        image = np.ascontiguousarray(array[:, :, ::-1])
+        if tiled:
+            # Small fruit keep their pixels in model-sized tiles; all tiles run as one batch
+            tiles, origins = make_tiles(image, app.config['TILE_SIZE'], app.config['TILE_OVERLAP'])
+            if app.config['TILE_FULL_FRAME'] and len(tiles) > 1:
+                tiles.append(image)
+                origins.append((0, 0))
+            results = [merge_tile_results(predict_images(backend, tiles, params), origins,
+                                          app.config['TILE_MERGE_THRESHOLD'], min_score=confidence_threshold)]
+            logging.debug(f"Tiled inference: {len(tiles)} tiles, {len(results[0].boxes)} merged detections")
+        else:
+            results = predict_images(backend, [image], params)
+        inference_ms = (time.perf_counter() - stage_start) * 1000
+        stage_start = time.perf_counter()
         detections_summary = []
-        seen_boxes = set()
-        image = Image.open(image_path).convert('RGB')
-        draw = ImageDraw.Draw(image)
-        confidence_threshold = 0.5  # Set your desired threshold
         for r in results:
-            boxes = r.boxes
-            if len(boxes) == 0:
+            if len(r.boxes) == 0:
                 logging.warning("No detections found in image")
                 continue
-            for i, box in enumerate(boxes):
-                cls = int(box.cls[0])
-                conf = float(box.conf[0])
-                if conf < confidence_threshold:
-                    continue
-                if not hasattr(yolo_model, 'names'):
-                    raise ValueError("Model classes not found")
-                fruit_type = yolo_model.names[cls]
-                # Extract fruit type and ripeness
-                if '_' in fruit_type:
-                    fruit_name, ripeness = fruit_type.split('_', 1)
-                    fruit_name = fruit_name.strip().title()
-                    ripeness = ripeness.lower().strip()
-                else:
-                    fruit_name = fruit_type.strip().title()
-                    ripeness = 'unknown'
-                    if 'unripe' in fruit_type.lower():
-                        ripeness = 'unripe'
-                    elif 'ripe' in fruit_type.lower():
-                        ripeness = 'ripe'
-                # Get box coordinates
-                x1, y1, x2, y2 = map(int, box.xyxy[0])
-                box_tuple = (x1, y1, x2, y2)
-                if box_tuple in seen_boxes:
-                    continue
-                seen_boxes.add(box_tuple)
-                # Set color: green for unripe, red for others
-                if ripeness == 'unripe':
-                    box_color = (0, 200, 0)
-                else:
-                    box_color = (255, 0, 0)
-                # Draw bounding box
-                draw.rectangle([x1, y1, x2, y2], outline=box_color, width=3)
-                # Draw label background
-                label_text = f"{ripeness} {conf:.2f}"
-                text_width = draw.textlength(label_text)
-                label_height = 18
-                draw.rectangle([x1, y1 - label_height, x1 + text_width + 8, y1], fill=box_color)
-                draw.text((x1 + 4, y1 - label_height + 2), label_text, fill=(255, 255, 255))
-                detections_summary.append({
-                    'fruit_type': fruit_name,
-                    'ripeness': ripeness,
-                    'confidence': conf,
-                    'is_mangosteen': fruit_name.lower() == 'mangosteen'
-                })
-        processed_filename = f"processed_{os.path.basename(image_path)}"
-        processed_path = os.path.join(app.config['UPLOAD_FOLDER'], processed_filename)
-        image.save(processed_path)
-        logging.debug(f"Processed image saved to: {processed_path}")
+            if not backend.names:
+                raise ValueError("Model classes not found")
+            detections_summary.extend(summarize_result(r, class_table, confidence_threshold, scale,
+                                                       app.config['DUPLICATE_IOU']))
+        postprocess_ms = (time.perf_counter() - stage_start) * 1000
+        logging.debug(f"detect_fruit stages: read+cache lookup {read_ms:.1f} ms, decode {decode_ms:.1f} ms, "
+                      f"inference {inference_ms:.1f} ms, postprocess {postprocess_ms:.1f} ms; "
+                      f"decoded {array.shape[1]}x{array.shape[0]} of {width}x{height} ({array.nbytes / 1e6:.1f} MB)")
         if not detections_summary:
             raise ValueError("No valid detections found in the image")
+        get_result_cache().put(cache_key, detections_summary)
         return detections_summary
     except Exception as e:
         logging.error(f"Error in detect_fruit: {str(e)}")
         raise ValueError(f"Error during detection: {str(e)}")
 
+def draw_detections(image, detections):
+    """Draw labelled boxes for (ripeness, confidence, (x1, y1, x2, y2)) detections onto a PIL image"""
+    draw = ImageDraw.Draw(image)
+    for ripeness, conf, (x1, y1, x2, y2) in detections:
+        # Set color: green for unripe, red for others
+        if ripeness == 'unripe':
+            box_color = (0, 200, 0)
+        else:
+            box_color = (255, 0, 0)
+        # Draw bounding box
+        draw.rectangle([x1, y1, x2, y2], outline=box_color, width=3)
+        # Draw label background
+        label_text = f"{ripeness} {conf:.2f}"
+        text_width = draw.textlength(label_text)
+        label_height = 18
+        draw.rectangle([x1, y1 - label_height, x1 + text_width + 8, y1], fill=box_color)
+        draw.text((x1 + 4, y1 - label_height + 2), label_text, fill=(255, 255, 255))
+    return image
+
+def render_annotated_image(processed_filename):
+    """Annotated image bytes for processed_<name>, drawn from the original upload and its stored boxes.
+    Returns None if the original or its upload record is missing."""
+    data = get_annotated_cache().get(processed_filename)
+    if data is not None:
+        return data
+    if is_video_file(processed_filename):
+        return None
+    upload = Upload.query.filter_by(image_path=processed_filename).order_by(Upload.id.desc()).first()
+    if upload is None:
+        return None
+    original_path = upload_file_path(upload)
+    if not os.path.exists(original_path):
+        return None
+    # Boxes are in upright coordinates, like the array the model saw
+    image = upright(Image.open(original_path)).convert('RGB')
+    draw_detections(image, [(d.ripeness, d.confidence, d.box) for d in upload.detections if d.box])
+    buffer = BytesIO()
+    image.save(buffer, format=Image.registered_extensions().get(os.path.splitext(processed_filename)[1].lower(), 'PNG'))
+    data = buffer.getvalue()
+    try:
+        get_annotated_cache().put(processed_filename, data)
+    except OSError as e:
+        logging.warning(f"Could not cache annotated image {processed_filename}: {str(e)}")
+    return data
+
+def save_upload(file, prefix=None):
+    """
+    Store an uploaded file in the blob store, where identical files are kept once
+    
+    Returns:
+        (unique_filename, blob, file_path): the upload's name, from which its image_path and URLs
+        are built, its StoredBlob, whose path and size go into the Upload row, and the blob's absolute path
+    """
+    filename = secure_filename(file.filename)
+    # The random part keeps names unique when several uploads arrive within a second
+    timestamp = f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:8]}"
+    unique_filename = f"{timestamp}_{prefix}_{filename}" if prefix else f"{timestamp}_{filename}"
+    
+    blob = get_blob_store().put(file.stream, normalize_extension(filename))
+    file_path = get_blob_store().path(blob.path)
+    logging.debug(f"File saved to: {file_path}" if blob.created else f"File already stored at: {file_path}")
+    
+    # Verify file was saved
+    if not os.path.exists(file_path):
+        raise FileNotFoundError(f"Failed to save file: {file_path}")
+    return unique_filename, blob, file_path
+
+def detect_fruit_timed(image_path, params=None):
+    """Run detect_fruit and measure it. Returns (detections, inference_ms)."""
+    start = time.perf_counter()
+    detections = detect_fruit(image_path, params)
+    return detections, (time.perf_counter() - start) * 1000
+
+def detect_video(video_path, params=None):
+    """
+    Count unique fruit in a video file
+    
+    Sampled frames stream through the model in batches and a tracker follows each fruit across
+    frames, so a fruit visible for many frames is counted once. Returns a dictionary with
+    'detections', one per tracked fruit in the summarize_result format plus 'track_id',
+    'first_frame', 'last_frame' and 'hits', and the video's 'frames', 'processed_frames' and 'fps'.
+    """
+    backend = get_inference_backend()
+    if backend is None:
+        raise ValueError("YOLO model not loaded properly")
+    try:
+        params = params or default_inference_params()
+        info = video_info(video_path)
+        # Low-confidence boxes are what lets a track survive blur and occlusion, so the model
+        # keeps them and the tracker applies the user's threshold when starting tracks
+        model_params = params._replace(conf=min(params.conf, app.config['VIDEO_TRACK_LOW_CONF']))
+        decode_size = params.imgsz or max(size for _, size in app.config['ADAPTIVE_IMAGE_SIZES'])
+        tracker = FruitTracker(
+            high_threshold=params.conf,
+            low_threshold=app.config['VIDEO_TRACK_LOW_CONF'],
+            match_iou=app.config['VIDEO_TRACK_IOU'],
+            max_age=max(1, round(app.config['VIDEO_TRACK_MAX_AGE'] * info.fps)),
+            min_hits=app.config['VIDEO_TRACK_MIN_HITS']
+        )
+        
+        def predict(frames):
+            nonlocal model_params
+            if model_params.imgsz is None:
+                # One input size for the whole video, picked from its first frame, keeps boxes consistent across frames
+                density = estimate_density(frames[0])
+                model_params = model_params._replace(imgsz=choose_image_size(
+                    info.width, info.height, density, app.config['ADAPTIVE_IMAGE_SIZES']))
+                logging.debug(f"Adaptive image size {model_params.imgsz} for video {info.width}x{info.height}, "
+                              f"density {density:.3f}")
+            return predict_images(backend, frames, model_params)
+        
+        frames = sample_frames(video_path, sample_fps=app.config['VIDEO_SAMPLE_FPS'], max_side=decode_size,
+                               motion_threshold=app.config['VIDEO_MOTION_THRESHOLD'],
+                               max_skip=app.config['VIDEO_MAX_SKIP'])
+        processed = track_video(frames, predict, tracker, batch_size=app.config['INFERENCE_MAX_BATCH_SIZE'],
+                                queue_size=app.config['VIDEO_QUEUE_FRAMES'])
+        if not backend.names:
+            raise ValueError("Model classes not found")
+        detections = []
+        for track in tracker.tracks():
+            class_id = track.class_id
+            detections.append({
+                'fruit_type': class_table.fruit_types[class_id],
+                'ripeness': class_table.ripeness[class_id],
+                'confidence': float(track.confidence),
+                'is_mangosteen': bool(class_table.is_mangosteen[class_id]),
+                'class_id': class_id,
+                'box': [int(v) for v in track.best_box],
+                'track_id': track.track_id,
+                'first_frame': track.first_frame,
+                'last_frame': track.last_frame,
+                'hits': track.hits
+            })
+        logging.debug(f"detect_video: {processed} of {info.frame_count} frames run, {len(detections)} unique fruit")
+        if not detections:
+            raise ValueError("No fruit found in the video")
+        return {'detections': detections, 'frames': info.frame_count, 'processed_frames': processed, 'fps': info.fps}
+    except Exception as e:
+        logging.error(f"Error in detect_video: {str(e)}")
+        raise ValueError(f"Error during video detection: {str(e)}")
+
+# One upload's results waiting to be written, timestamped when the request finished
+UploadRecord = namedtuple('UploadRecord', ['user_id', 'image_path', 'detections', 'inference_ms', 'created_at', 'blob_path',
+                                           'file_size'], defaults=(None, None))
+
+def write_uploads(records):
+    """Add Upload rows, their Detection rows and rollup increments for many UploadRecords in bulk (caller commits).
+    Returns the Uploads."""
+    uploads = []
+    for record in records:
+        ripeness_counts = count_ripeness(record.detections)
+        uploads.append(Upload(
+            user_id=record.user_id,
+            image_path=record.image_path,
+            total_count=len(record.detections),
+            ripe_count=ripeness_counts['ripe'],
+            unripe_count=ripeness_counts['unripe'],
+            inference_ms=record.inference_ms,
+            created_at=record.created_at,
+            blob_path=record.blob_path,
+            file_size=record.file_size
+        ))
+    db.session.add_all(uploads)
+    # Assigns the upload ids in one batched INSERT, so detections can reference them
+    db.session.flush()
+    rows = []
+    rollups = {}
+    for upload, record in zip(uploads, records):
+        for det in record.detections:
+            # Results cached before boxes were stored have no box or class id
+            x1, y1, x2, y2 = det.get('box') or (None, None, None, None)
+            rows.append({
+                'user_id': record.user_id,
+                'upload_id': upload.id,
+                'image_path': record.image_path,
+                'fruit_type': det['fruit_type'],
+                'ripeness': det['ripeness'],
+                'confidence': det['confidence'],
+                'timestamp': record.created_at,
+                'class_id': det.get('class_id'),
+                'box_x1': x1,
+                'box_y1': y1,
+                'box_x2': x2,
+                'box_y2': y2
+            })
+            key = (record.user_id, record.created_at.date(), det['fruit_type'], det['ripeness'])
+            count, confidence_sum = rollups.get(key, (0, 0.0))
+            rollups[key] = (count + 1, confidence_sum + det['confidence'])
+    if rows:
+        # One executemany instead of a session.add and an INSERT per box
+        db.session.execute(insert(Detection), rows)
+    update_rollups(rollups)
+    return uploads
+
+def add_upload(user_id, image_path, detections, inference_ms=None, blob_path=None, file_size=None):
+    """Add an Upload row with its counts, one Detection row per detected object, and fold them into the daily rollups (caller commits). Returns the Upload."""
+    return write_uploads([UploadRecord(user_id, image_path, detections, inference_ms, datetime.utcnow(), blob_path,
+                                       file_size)])[0]
+
+detection_writer = None
+detection_writer_lock = threading.Lock()
+
+def get_detection_writer():
+    """Write-behind writer for upload rows, started on first use. None unless DETECTION_WRITE_BEHIND is on."""
+    global detection_writer
+    with detection_writer_lock:
+        if detection_writer is None and app.config['DETECTION_WRITE_BEHIND']:
+            detection_writer = WriteBehindWriter(
+                app, db, write_uploads,
+                max_queue=app.config['WRITE_BEHIND_MAX_QUEUE'],
+                max_batch=app.config['WRITE_BEHIND_MAX_BATCH'],
+                flush_interval=app.config['WRITE_BEHIND_FLUSH_MS'] / 1000
+            ).start()
+            # Queued rows are committed before the process exits
+            atexit.register(detection_writer.stop)
+        return detection_writer
+
+def save_upload_results(user_id, image_path, detections, inference_ms=None, blob_path=None, file_size=None):
+    """Store one upload's rows: queued for the write-behind writer when it is on, otherwise added to the session (caller commits)"""
+    writer = get_detection_writer()
+    record = UploadRecord(user_id, image_path, detections, inference_ms, datetime.utcnow(), blob_path, file_size)
+    if writer is None:
+        write_uploads([record])
+    else:
+        writer.submit(user_id, record)
+
+def wait_for_writes(user_id):
+    """Read-your-writes: block until the user's queued upload rows are committed"""
+    if detection_writer is not None and not detection_writer.wait(user_id, app.config['WRITE_BEHIND_WAIT_TIMEOUT']):
+        logging.warning(f"Timed out waiting for queued uploads of user {user_id}")
+
+# INSERT constructs with ON CONFLICT DO UPDATE, per database dialect
+UPSERT_INSERTS = {'sqlite': sqlite_insert, 'postgresql': postgresql_insert}
+
+def upsert_insert(table, dialect_name):
+    """INSERT for table that supports on_conflict_do_update in the given dialect. Raises RuntimeError for others."""
+    if dialect_name not in UPSERT_INSERTS:
+        raise RuntimeError(f"Detection rollups need INSERT ... ON CONFLICT, which the {dialect_name} database "
+                           f"does not support; use SQLite or PostgreSQL")
+    return UPSERT_INSERTS[dialect_name](table)
+
+def update_rollups(rollups):
+    """Add {(user_id, day, fruit_type, ripeness): (count, confidence_sum)} to the rollup rows"""
+    if not rollups:
+        return
+    table = DetectionRollup.__table__
+    statement = upsert_insert(table, db.engine.dialect.name)
+    statement = statement.on_conflict_do_update(
+        index_elements=['user_id', 'day', 'fruit_type', 'ripeness'],
+        set_={
+            'count': table.c.count + statement.excluded.count,
+            'confidence_sum': table.c.confidence_sum + statement.excluded.confidence_sum
+        }
+    )
+    # One cached statement run over every row, rather than a statement compiled per user and batch
+    db.session.execute(statement, [
+        {'user_id': user_id, 'day': day, 'fruit_type': fruit_type, 'ripeness': ripeness,
+         'count': count, 'confidence_sum': confidence_sum}
+        for (user_id, day, fruit_type, ripeness), (count, confidence_sum) in rollups.items()
+    ])
+
+def rebuild_rollups():
+    """Recompute every rollup row from the Detection table. Returns the number of rollup rows."""
+    db.session.query(DetectionRollup).delete()
+    db.session.execute(insert(DetectionRollup).from_select(
+        ['user_id', 'day', 'fruit_type', 'ripeness', 'count', 'confidence_sum'],
+        select(
+            Detection.user_id,
+            func.date(Detection.timestamp),
+            Detection.fruit_type,
+            Detection.ripeness,
+            func.count(Detection.id),
+            func.sum(Detection.confidence)
+        ).group_by(Detection.user_id, func.date(Detection.timestamp), Detection.fruit_type, Detection.ripeness)
+    ))
+    db.session.commit()
+    return DetectionRollup.query.count()
+
+def backfill_uploads():
+    """Create Upload rows for detections saved before uploads existed, one per (user, image_path). Returns the number created."""
+    unlinked = Detection.upload_id.is_(None)
+    created = db.session.query(Detection.user_id, Detection.image_path).filter(unlinked).distinct().count()
+    db.session.execute(insert(Upload).from_select(
+        ['user_id', 'image_path', 'total_count', 'ripe_count', 'unripe_count', 'created_at'],
+        select(
+            Detection.user_id,
+            Detection.image_path,
+            func.count(Detection.id),
+            func.sum(case((Detection.ripeness == 'ripe', 1), else_=0)),
+            func.sum(case((Detection.ripeness == 'unripe', 1), else_=0)),
+            func.max(Detection.timestamp)
+        ).where(unlinked).group_by(Detection.user_id, Detection.image_path).order_by(func.max(Detection.timestamp))
+    ))
+    # The newest upload for a path is the one just created above
+    db.session.execute(Detection.__table__.update().where(unlinked).values(
+        upload_id=select(func.max(Upload.id)).where(
+            Upload.user_id == Detection.user_id,
+            Upload.image_path == Detection.image_path
+        ).scalar_subquery()
+    ))
+    db.session.commit()
+    return created
+
+def migrate_upload_files(remove=True, chunk_size=500):
+    """
+    Move files saved flat in UPLOAD_FOLDER by older versions into the blob store and record their blob paths
+    
+    Args:
+        remove: Delete each flat original, and its pre-rendered processed_ image, once its blob path is committed
+        chunk_size: Rows per commit
+        
+    Returns:
+        Number of uploads and queued jobs moved
+    """
+    store = get_blob_store()
+    moved = 0
+    for model, name_of in ((Upload, lambda row: row.image_path[len('processed_'):]),
+                           (DetectionJob, lambda row: row.filename)):
+        last_id = None
+        while True:
+            query = model.query.filter(model.blob_path.is_(None))
+            if model is Upload:
+                query = query.filter(Upload.image_path.startswith('processed_', autoescape=True))
+            if last_id is not None:
+                query = query.filter(model.id > last_id)
+            rows = query.order_by(model.id).limit(chunk_size).all()
+            if not rows:
+                break
+            last_id = rows[-1].id
+            flat_files = []
+            for row in rows:
+                path = os.path.join(app.config['UPLOAD_FOLDER'], name_of(row))
+                if not os.path.isfile(path):
+                    continue
+                blob = store.put_file(path)
+                row.blob_path = blob.path
+                if model is Upload:
+                    row.file_size = blob.size
+                flat_files += [path, os.path.join(app.config['UPLOAD_FOLDER'], f"processed_{name_of(row)}")]
+                moved += 1
+            db.session.commit()
+            if remove:
+                for path in flat_files:
+                    if os.path.isfile(path):
+                        os.remove(path)
+    return moved
+
+FruitCount = namedtuple('FruitCount', ['fruit_type', 'count'])
+RipenessCount = namedtuple('RipenessCount', ['ripeness', 'count'])
+
+def rollup_summary(user_id, period_starts):
+    """
+    Aggregate a user's rollup rows in one small grouped query
+    
+    Args:
+        user_id: User id
+        period_starts: Dictionary of period name -> first day counted in that period
+        
+    Returns:
+        Dictionary with 'total', 'confidence_sum', one count per period name,
+        and 'by_fruit' / 'by_ripeness' Counters over all time
+    """
+    period_columns = [
+        func.sum(case((DetectionRollup.day >= start, DetectionRollup.count), else_=0)).label(name)
+        for name, start in period_starts.items()
+    ]
+    rows = db.session.query(
+        DetectionRollup.fruit_type,
+        DetectionRollup.ripeness,
+        func.sum(DetectionRollup.count).label('total'),
+        func.sum(DetectionRollup.confidence_sum).label('confidence_sum'),
+        *period_columns
+    ).filter(
+        DetectionRollup.user_id == user_id
+    ).group_by(
+        DetectionRollup.fruit_type,
+        DetectionRollup.ripeness
+    ).all()
+    
+    summary = {name: 0 for name in period_starts}
+    summary.update({'total': 0, 'confidence_sum': 0.0, 'by_fruit': Counter(), 'by_ripeness': Counter()})
+    for row in rows:
+        summary['total'] += row.total
+        summary['confidence_sum'] += row.confidence_sum
+        summary['by_fruit'][row.fruit_type] += row.total
+        summary['by_ripeness'][row.ripeness] += row.total
+        for name in period_starts:
+            summary[name] += getattr(row, name)
+    return summary
+
+def count_ripeness(detections):
+    """Count detections per ripeness, always including 'ripe' and 'unripe' keys"""
+    ripeness_counts = Counter([det['ripeness'] for det in detections if det['ripeness'] != 'unknown'])
+    for key in ['ripe', 'unripe']:
+        if key not in ripeness_counts:
+            ripeness_counts[key] = 0
+    return ripeness_counts
+
+def build_result_context(user_id, image_path, detections):
+    """Template variables for the result page of one processed image"""
+    # Count breakdown of detected classes
+    class_counts = Counter([det['fruit_type'] for det in detections])
+    # Count ripe and unripe objects in the current detection
+    ripeness_counts = count_ripeness(detections)
+    
+    logging.debug(f"Class counts: {class_counts}")
+    logging.debug(f"Ripeness counts: {ripeness_counts}")
+    
+    logging.info(f"Number of ripe: {ripeness_counts.get('ripe', 0)}")
+    logging.info(f"Number of unripe: {ripeness_counts.get('unripe', 0)}")
+    
+    # Query the total sum of ripe and unripe detections for the user, including the upload just queued
+    wait_for_writes(user_id)
+    total_ripe_sum, total_unripe_sum = db.session.query(
+        func.coalesce(func.sum(Upload.ripe_count), 0),
+        func.coalesce(func.sum(Upload.unripe_count), 0)
+    ).filter(Upload.user_id == user_id).one()
+    
+    return dict(image_path=image_path,
+                fruit_type=detections[0]['fruit_type'],
+                ripeness=detections[0]['ripeness'],
+                confidence=detections[0]['confidence'],
+                detections_summary=detections,
+                class_counts=class_counts,
+                ripeness_counts=ripeness_counts,
+                total_ripe=ripeness_counts['ripe'],
+                total_unripe=ripeness_counts['unripe'],
+                total_ripe_sum=total_ripe_sum,
+                total_unripe_sum=total_unripe_sum,
+                is_mangosteen=detections[0]['is_mangosteen'])
+
+def process_detection_job(job):
+    """Run detection for a queued job. Detection rows are committed together with the job status."""
+    image_path = f"processed_{job.filename}"
+    if job.blob_path:
+        file_path = get_blob_store().path(job.blob_path)
+    else:
+        file_path = os.path.join(app.config['UPLOAD_FOLDER'], job.filename)
+    file_size = os.path.getsize(file_path)
+    params = user_inference_params(db.session.get(User, job.user_id))
+    if is_video_file(job.filename):
+        # One Detection row per tracked fruit, so history and rollups count each fruit once
+        start = time.perf_counter()
+        summary = detect_video(file_path, params)
+        add_upload(job.user_id, image_path, summary['detections'], (time.perf_counter() - start) * 1000, job.blob_path,
+                   file_size)
+        ripeness_counts = count_ripeness(summary['detections'])
+        summary.update({'image_path': image_path, 'video': True, 'total': len(summary['detections']),
+                        'ripe': ripeness_counts['ripe'], 'unripe': ripeness_counts['unripe']})
+        return summary
+    detections, inference_ms = detect_fruit_timed(file_path, params)
+    add_upload(job.user_id, image_path, detections, inference_ms, job.blob_path, file_size)
+    return {'image_path': image_path, 'detections': detections}
+
+database_ready = False
+database_lock = threading.Lock()
+
+def ensure_database():
+    """Run prepare_database once per process, on the first request or in warm_up()"""
+    global database_ready
+    with database_lock:
+        if not database_ready:
+            with app.app_context():
+                prepare_database()
+            database_ready = True
+
+@app.before_request
+def prepare_database_once():
+    """Database preparation waits for the first request so importing the app stays cheap"""
+    if not database_ready:
+        ensure_database()
+
+job_runner = JobRunner(
+    app, db, DetectionJob, process_detection_job,
+    num_workers=app.config['JOB_WORKERS'],
+    poll_interval=app.config['JOB_POLL_INTERVAL'],
+    lease_seconds=app.config['JOB_LEASE_SECONDS']
+)
+
+@app.before_request
+def read_your_writes():
+    """Pages read a user's uploads only after the rows they queued are committed"""
+    if detection_writer is not None and current_user.is_authenticated:
+        wait_for_writes(current_user.id)
+
+@app.before_request
+def start_job_runner():
+    """Start the job workers with the first request, resuming any jobs left from a restart"""
+    if not job_runner.running:
+        job_runner.start()
+
+batch_executor = None
+
+def get_batch_executor():
+    """Worker pool shared by batch uploads, created on first use"""
+    global batch_executor
+    if batch_executor is None:
+        batch_executor = ThreadPoolExecutor(max_workers=app.config['BATCH_UPLOAD_WORKERS'],
+                                            thread_name_prefix='batch-detect')
+    return batch_executor
+
 @app.route('/')
 def index():
     """Home page route"""
@@ -405,6 +1236,7 @@ def register():
 
 @app.route('/dashboard')
 @login_required
+@read_only
 def dashboard():
     """Dashboard overview with statistics"""
     try:
@@ -414,46 +1246,22 @@ def dashboard():
         week_start = today_start - timedelta(days=today_start.weekday())
         month_start = today_start.replace(day=1)
         
-        # Get detections for different time periods
-        today_detections = Detection.query.filter(
-            Detection.user_id == current_user.id,
-            Detection.timestamp >= today_start
-        ).count()
-        
-        week_detections = Detection.query.filter(
-            Detection.user_id == current_user.id,
-            Detection.timestamp >= week_start
-        ).count()
-        
-        month_detections = Detection.query.filter(
-            Detection.user_id == current_user.id,
-            Detection.timestamp >= month_start
-        ).count()
+        # Period totals, common objects and ripeness split all come from the daily rollups
+        summary = rollup_summary(current_user.id, {
+            'today': today_start.date(),
+            'week': week_start.date(),
+            'month': month_start.date()
+        })
+        today_detections = summary['today']
+        week_detections = summary['week']
+        month_detections = summary['month']
         
         # Get most common objects (fruit types)
-        common_objects = db.session.query(
-            Detection.fruit_type,
-            func.count(Detection.id).label('count')
-        ).filter(
-            Detection.user_id == current_user.id
-        ).group_by(
-            Detection.fruit_type
-        ).order_by(
-            func.count(Detection.id).desc()
-        ).limit(5).all()
+        common_objects = [FruitCount(fruit_type, count) for fruit_type, count in summary['by_fruit'].most_common(5)]
         
         # Get ripeness distribution
-        ripeness_stats = db.session.query(
-            Detection.ripeness,
-            func.count(Detection.id).label('count')
-        ).filter(
-            Detection.user_id == current_user.id,
-            Detection.ripeness != 'unknown'
-        ).group_by(
-            Detection.ripeness
-        ).order_by(
-            func.count(Detection.id).desc()
-        ).all()
+        ripeness_stats = [RipenessCount(ripeness, count) for ripeness, count in summary['by_ripeness'].most_common()
+                          if ripeness != 'unknown']
         
         # Get recent detections for the activity feed
         recent_detections = Detection.query.filter_by(
@@ -492,74 +1300,23 @@ def detect():
             return render_template('detect.html')
         
         try:
-            # Create a unique filename
-            filename = secure_filename(file.filename)
-            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-            unique_filename = f"{timestamp}_{filename}"
-            file_path = os.path.join(app.config['UPLOAD_FOLDER'], unique_filename)
-            
-            # Save the file
-            file.save(file_path)
-            logging.debug(f"File saved to: {file_path}")
-            
-            # Verify file was saved
-            if not os.path.exists(file_path):
-                raise FileNotFoundError(f"Failed to save file: {file_path}")
+            unique_filename, blob, file_path = save_upload(file)
             
             # Process the image
             logging.debug("Starting fruit detection...")
-            detections = detect_fruit(file_path)
+            detections, inference_ms = detect_fruit_timed(file_path, user_inference_params(current_user))
             logging.debug(f"Detection results: {detections}")
             
             if not detections:
                 raise ValueError("No detections found in the image")
             
-            # Save every detection (bounding box/object) as a separate Detection row
-            for det in detections:
-                detection = Detection(
-                    user_id=current_user.id,
-                    image_path=f"processed_{unique_filename}",
-                    fruit_type=det['fruit_type'],
-                    ripeness=det['ripeness'],
-                    confidence=det['confidence'],
-                    timestamp=datetime.utcnow()
-                )
-                db.session.add(detection)
+            # Save the upload and every detection (bounding box/object) as a separate Detection row
+            save_upload_results(current_user.id, f"processed_{unique_filename}", detections, inference_ms,
+                                blob.path, blob.size)
             db.session.commit()
             
-            # Count breakdown of detected classes
-            class_counts = Counter([det['fruit_type'] for det in detections])
-            # Count ripe and unripe objects in the current detection
-            total_ripe = sum(1 for det in detections if det['ripeness'] == 'ripe')
-            total_unripe = sum(1 for det in detections if det['ripeness'] == 'unripe')
-            ripeness_counts = Counter([det['ripeness'] for det in detections if det['ripeness'] != 'unknown'])
-            for key in ['ripe', 'unripe']:
-                if key not in ripeness_counts:
-                    ripeness_counts[key] = 0
-            
-            logging.debug(f"Class counts: {class_counts}")
-            logging.debug(f"Ripeness counts: {ripeness_counts}")
-            
-            logging.info(f"Number of ripe: {ripeness_counts.get('ripe', 0)}")
-            logging.info(f"Number of unripe: {ripeness_counts.get('unripe', 0)}")
-            
-            # Query the total sum of ripe and unripe detections for the current user
-            total_ripe_sum = Detection.query.filter_by(user_id=current_user.id, ripeness='ripe').count()
-            total_unripe_sum = Detection.query.filter_by(user_id=current_user.id, ripeness='unripe').count()
-            
             return render_template('result.html',
-                                image_path=f"processed_{unique_filename}",
-                                fruit_type=detections[0]['fruit_type'],
-                                ripeness=detections[0]['ripeness'],
-                                confidence=detections[0]['confidence'],
-                                detections_summary=detections,
-                                class_counts=class_counts,
-                                ripeness_counts=ripeness_counts,
-                                total_ripe=total_ripe,
-                                total_unripe=total_unripe,
-                                total_ripe_sum=total_ripe_sum,
-                                total_unripe_sum=total_unripe_sum,
-                                is_mangosteen=detections[0]['is_mangosteen'])
+                                **build_result_context(current_user.id, f"processed_{unique_filename}", detections))
             
         except FileNotFoundError as e:
             logging.error(f"File error: {str(e)}")
@@ -576,6 +1333,197 @@ def detect():
     
     return render_template('detect.html')
 
+@app.route('/detect_batch', methods=['POST'])
+@login_required
+def detect_batch():
+    """Run detection on many uploaded images at once and return per-image and aggregate counts as JSON"""
+    files = [f for f in request.files.getlist('files') if f and f.filename]
+    if not files:
+        return jsonify({'error': 'No files selected'}), 400
+    if len(files) > app.config['BATCH_MAX_FILES']:
+        return jsonify({'error': f"Too many files. Upload at most {app.config['BATCH_MAX_FILES']} per batch"}), 400
+    
+    images = []
+    pending = []
+    params = user_inference_params(current_user)
+    for index, file in enumerate(files):
+        if not allowed_file(file.filename):
+            images.append({'filename': file.filename, 'error': 'Invalid file type'})
+            continue
+        try:
+            unique_filename, blob, file_path = save_upload(file, prefix=f"{index:04d}")
+        except Exception as e:
+            logging.error(f"Error saving batch file {file.filename}: {str(e)}")
+            images.append({'filename': file.filename, 'error': 'Error saving the uploaded file'})
+            continue
+        entry = {'filename': file.filename, 'image_path': f"processed_{unique_filename}"}
+        images.append(entry)
+        # Worker threads feed the inference batcher, so these run as batched forward passes
+        pending.append((entry, blob, get_batch_executor().submit(detect_fruit_timed, file_path, params)))
+    
+    totals = Counter()
+    for entry, blob, future in pending:
+        try:
+            detections, inference_ms = future.result()
+        except Exception as e:
+            logging.error(f"Batch detection error for {entry['filename']}: {str(e)}")
+            entry['error'] = str(e)
+            continue
+        ripeness_counts = count_ripeness(detections)
+        entry.update({
+            'detections': detections,
+            'total': len(detections),
+            'ripe': ripeness_counts['ripe'],
+            'unripe': ripeness_counts['unripe']
+        })
+        totals.update({'total': len(detections), 'ripe': ripeness_counts['ripe'], 'unripe': ripeness_counts['unripe']})
+        save_upload_results(current_user.id, entry['image_path'], detections, inference_ms, blob.path, blob.size)
+    
+    try:
+        # All rows from the batch land in a single transaction, unless they were queued for the write-behind writer
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        logging.error(f"Database error saving batch detections: {str(e)}")
+        return jsonify({'error': 'Error saving detection results'}), 500
+    
+    failed = sum(1 for entry in images if 'error' in entry)
+    return jsonify({
+        'images': images,
+        'summary': {
+            'images': len(images),
+            'processed': len(images) - failed,
+            'failed': failed,
+            'total': totals['total'],
+            'ripe': totals['ripe'],
+            'unripe': totals['unripe']
+        }
+    })
+
+@app.route('/detect_async', methods=['POST'])
+@login_required
+def detect_async():
+    """Queue an uploaded image for background detection and return the job id immediately"""
+    file = request.files.get('file')
+    if file is None or file.filename == '':
+        return jsonify({'error': 'No file selected'}), 400
+    if not allowed_file(file.filename):
+        return jsonify({'error': 'Invalid file type. Please upload an image (PNG, JPG, JPEG, or GIF)'}), 400
+    return queue_detection_job(file)
+
+@app.route('/detect_video', methods=['POST'])
+@login_required
+def detect_video_upload():
+    """Queue an uploaded video for background detection and tracking. The job result counts unique fruit
+    rather than per-frame detections."""
+    file = request.files.get('file')
+    if file is None or file.filename == '':
+        return jsonify({'error': 'No file selected'}), 400
+    if not is_video_file(file.filename):
+        return jsonify({'error': 'Invalid file type. Please upload a video (MP4, AVI, MOV, MKV or WEBM)'}), 400
+    return queue_detection_job(file)
+
+def queue_detection_job(file):
+    """Save an upload, queue a DetectionJob for it and return the 202 response with its status URLs"""
+    try:
+        unique_filename, blob, _ = save_upload(file)
+        job = DetectionJob(user_id=current_user.id, filename=unique_filename, blob_path=blob.path)
+        db.session.add(job)
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        logging.error(f"Error queueing detection job: {str(e)}")
+        return jsonify({'error': 'Error saving the uploaded file'}), 500
+    job_runner.notify()
+    data = job.to_dict()
+    data.update({
+        'status_url': url_for('job_status', job_id=job.id),
+        'events_url': url_for('job_events', job_id=job.id)
+    })
+    return jsonify(data), 202
+
+@app.route('/jobs/<job_id>')
+@login_required
+def job_status(job_id):
+    """Current status of a detection job"""
+    job = DetectionJob.query.filter_by(id=job_id, user_id=current_user.id).first_or_404()
+    return jsonify(job.to_dict())
+
+@app.route('/jobs/<job_id>/events')
+@login_required
+def job_events(job_id):
+    """Server-sent events stream of a job's status until it finishes"""
+    DetectionJob.query.filter_by(id=job_id, user_id=current_user.id).first_or_404()
+    
+    def generate():
+        last_status = None
+        while True:
+            db.session.expire_all()
+            job = db.session.get(DetectionJob, job_id)
+            if job.status != last_status:
+                last_status = job.status
+                yield f"data: {json.dumps(job.to_dict())}\n\n"
+            if job.status in ('done', 'failed'):
+                return
+            time.sleep(app.config['JOB_POLL_INTERVAL'])
+    
+    return Response(stream_with_context(generate()), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache'})
+
+@app.route('/jobs/<job_id>/result')
+@login_required
+def job_result(job_id):
+    """Result page for a finished detection job"""
+    job = DetectionJob.query.filter_by(id=job_id, user_id=current_user.id).first_or_404()
+    if job.status == 'failed':
+        flash(job.error or 'Detection failed')
+        return redirect(url_for('detect'))
+    if job.status != 'done':
+        return jsonify(job.to_dict()), 202
+    if job.result.get('video'):
+        # Unique fruit counts of a video; there is no single frame to render
+        return jsonify(job.result)
+    return render_template('result.html',
+                           **build_result_context(job.user_id, job.result['image_path'], job.result['detections']))
+
+@app.route('/uploads/<int:upload_id>/detections')
+@login_required
+@read_only
+def upload_detections(upload_id):
+    """Stored boxes of one upload as JSON, optionally re-filtered with ?min_confidence= without re-running YOLO"""
+    upload = Upload.query.filter_by(id=upload_id, user_id=current_user.id).first_or_404()
+    min_confidence = request.args.get('min_confidence', 0.0, type=float)
+    detections = Detection.query.filter(
+        Detection.upload_id == upload.id,
+        Detection.confidence >= min_confidence
+    ).order_by(Detection.id).all()
+    return jsonify({
+        'upload_id': upload.id,
+        'image_path': upload.image_path,
+        'detections': [{
+            'fruit_type': d.fruit_type,
+            'ripeness': d.ripeness,
+            'confidence': d.confidence,
+            'class_id': d.class_id,
+            'box': d.box
+        } for d in detections]
+    })
+
+@app.route('/inference_stats')
+@login_required
+def inference_stats():
+    """Batching counters, and per-worker utilisation when a worker pool runs the model"""
+    stats = {'backend': app.config['INFERENCE_BACKEND'], 'batcher': inference_batcher.stats()}
+    if isinstance(inference_backend, InferenceWorkerPool):
+        stats['worker_pool'] = inference_backend.stats()
+    return jsonify(stats)
+
+@app.route('/cache_stats')
+@login_required
+def cache_stats():
+    """Hit/miss/eviction counters for the detection result cache"""
+    return jsonify(get_result_cache().stats())
+
 @app.route('/logout')
 @login_required
 def logout():
@@ -584,8 +1532,25 @@ def logout():
 
 # Add a route to serve images directly
 @app.route('/uploads/<filename>')
+@read_only
 def uploaded_file(filename):
-    return send_from_directory(app.config['UPLOAD_FOLDER'], filename)
+    """Original (name) or annotated (processed_name) image of an upload, found through its Upload row's blob path"""
+    mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+    processed = filename.startswith('processed_')
+    image_path = filename if processed else f"processed_{filename}"
+    upload = Upload.query.filter_by(image_path=image_path).order_by(Upload.id.desc()).first()
+    if upload is not None and upload.blob_path:
+        if not processed:
+            return send_file(get_blob_store().path(upload.blob_path), mimetype=mimetype)
+    elif not processed or filename != secure_filename(filename) or \
+            os.path.exists(os.path.join(app.config['UPLOAD_FOLDER'], filename)):
+        # Flat files saved by older versions, including their pre-rendered processed_ images
+        return send_from_directory(app.config['UPLOAD_FOLDER'], filename)
+    # Annotated images are rendered on demand
+    data = render_annotated_image(filename)
+    if data is None:
+        abort(404)
+    return send_file(BytesIO(data), mimetype=mimetype)
 
 # Test route to verify image serving
 @app.route('/test_image/<filename>')
@@ -597,12 +1562,90 @@ def test_image(filename):
         logging.error(f"Error serving image {filename}: {str(e)}")
         return str(e), 404
 
+def prefix_bounds(prefix):
+    """(low, high) such that exactly the strings starting with prefix fall in low <= s < high.
+    Holds for SQLite's default binary collation, where UTF-8 byte order is code point order."""
+    # A trailing highest code point cannot be incremented; the prefix without it bounds the range instead
+    stem = prefix.rstrip(chr(sys.maxunicode))
+    return prefix, stem[:-1] + chr(ord(stem[-1]) + 1)
+
+def stored_image_conditions(owner, prefix=''):
+    """SQL conditions on Upload selecting an owner's stored images, optionally with names starting with prefix"""
+    if prefix:
+        # A range on the image_path index, which SQLite cannot use for LIKE
+        low, high = prefix_bounds(f"processed_{prefix}")
+        conditions = [Upload.image_path >= low, Upload.image_path < high]
+    else:
+        # Matches nearly every upload, so it must not steer SQLite away from the newest-first index
+        conditions = [Upload.image_path.startswith('processed_', autoescape=True)]
+    return conditions + [Upload.user_id == owner]
+
+image_counts = {}
+image_counts_lock = threading.Lock()
+
+def cached_image_count(owner, prefix=''):
+    """Number of an owner's stored images matching prefix, counted at most once per LIST_IMAGES_COUNT_TTL seconds"""
+    key = (owner, prefix)
+    now = time.monotonic()
+    with image_counts_lock:
+        cached = image_counts.get(key)
+    if cached is not None and cached[0] > now:
+        return cached[1]
+    count = db.session.query(func.count(Upload.id)).filter(*stored_image_conditions(owner, prefix)).scalar()
+    with image_counts_lock:
+        if len(image_counts) >= 1024:
+            image_counts.clear()
+        image_counts[key] = (now + app.config['LIST_IMAGES_COUNT_TTL'], count)
+    return count
+
 @app.route('/list_images')
+@login_required
+@read_only
 def list_images():
-    """List all images in the upload folder"""
+    """
+    The current user's stored images newest first, one page at a time, from the Upload index; the
+    filesystem is never listed
+    
+    Query parameters: prefix (start of the image name), limit, and before, the next_cursor of the
+    previous page. The total is cached for LIST_IMAGES_COUNT_TTL seconds.
+    """
     try:
-        images = os.listdir(app.config['UPLOAD_FOLDER'])
-        return jsonify(images)
+        owner = current_user.id
+        prefix = request.args.get('prefix', '')
+        limit = min(max(request.args.get('limit', app.config['LIST_IMAGES_PAGE_SIZE'], type=int), 1),
+                    app.config['LIST_IMAGES_MAX_PAGE_SIZE'])
+        query = db.session.query(
+            Upload.id, Upload.image_path, Upload.file_size, Upload.created_at
+        ).filter(*stored_image_conditions(owner, prefix))
+        
+        # Keyset pagination on (created_at, id), like /history
+        cursor = parse_history_cursor(request.args.get('before'))
+        if cursor:
+            query = query.filter(or_(
+                Upload.created_at < cursor[0],
+                and_(Upload.created_at == cursor[0], Upload.id < cursor[1])
+            ))
+        rows = query.order_by(Upload.created_at.desc(), Upload.id.desc()).limit(limit + 1).all()
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = f"{rows[-1].created_at.isoformat()}_{rows[-1].id}"
+        
+        images = []
+        for row in rows:
+            name = row.image_path[len('processed_'):]
+            video = is_video_file(row.image_path)
+            images.append({
+                'id': row.id,
+                'name': name,
+                'size': row.file_size,
+                'created_at': row.created_at.isoformat(),
+                'url': url_for('uploaded_file', filename=name),
+                # Videos are counted by tracking and have no annotated image
+                'processed_url': None if video else url_for('uploaded_file', filename=row.image_path),
+                'video': video
+            })
+        return jsonify({'images': images, 'total': cached_image_count(owner, prefix), 'next_cursor': next_cursor})
     except Exception as e:
         logging.error(f"Error listing images: {str(e)}")
         return str(e), 500
@@ -616,38 +1659,87 @@ def test():
         logging.error(f"Error in test route: {str(e)}")
         return str(e), 500
 
+def parse_date_arg(value, end_of_day=False):
+    """Parse a YYYY-MM-DD query argument. Returns a datetime, or None if missing or invalid.
+    With end_of_day the start of the following day is returned, for an exclusive upper bound."""
+    if not value:
+        return None
+    try:
+        parsed = datetime.strptime(value.strip(), '%Y-%m-%d')
+    except ValueError:
+        flash(f'Invalid date "{value}", expected YYYY-MM-DD. The filter was ignored.')
+        return None
+    return parsed + timedelta(days=1) if end_of_day else parsed
+
+def history_filter_conditions(args):
+    """SQL conditions on Upload for the ripeness/date_from/date_to history filters in args"""
+    conditions = []
+    ripeness = args.get('ripeness')
+    date_from = parse_date_arg(args.get('date_from'))
+    date_to = parse_date_arg(args.get('date_to'), end_of_day=True)
+    if ripeness == 'ripe':
+        conditions.append(Upload.ripe_count > 0)
+    elif ripeness == 'unripe':
+        conditions.append(Upload.unripe_count > 0)
+    elif ripeness and ripeness != 'all':
+        conditions.append(Upload.detections.any(Detection.ripeness == ripeness))
+    if date_from:
+        conditions.append(Upload.created_at >= date_from)
+    if date_to:
+        conditions.append(Upload.created_at < date_to)
+    return conditions
+
+def representative_detection_id(ripeness=None):
+    """Correlated subquery picking the first detection of each Upload, of the filtered ripeness if one is set"""
+    detection = aliased(Detection)
+    query = select(func.min(detection.id)).where(detection.upload_id == Upload.id)
+    if ripeness and ripeness != 'all':
+        query = query.where(detection.ripeness == ripeness)
+    return query.correlate(Upload).scalar_subquery()
+
+def parse_history_cursor(value):
+    """Decode a 'timestamp_id' keyset cursor. Returns (datetime, id) or None."""
+    try:
+        timestamp, upload_id = value.rsplit('_', 1)
+        return datetime.fromisoformat(timestamp), int(upload_id)
+    except (AttributeError, ValueError):
+        return None
+
+def history_uploads_query(user_id, args):
+    """The user's uploads matching the history filters in args, newest first, after the 'before' cursor if set.
+    The cursor is a WHERE range on ix_upload_user_created, so each page reads only its own index entries."""
+    query = Upload.query.filter(Upload.user_id == user_id, *history_filter_conditions(args))
+    cursor = parse_history_cursor(args.get('before'))
+    if cursor:
+        query = query.filter(or_(
+            Upload.created_at < cursor[0],
+            and_(Upload.created_at == cursor[0], Upload.id < cursor[1])
+        ))
+    return query.order_by(Upload.created_at.desc(), Upload.id.desc())
+
 @app.route('/history', methods=['GET'])
 @login_required
+@read_only
 def history():
-    """Display user's detection history with filtering and search, and remove duplicate results per image. Also provide ripe/unripe counts for each detection."""
+    """Display user's detection history with filtering, one entry per uploaded image with its ripe/unripe counts."""
     try:
-        query = Detection.query.filter_by(user_id=current_user.id)
-        ripeness = request.args.get('ripeness')
-        date_from = request.args.get('date_from')
-        date_to = request.args.get('date_to')
-        if ripeness and ripeness != 'all':
-            query = query.filter(Detection.ripeness == ripeness)
-        if date_from:
-            query = query.filter(Detection.timestamp >= date_from)
-        if date_to:
-            query = query.filter(Detection.timestamp <= date_to)
-        # Remove duplicates: get only the most recent detection per image_path
-        subquery = query.with_entities(
-            Detection.image_path,
-            db.func.max(Detection.timestamp).label('max_timestamp')
-        ).group_by(Detection.image_path).subquery()
-        detections = db.session.query(Detection).join(
-            subquery,
-            (Detection.image_path == subquery.c.image_path) & (Detection.timestamp == subquery.c.max_timestamp)
-        ).order_by(Detection.timestamp.desc()).all()
-        # For each detection, count ripe and unripe for that image
-        ripe_unripe_counts = {}
-        for det in detections:
-            all_for_image = Detection.query.filter_by(user_id=current_user.id, image_path=det.image_path).all()
-            ripe_count = sum(1 for d in all_for_image if d.ripeness == 'ripe')
-            unripe_count = sum(1 for d in all_for_image if d.ripeness == 'unripe')
-            ripe_unripe_counts[det.id] = {'ripe': ripe_count, 'unripe': unripe_count}
-        return render_template('history.html', detections=detections, ripe_unripe_counts=ripe_unripe_counts)
+        page_size = app.config['HISTORY_PAGE_SIZE']
+        uploads = history_uploads_query(current_user.id, request.args).limit(page_size + 1).all()
+        next_cursor = None
+        if len(uploads) > page_size:
+            uploads = uploads[:page_size]
+            next_cursor = f"{uploads[-1].created_at.isoformat()}_{uploads[-1].id}"
+        
+        # One detection per upload for the per-image ripeness and confidence columns
+        detection_ids = db.session.query(representative_detection_id(request.args.get('ripeness'))).select_from(
+            Upload
+        ).filter(Upload.id.in_([upload.id for upload in uploads]))
+        by_upload = {d.upload_id: d for d in Detection.query.filter(Detection.id.in_(detection_ids))}
+        detections = [by_upload[upload.id] for upload in uploads if upload.id in by_upload]
+        ripe_unripe_counts = {by_upload[upload.id].id: {'ripe': upload.ripe_count, 'unripe': upload.unripe_count}
+                              for upload in uploads if upload.id in by_upload}
+        return render_template('history.html', uploads=uploads, detections=detections,
+                               ripe_unripe_counts=ripe_unripe_counts, next_cursor=next_cursor)
     except Exception as e:
         logging.error(f"Error in history route: {str(e)}")
         flash('Error loading history')
@@ -655,30 +1747,27 @@ def history():
 
 @app.route('/export_history')
 @login_required
+@read_only
 def export_history():
     """Export filtered detection history as Excel file with professional formatting and title."""
     try:
-        query = Detection.query.filter_by(user_id=current_user.id)
         ripeness = request.args.get('ripeness')
         date_from = request.args.get('date_from')
         date_to = request.args.get('date_to')
-        if ripeness and ripeness != 'all':
-            query = query.filter(Detection.ripeness == ripeness)
-        if date_from:
-            query = query.filter(Detection.timestamp >= date_from)
-        if date_to:
-            query = query.filter(Detection.timestamp <= date_to)
-        # Remove duplicates: get only the most recent detection per image_path
-        subquery = query.with_entities(
-            Detection.image_path,
-            db.func.max(Detection.timestamp).label('max_timestamp')
-        ).group_by(Detection.image_path).subquery()
-        detections = db.session.query(Detection).join(
-            subquery,
-            (Detection.image_path == subquery.c.image_path) & (Detection.timestamp == subquery.c.max_timestamp)
-        ).order_by(Detection.timestamp.desc()).all()
+        # One row per upload, showing its representative detection
+        rows = db.session.query(
+            Detection.ripeness,
+            Detection.confidence,
+            Upload.created_at,
+            Upload.image_path
+        ).select_from(Upload).join(
+            Detection, Detection.id == representative_detection_id(ripeness)
+        ).filter(
+            Upload.user_id == current_user.id, *history_filter_conditions(request.args)
+        ).order_by(Upload.created_at.desc(), Upload.id.desc())
         
-        if not detections:
+        total = rows.count()
+        if not total:
             flash('No data to export.')
             return redirect(url_for('history'))
         
@@ -691,8 +1780,8 @@ def export_history():
         if date_to:
             filters['date_to'] = date_to
         
-        # Use the Excel template to create the export
-        output, filename = create_detection_export(detections, current_user, filters)
+        # Stream rows from the database cursor straight into the workbook
+        output, filename = create_streaming_detection_export(rows.yield_per(1000), current_user, filters, total)
         
         return send_file(
             output,
@@ -756,6 +1845,12 @@ def profile():
         flash('Error updating profile')
         return redirect(url_for('profile'))
 
+def image_size_setting(value):
+    """'auto', or a model input size in pixels as normalize_image_size stores it"""
+    if value == 'auto':
+        return 'auto'
+    return normalize_image_size(value)
+
 @app.route('/settings', methods=['GET', 'POST'])
 @login_required
 def settings():
@@ -766,6 +1861,10 @@ def settings():
                 'dark_mode': bool(request.form.get('dark_mode')),
                 'show_notifications': bool(request.form.get('show_notifications')),
                 'confidence_threshold': int(request.form.get('confidence_threshold', 50)),
+                'iou_threshold': int(request.form.get('iou_threshold', 70)),
+                'max_detections': int(request.form.get('max_detections', 300)),
+                # 'auto' picks the model input size per image; otherwise pixels, a multiple of 32
+                'image_size': image_size_setting(request.form.get('image_size', 'auto')),
                 'save_history': bool(request.form.get('save_history')),
                 'email_results': bool(request.form.get('email_results')),
                 'email_updates': bool(request.form.get('email_updates'))
@@ -784,6 +1883,7 @@ def settings():
 
 @app.route('/export_dashboard_summary')
 @login_required
+@read_only
 def export_dashboard_summary():
     """Export dashboard summary statistics as Excel file."""
     try:
@@ -792,39 +1892,19 @@ def export_dashboard_summary():
         week_ago = today - timedelta(days=7)
         month_ago = today - timedelta(days=30)
         
-        # Get detection counts
-        today_detections = Detection.query.filter(
-            Detection.user_id == current_user.id,
-            db.func.date(Detection.timestamp) == today
-        ).count()
-        
-        week_detections = Detection.query.filter(
-            Detection.user_id == current_user.id,
-            Detection.timestamp >= week_ago
-        ).count()
-        
-        month_detections = Detection.query.filter(
-            Detection.user_id == current_user.id,
-            Detection.timestamp >= month_ago
-        ).count()
-        
-        total_detections = Detection.query.filter_by(user_id=current_user.id).count()
+        # Get detection counts from the daily rollups
+        summary = rollup_summary(current_user.id, {'today': today, 'week': week_ago, 'month': month_ago})
+        today_detections = summary['today']
+        week_detections = summary['week']
+        month_detections = summary['month']
+        total_detections = summary['total']
         
         # Get ripeness statistics
-        ripe_count = Detection.query.filter(
-            Detection.user_id == current_user.id,
-            Detection.ripeness == 'ripe'
-        ).count()
-        
-        unripe_count = Detection.query.filter(
-            Detection.user_id == current_user.id,
-            Detection.ripeness == 'unripe'
-        ).count()
+        ripe_count = summary['by_ripeness']['ripe']
+        unripe_count = summary['by_ripeness']['unripe']
         
         # Get average confidence
-        avg_confidence = db.session.query(db.func.avg(Detection.confidence)).filter(
-            Detection.user_id == current_user.id
-        ).scalar() or 0
+        avg_confidence = summary['confidence_sum'] / total_detections if total_detections else 0
         
         # Prepare summary data
         summary_data = {
@@ -863,9 +1943,17 @@ def internal_error(error):
     db.session.rollback()
     return render_template('500.html'), 500
 
-# Create database tables
-with app.app_context():
-    db.create_all()
+def prepare_database():
+    """Create missing tables, bring existing databases up to date and create the test user"""
+    # Creates missing tables and brings existing databases up to date
+    for change in upgrade_schema(db):
+        print(f"Database upgrade: {change}")
+    # Databases created before rollups existed get their rollup table filled once
+    if DetectionRollup.query.first() is None and Detection.query.first() is not None:
+        print(f"Built {rebuild_rollups()} detection rollup rows")
+    # Detections saved before uploads existed are grouped into Upload rows once
+    if Detection.query.filter(Detection.upload_id.is_(None)).first() is not None:
+        print(f"Backfilled {backfill_uploads()} uploads")
     # Create test user if it doesn't exist
     if not User.query.filter_by(username='test').first():
         test_user = User(username='test')
@@ -874,5 +1962,18 @@ with app.app_context():
         db.session.commit()
         print("Test user created successfully")
 
+def warm_up():
+    """Prepare the database and load the model now instead of on the first request that needs them"""
+    ensure_database()
+    if get_inference_backend() is None:
+        logging.warning("Inference backend not loaded; detection requests will fail")
+
+def create_app(warm=True):
+    """Application entry point for WSGI servers, e.g. gunicorn 'app:create_app()'.
+    Importing this module stays cheap; warm loads the database and model before serving."""
+    if warm:
+        warm_up()
+    return app
+
 if __name__ == '__main__':
-    app.run(debug=True) 
\ No newline at end of file
+    create_app().run(debug=True)
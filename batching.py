@@ -0,0 +1,118 @@
+"""
+Micro-batching scheduler for model inference
+Collects images from concurrent requests into one batched model call
+"""
+
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+
+class MicroBatcher:
+    """Groups concurrent inference requests into batched calls of predict_fn"""
+
+    _STOP = object()
+
+    def __init__(self, predict_fn, max_batch_size=8, max_wait_ms=15, name='inference-batcher'):
+        """
+        Args:
+            predict_fn: Callable taking a list of items and returning one result per item
+            max_batch_size: Largest number of items passed to predict_fn at once
+            max_wait_ms: Longest time the first queued item waits for the batch to fill
+            name: Name of the dispatcher thread
+        """
+        self.predict_fn = predict_fn
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait = max(0.0, float(max_wait_ms)) / 1000.0
+        self.name = name
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._closed = False
+        self._stats = {'batches': 0, 'items': 0, 'largest_batch': 0, 'errors': 0}
+
+    def submit(self, item):
+        """Queue an item and return a Future that resolves to its prediction"""
+        future = Future()
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("Batcher has been shut down")
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+                self._thread.start()
+            self._queue.put((item, future))
+        return future
+
+    def predict(self, item, timeout=None):
+        """Submit an item and block until its prediction is ready"""
+        return self.submit(item).result(timeout)
+
+    def shutdown(self, wait=True):
+        """Stop accepting work; queued items are still processed"""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            thread = self._thread
+            self._queue.put(self._STOP)
+        if wait and thread is not None:
+            thread.join()
+
+    def stats(self):
+        """Return a snapshot of the batching counters"""
+        with self._lock:
+            stats = dict(self._stats)
+        stats['avg_batch_size'] = stats['items'] / stats['batches'] if stats['batches'] else 0.0
+        stats['queued'] = self._queue.qsize()
+        return stats
+
+    def _collect(self, first):
+        """Gather up to max_batch_size items, waiting at most max_wait after the first"""
+        batch = [first]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                entry = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if entry is self._STOP:
+                return batch, True
+            batch.append(entry)
+        return batch, False
+
+    def _run(self):
+        while True:
+            first = self._queue.get()
+            if first is self._STOP:
+                break
+            batch, stop = self._collect(first)
+            self._dispatch(batch)
+            if stop:
+                break
+
+    def _dispatch(self, batch):
+        # Drop requests whose caller already gave up
+        batch = [(item, future) for item, future in batch if future.set_running_or_notify_cancel()]
+        if not batch:
+            return
+        items = [item for item, _ in batch]
+        try:
+            results = list(self.predict_fn(items))
+            if len(results) != len(items):
+                raise RuntimeError(f"predict_fn returned {len(results)} results for {len(items)} items")
+        except Exception as e:
+            logging.error(f"Error in batched inference: {str(e)}")
+            with self._lock:
+                self._stats['errors'] += 1
+            for _, future in batch:
+                future.set_exception(e)
+            return
+        with self._lock:
+            self._stats['batches'] += 1
+            self._stats['items'] += len(items)
+            self._stats['largest_batch'] = max(self._stats['largest_batch'], len(items))
+        for (_, future), result in zip(batch, results):
+            future.set_result(result)
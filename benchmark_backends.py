@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Benchmark the ultralytics/PyTorch and ONNX Runtime inference backends
+
+Runs both backends on the same synthetic images and reports single-image
+latency percentiles and batched throughput on CPU.
+
+Usage:
+    python export_onnx.py
+    python benchmark_backends.py --model model/best.pt --onnx model/best.onnx --images 32 --batch 8
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from inference_backends import load_backend
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def bench(backend, images, batch_size):
+    """Per-image latency in ms and batched throughput in images per second"""
+    backend.predict(images[:1])  # Warm up
+    latencies = []
+    for image in images:
+        start = time.perf_counter()
+        backend.predict([image])
+        latencies.append((time.perf_counter() - start) * 1000)
+    start = time.perf_counter()
+    for i in range(0, len(images), batch_size):
+        backend.predict(images[i:i + batch_size])
+    throughput = len(images) / (time.perf_counter() - start)
+    return latencies, throughput
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--model', default='model/best.pt')
+    parser.add_argument('--onnx', default='model/best.onnx')
+    parser.add_argument('--images', type=int, default=32)
+    parser.add_argument('--batch', type=int, default=8)
+    parser.add_argument('--width', type=int, default=1280)
+    parser.add_argument('--height', type=int, default=960)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(42)
+    images = [rng.integers(0, 255, (args.height, args.width, 3), dtype=np.uint8) for _ in range(args.images)]
+
+    print(f"{args.images} images of {args.width}x{args.height}, batches of {args.batch}\n")
+    print(f"{'backend':<12} {'p50 ms':>8} {'p95 ms':>8} {'mean ms':>8} {'batched img/s':>14}")
+    print("-" * 54)
+    for name, path in (('ultralytics', args.model), ('onnx', args.onnx)):
+        latencies, throughput = bench(load_backend(name, path), images, args.batch)
+        print(f"{name:<12} {percentile(latencies, 50):>8.1f} {percentile(latencies, 95):>8.1f} "
+              f"{statistics.mean(latencies):>8.1f} {throughput:>14.1f}")
+
+
+if __name__ == '__main__':
+    main()
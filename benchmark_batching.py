@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Benchmark micro-batched inference against the per-request path
+
+Simulates concurrent uploads hitting the YOLO model and reports throughput
+and latency percentiles for both strategies on CPU.
+
+Usage:
+    python benchmark_batching.py --model model/best.pt --clients 8 --requests 64
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+
+import numpy as np
+from PIL import Image
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from batching import MicroBatcher
+
+
+def make_test_images(folder, count, width, height):
+    """Write synthetic JPEGs so the benchmark also pays the decode cost"""
+    rng = np.random.default_rng(42)
+    paths = []
+    for i in range(count):
+        pixels = rng.integers(0, 255, (height, width, 3), dtype=np.uint8)
+        path = os.path.join(folder, f'bench_{i}.jpg')
+        Image.fromarray(pixels).save(path, quality=90)
+        paths.append(path)
+    return paths
+
+
+def run_clients(infer, paths, clients, total_requests):
+    """Fire total_requests calls from `clients` threads, returning latencies and wall time"""
+    latencies = []
+    lock = threading.Lock()
+    counter = iter(range(total_requests))
+
+    def worker():
+        while True:
+            with lock:
+                i = next(counter, None)
+            if i is None:
+                return
+            start = time.perf_counter()
+            infer(paths[i % len(paths)])
+            elapsed = time.perf_counter() - start
+            with lock:
+                latencies.append(elapsed)
+
+    threads = [threading.Thread(target=worker) for _ in range(clients)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return latencies, time.perf_counter() - start
+
+
+def report(label, latencies, wall):
+    lat_ms = np.array(latencies) * 1000
+    print(f"{label:<14} throughput {len(latencies) / wall:7.2f} img/s   "
+          f"p50 {np.percentile(lat_ms, 50):8.1f} ms   p99 {np.percentile(lat_ms, 99):8.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--model', default='model/best.pt', help='YOLO weights file')
+    parser.add_argument('--clients', type=int, default=8, help='Concurrent uploaders')
+    parser.add_argument('--requests', type=int, default=64, help='Total images to process per strategy')
+    parser.add_argument('--max-batch', type=int, default=8, help='Batcher max batch size')
+    parser.add_argument('--max-wait-ms', type=float, default=15, help='Batcher max wait')
+    parser.add_argument('--width', type=int, default=1280)
+    parser.add_argument('--height', type=int, default=960)
+    args = parser.parse_args()
+
+    from ultralytics import YOLO
+    model = YOLO(args.model)
+
+    with tempfile.TemporaryDirectory() as folder:
+        paths = make_test_images(folder, 8, args.width, args.height)
+        model(paths[0], verbose=False)  # Warm-up
+
+        # The per-request path calls the shared model once per upload. Calls are
+        # serialized because the ultralytics predictor is not thread-safe.
+        model_lock = threading.Lock()
+
+        def per_request(path):
+            with model_lock:
+                return model(path, verbose=False)[0]
+
+        batcher = MicroBatcher(lambda items: list(model(items, verbose=False)),
+                               max_batch_size=args.max_batch, max_wait_ms=args.max_wait_ms)
+
+        print(f"Model: {args.model}   clients: {args.clients}   requests: {args.requests}   "
+              f"image: {args.width}x{args.height}   batch: {args.max_batch}/{args.max_wait_ms} ms")
+        print("-" * 80)
+        report('per-request', *run_clients(per_request, paths, args.clients, args.requests))
+        report('micro-batched', *run_clients(batcher.predict, paths, args.clients, args.requests))
+        batcher.shutdown()
+        stats = batcher.stats()
+        print(f"\nBatches: {stats['batches']}   average batch size: {stats['avg_batch_size']:.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Benchmark the decode-once image pipeline against the old double decode
+
+The old detect_fruit let YOLO decode the file path at full size and then
+opened the same file again with PIL to draw on it. The new pipeline decodes
+once, with DCT scaling for JPEGs much larger than the model input. Reports
+per-stage time and the size of the decoded pixel buffers.
+
+Usage:
+    python benchmark_decode.py --width 4000 --height 3000 --repeat 10
+    python benchmark_decode.py --model model/best.pt
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+import cv2
+import numpy as np
+from PIL import Image
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from image_decode import decode_image
+
+
+def make_test_image(path, width, height):
+    """Write a smooth synthetic JPEG, closer to a photo than random noise"""
+    x = np.linspace(0, 255, width, dtype=np.float32)
+    y = np.linspace(0, 255, height, dtype=np.float32)[:, None]
+    pixels = np.stack([np.broadcast_to(x, (height, width)), np.broadcast_to(y, (height, width)),
+                       (x + y) / 2], axis=-1).astype(np.uint8)
+    Image.fromarray(pixels).save(path, quality=90)
+
+
+def timed(fn, repeat):
+    """Median milliseconds of fn() over repeat runs, and its last return value"""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        value = fn()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples) * 1000, value
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--width', type=int, default=4000)
+    parser.add_argument('--height', type=int, default=3000)
+    parser.add_argument('--imgsz', type=int, default=640, help='Model input size')
+    parser.add_argument('--repeat', type=int, default=10)
+    parser.add_argument('--model', default=None, help='Also time YOLO inference on both inputs')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as folder:
+        path = os.path.join(folder, 'orchard.jpg')
+        make_test_image(path, args.width, args.height)
+        with open(path, 'rb') as f:
+            data = f.read()
+        print(f"{args.width}x{args.height} JPEG, {len(data) / 1e6:.1f} MB, model input {args.imgsz}")
+
+        # Old pipeline: YOLO's own full-size cv2 decode of the path, then a full PIL decode for drawing
+        model_decode_ms, full_bgr = timed(lambda: cv2.imread(path), args.repeat)
+        draw_decode_ms, _ = timed(lambda: Image.open(path).convert('RGB'), args.repeat)
+        # New pipeline: one reduced-scale decode, converted to BGR for the model
+        decode_ms, (array, scale) = timed(lambda: decode_image(data, args.imgsz), args.repeat)
+        convert_ms, small_bgr = timed(lambda: cv2.cvtColor(array, cv2.COLOR_RGB2BGR), args.repeat)
+
+        old_bytes = full_bgr.nbytes * 2
+        new_bytes = array.nbytes + small_bgr.nbytes
+        print(f"\n{'stage':<34} {'old ms':>9} {'new ms':>9}")
+        print("-" * 54)
+        print(f"{'decode for model':<34} {model_decode_ms:>9.1f} {decode_ms:>9.1f}")
+        print(f"{'decode for annotation':<34} {draw_decode_ms:>9.1f} {0.0:>9.1f}")
+        print(f"{'RGB to BGR':<34} {0.0:>9.1f} {convert_ms:>9.1f}")
+        old_total = model_decode_ms + draw_decode_ms
+        new_total = decode_ms + convert_ms
+        print(f"{'total':<34} {old_total:>9.1f} {new_total:>9.1f}")
+        print(f"\nDecoded to {array.shape[1]}x{array.shape[0]} (scale {scale:g}); "
+              f"time saved {old_total - new_total:.1f} ms ({old_total / new_total:.1f}x)")
+        print(f"Pixel buffers: old {old_bytes / 1e6:.1f} MB, new {new_bytes / 1e6:.1f} MB, "
+              f"saved {(old_bytes - new_bytes) / 1e6:.1f} MB")
+
+        if args.model:
+            from ultralytics import YOLO
+            model = YOLO(args.model)
+            model(small_bgr, imgsz=args.imgsz, verbose=False)  # Warm up
+            old_ms, _ = timed(lambda: model(path, imgsz=args.imgsz, verbose=False), args.repeat)
+            new_ms, _ = timed(lambda: model(cv2.cvtColor(decode_image(data, args.imgsz)[0], cv2.COLOR_RGB2BGR),
+                                            imgsz=args.imgsz, verbose=False), args.repeat)
+            print(f"\nDecode + inference: path {old_ms:.1f} ms, decode-once array {new_ms:.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Benchmark the Excel detection export: in-memory vs streaming
+
+Seeds a temporary SQLite database with synthetic detections, then exports it
+twice: once by loading every row into objects and building the workbook in a
+BytesIO, once by streaming the cursor into a constant_memory workbook.
+Reports wall time and peak Python memory (tracemalloc) per row count.
+
+Usage:
+    python benchmark_excel_export.py --rows 10000 50000 100000
+"""
+
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from excel_template import FruitDetectionExcelTemplate
+
+
+class BenchUser:
+    username = 'benchmark'
+
+
+class Row:
+    """Stand-in for a Detection object loaded by the ORM"""
+    __slots__ = ('ripeness', 'confidence', 'timestamp', 'image_path')
+
+    def __init__(self, ripeness, confidence, timestamp, image_path):
+        self.ripeness = ripeness
+        self.confidence = confidence
+        self.timestamp = timestamp
+        self.image_path = image_path
+
+
+def seed(path, count):
+    conn = sqlite3.connect(path, detect_types=sqlite3.PARSE_DECLTYPES)
+    conn.execute("CREATE TABLE detection (ripeness TEXT, confidence REAL, timestamp TIMESTAMP, image_path TEXT)")
+    start = datetime(2024, 1, 1)
+    conn.executemany("INSERT INTO detection VALUES (?, ?, ?, ?)", (
+        ('ripe' if i % 3 else 'unripe', 0.5 + (i % 50) / 100, start + timedelta(seconds=i), f"processed_{i}.jpg")
+        for i in range(count)
+    ))
+    conn.commit()
+    return conn
+
+
+def cursor_rows(conn):
+    cursor = conn.execute("SELECT ripeness, confidence, timestamp, image_path FROM detection ORDER BY rowid DESC")
+    while True:
+        chunk = cursor.fetchmany(1000)
+        if not chunk:
+            return
+        yield from chunk
+
+
+def measure(fn):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, peak / (1024 * 1024)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, nargs='+', default=[10000, 50000, 100000])
+    args = parser.parse_args()
+
+    template = FruitDetectionExcelTemplate()
+    user = BenchUser()
+    print(f"{'rows':>10} {'in-memory s':>12} {'peak MB':>9} {'streaming s':>12} {'peak MB':>9}")
+    print("-" * 56)
+    for count in args.rows:
+        with tempfile.TemporaryDirectory() as folder:
+            conn = seed(os.path.join(folder, 'bench.db'), count)
+
+            def in_memory():
+                detections = [Row(*r) for r in conn.execute(
+                    "SELECT ripeness, confidence, timestamp, image_path FROM detection ORDER BY rowid DESC")]
+                return template.create_detection_report(detections, user)
+
+            def streaming():
+                return template.create_detection_report_streaming(cursor_rows(conn), user, total=count)
+
+            output, mem_time, mem_peak = measure(in_memory)
+            output.close()
+            output, stream_time, stream_peak = measure(streaming)
+            output.close()
+            conn.close()
+        print(f"{count:>10} {mem_time:>12.2f} {mem_peak:>9.1f} {stream_time:>12.2f} {stream_peak:>9.1f}")
+
+
+if __name__ == '__main__':
+    main()
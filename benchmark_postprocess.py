@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark of detection post-processing
+
+Compares the old per-box loop of detect_fruit (threshold check, class name
+split, int() per coordinate, exact-coordinate dedupe) with the vectorized
+summarize_result at 10, 100 and 500 boxes per image.
+
+Usage:
+    python benchmark_postprocess.py --boxes 10 100 500 --repeat 200
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from inference_backends import BackendResult
+from postprocess import build_class_table, summarize_result
+
+NAMES = {0: 'mangosteen_ripe', 1: 'mangosteen_unripe'}
+
+
+def legacy_summarize(result, names, threshold, scale):
+    """The per-box loop detect_fruit ran before post-processing was vectorized"""
+    detections, seen_boxes = [], set()
+    for xyxy, conf, cls in zip(result.boxes, result.scores.tolist(), result.class_ids.tolist()):
+        if conf < threshold:
+            continue
+        fruit_type = names[cls]
+        if '_' in fruit_type:
+            fruit_name, ripeness = fruit_type.split('_', 1)
+            fruit_name = fruit_name.strip().title()
+            ripeness = ripeness.lower().strip()
+        else:
+            fruit_name = fruit_type.strip().title()
+            ripeness = 'unknown'
+        x1, y1, x2, y2 = (int(v * scale) for v in xyxy)
+        if (x1, y1, x2, y2) in seen_boxes:
+            continue
+        seen_boxes.add((x1, y1, x2, y2))
+        detections.append({'fruit_type': fruit_name, 'ripeness': ripeness, 'confidence': conf,
+                           'is_mangosteen': fruit_name.lower() == 'mangosteen', 'class_id': cls,
+                           'box': [x1, y1, x2, y2]})
+    return detections
+
+
+def make_result(count, rng):
+    """Crowded-image result: mostly separate boxes sorted by score, a few of them exact duplicates"""
+    corners = rng.uniform(0, 3800, (count, 2)).astype(np.float32)
+    boxes = np.concatenate([corners, corners + rng.uniform(30, 120, (count, 2)).astype(np.float32)], axis=1)
+    boxes[1::10] = boxes[0::10][:len(boxes[1::10])]
+    scores = np.sort(rng.uniform(0.25, 1.0, count).astype(np.float32))[::-1]
+    return BackendResult(boxes, scores, rng.integers(0, 2, count))
+
+
+def timed(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--boxes', type=int, nargs='+', default=[10, 100, 500])
+    parser.add_argument('--repeat', type=int, default=200)
+    parser.add_argument('--threshold', type=float, default=0.5)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(42)
+    table = build_class_table(NAMES)
+    print(f"{'boxes':>6} {'kept':>6} {'per-box loop us':>16} {'vectorized us':>14} {'speedup':>8}")
+    print("-" * 54)
+    for count in args.boxes:
+        result = make_result(count, rng)
+        kept = len(summarize_result(result, table, args.threshold, 1.0))
+        legacy = timed(lambda: legacy_summarize(result, NAMES, args.threshold, 1.0), args.repeat)
+        vectorized = timed(lambda: summarize_result(result, table, args.threshold, 1.0), args.repeat)
+        print(f"{count:>6} {kept:>6} {legacy:>16.1f} {vectorized:>14.1f} {legacy / vectorized:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
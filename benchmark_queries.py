@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Benchmark the history, dashboard, profile and export queries on a large database
+
+Seeds a temporary SQLite database with synthetic detections spread over
+several users, then times the /history, /dashboard, /profile,
+/export_history and /export_dashboard_summary routes without the composite
+Detection and Upload indexes and again after creating them.
+
+Templates are replaced by empty stubs so only query and export cost is measured.
+
+Usage:
+    python benchmark_queries.py --rows 1000000 --users 20
+    python benchmark_queries.py --rows 10000000 --repeat 3
+"""
+
+import argparse
+import os
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+ROUTES = ['/history', '/dashboard', '/profile', '/export_history', '/export_dashboard_summary']
+TEMPLATES = ['history.html', 'dashboard.html', 'profile.html', 'detect.html', '404.html', '500.html']
+
+
+def seed(db_path, rows, users, password_hash):
+    """Bulk insert users and detections with raw sqlite3 for speed"""
+    conn = sqlite3.connect(db_path)
+    conn.execute("PRAGMA journal_mode=OFF")
+    conn.execute("PRAGMA synchronous=OFF")
+    now = datetime.utcnow()
+    conn.executemany(
+        "INSERT INTO user (username, password_hash, created_at, settings) VALUES (?, ?, ?, '{}')",
+        [(f"bench{i}", password_hash, now) for i in range(1, users + 1)]
+    )
+    user_ids = [row[0] for row in conn.execute("SELECT id FROM user WHERE username LIKE 'bench%'")]
+    rng = random.Random(42)
+
+    def detections():
+        for i in range(rows):
+            user_id = rng.choice(user_ids)
+            # About three boxes per image, spread over the last year
+            image = i // 3
+            timestamp = now - timedelta(seconds=(rows - image * 3) * 31536000 // rows)
+            yield (user_id, f"processed_{image}.jpg", 'Mangosteen', rng.choice(('ripe', 'unripe')),
+                   rng.uniform(0.5, 1.0), timestamp.strftime('%Y-%m-%d %H:%M:%S.%f'))
+
+    batch = []
+    for row in detections():
+        batch.append(row)
+        if len(batch) == 100000:
+            conn.executemany("INSERT INTO detection (user_id, image_path, fruit_type, ripeness, confidence, timestamp) "
+                             "VALUES (?, ?, ?, ?, ?, ?)", batch)
+            batch = []
+    if batch:
+        conn.executemany("INSERT INTO detection (user_id, image_path, fruit_type, ripeness, confidence, timestamp) "
+                         "VALUES (?, ?, ?, ?, ?, ?)", batch)
+    conn.commit()
+    conn.close()
+
+
+def time_routes(client, repeat):
+    timings = {}
+    for route in ROUTES:
+        samples = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            response = client.get(route)
+            samples.append(time.perf_counter() - start)
+            if response.status_code not in (200, 302):
+                raise RuntimeError(f"{route} returned {response.status_code}")
+        timings[route] = statistics.median(samples) * 1000
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=1000000, help='Synthetic detections to seed')
+    parser.add_argument('--users', type=int, default=20)
+    parser.add_argument('--repeat', type=int, default=5, help='Timed requests per route')
+    args = parser.parse_args()
+
+    folder = tempfile.mkdtemp(prefix='fruit_bench_')
+    db_path = os.path.join(folder, 'bench.db')
+    os.environ['DATABASE_URL'] = f"sqlite:///{db_path}"
+    template_folder = os.path.join(folder, 'templates')
+    os.makedirs(template_folder)
+    for name in TEMPLATES:
+        with open(os.path.join(template_folder, name), 'w') as f:
+            f.write('ok')
+
+    sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+    from werkzeug.security import generate_password_hash
+    from app import app, db, Detection, Upload, rebuild_rollups, backfill_uploads
+    from migrations import create_missing_indexes
+    app.template_folder = template_folder
+
+    print(f"Seeding {args.rows:,} detections for {args.users} users into {db_path} ...")
+    start = time.perf_counter()
+    seed(db_path, args.rows, args.users, generate_password_hash('bench'))
+    with app.app_context():
+        rebuild_rollups()
+        backfill_uploads()
+    print(f"Seeded in {time.perf_counter() - start:.1f} s")
+
+    client = app.test_client()
+    client.post('/login', data={'username': 'bench1', 'password': 'bench'})
+
+    with app.app_context():
+        for table in (Detection.__table__, Upload.__table__):
+            for index in table.indexes:
+                index.drop(bind=db.engine, checkfirst=True)
+    before = time_routes(client, args.repeat)
+
+    start = time.perf_counter()
+    with app.app_context():
+        create_missing_indexes(db)
+    print(f"Created indexes in {time.perf_counter() - start:.1f} s")
+    after = time_routes(client, args.repeat)
+
+    print(f"\n{'route':<28} {'no indexes ms':>14} {'indexed ms':>12} {'speedup':>9}")
+    print("-" * 66)
+    for route in ROUTES:
+        print(f"{route:<28} {before[route]:>14.1f} {after[route]:>12.1f} {before[route] / after[route]:>8.1f}x")
+    print(f"\nDatabase left at {db_path}")
+
+
+if __name__ == '__main__':
+    main()
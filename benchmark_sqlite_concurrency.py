@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Benchmark concurrent reads and writes on SQLite with and without the tuned configuration
+
+Seeds a database, then for --seconds runs reader threads downloading
+/export_history, a long streaming read, while writer threads save uploads the
+way /detect does (add_upload and a commit each). Runs once with the SQLite
+defaults (rollback journal, one engine; SQLITE_TUNING=off) and once with WAL,
+tuned pragmas and the separate read engine, each in a fresh process and database.
+
+Usage:
+    python benchmark_sqlite_concurrency.py --rows 200000 --readers 4 --writers 8 --seconds 10
+"""
+
+import argparse
+import contextlib
+import io
+import logging
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+TEMPLATES = ['history.html', 'detect.html', '404.html', '500.html']
+
+
+def run_mode(args):
+    """Child process: seed, run the mixed workload under the configuration set in the environment, print one row"""
+    sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+    from werkzeug.security import generate_password_hash
+    import app as web
+    from benchmark_queries import seed
+
+    logging.disable(logging.WARNING)
+    template_folder = os.path.join(os.path.dirname(args.db), 'templates')
+    os.makedirs(template_folder, exist_ok=True)
+    for name in TEMPLATES:
+        with open(os.path.join(template_folder, name), 'w') as f:
+            f.write('ok')
+    web.app.template_folder = template_folder
+    with contextlib.redirect_stdout(io.StringIO()):
+        web.ensure_database()
+    # seed() switches journaling off, which needs the file to itself
+    with web.app.app_context():
+        for engine in web.db.engines.values():
+            engine.dispose()
+    seed(args.db, args.rows, args.users, generate_password_hash('bench'))
+    with web.app.app_context():
+        web.rebuild_rollups()
+        web.backfill_uploads()
+        user_ids = [user.id for user in web.User.query.filter(web.User.username.like('bench%'))]
+
+    detections = [{'fruit_type': 'Mangosteen', 'ripeness': 'ripe', 'confidence': 0.9, 'class_id': 0,
+                   'box': [i, i, i + 40, i + 40]} for i in range(args.boxes)]
+    stop = threading.Event()
+    lock = threading.Lock()
+    reads, writes, errors = [], [], []
+
+    def reader():
+        client = web.app.test_client()
+        client.post('/login', data={'username': 'bench1', 'password': 'bench'})
+        while not stop.is_set():
+            start = time.perf_counter()
+            response = client.get('/export_history')
+            with lock:
+                if response.status_code == 200:
+                    reads.append(time.perf_counter() - start)
+                else:
+                    errors.append(f"export {response.status_code}")
+
+    def writer(index):
+        user_id = user_ids[index % len(user_ids)]
+        i = 0
+        while not stop.is_set():
+            start = time.perf_counter()
+            try:
+                with web.app.app_context():
+                    web.add_upload(user_id, f"processed_write_{index}_{i}.jpg", detections)
+                    web.db.session.commit()
+                with lock:
+                    writes.append(time.perf_counter() - start)
+            except Exception as e:
+                with lock:
+                    errors.append(str(e).splitlines()[0])
+            i += 1
+
+    threads = [threading.Thread(target=reader) for _ in range(args.readers)]
+    threads += [threading.Thread(target=writer, args=(i,)) for i in range(args.writers)]
+    for thread in threads:
+        thread.start()
+    time.sleep(args.seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+
+    def p95(samples):
+        return sorted(samples)[max(0, int(len(samples) * 0.95) - 1)] * 1000 if samples else float('nan')
+
+    mode = 'tuned' if web.app.config['SQLITE_TUNING'] else 'default'
+    print(f"{mode:<8} {len(writes) / args.seconds:>9.1f} {p95(writes):>13.1f} "
+          f"{len(reads) / args.seconds:>10.2f} {statistics.median(reads) * 1000 if reads else float('nan'):>12.1f} "
+          f"{len(errors):>7}", flush=True)
+    if errors:
+        print(f"         first error: {errors[0]}", flush=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=200000, help='Synthetic detections to seed')
+    parser.add_argument('--users', type=int, default=4)
+    parser.add_argument('--readers', type=int, default=4, help='Threads downloading /export_history')
+    parser.add_argument('--writers', type=int, default=8, help='Threads saving uploads')
+    parser.add_argument('--boxes', type=int, default=10, help='Detections per saved upload')
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--db', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.db:
+        run_mode(args)
+        return
+
+    print(f"{args.rows:,} seeded detections, {args.readers} exporting readers, {args.writers} writers, "
+          f"{args.seconds:.0f} s per mode\n")
+    print(f"{'mode':<8} {'writes/s':>9} {'write p95 ms':>13} {'exports/s':>10} {'export p50 ms':>12} {'errors':>7}")
+    print("-" * 64)
+    for tuning in ('off', 'on'):
+        folder = tempfile.mkdtemp(prefix='fruit_sqlite_bench_')
+        db_path = os.path.join(folder, 'bench.db')
+        env = dict(os.environ, SQLITE_TUNING=tuning, DATABASE_URL=f"sqlite:///{db_path}")
+        subprocess.run([sys.executable, os.path.abspath(__file__), '--db', db_path, '--rows', str(args.rows),
+                        '--users', str(args.users), '--readers', str(args.readers), '--writers', str(args.writers),
+                        '--boxes', str(args.boxes), '--seconds', str(args.seconds)],
+                       env=env, check=True, stderr=subprocess.DEVNULL)
+        shutil.rmtree(folder, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
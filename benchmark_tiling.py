@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Benchmark tiled inference against full-frame inference on high-resolution images
+
+Runs every image once at the model's input size and once as overlapping
+tiles merged with cross-tile NMS. Reports wall time per image, detections,
+and, given YOLO-format label files, per-class recall against the labels.
+
+Usage:
+    python benchmark_tiling.py --images data/orchard --labels data/orchard/labels
+    python benchmark_tiling.py --backend onnx --model model/best.onnx --width 6000 --height 4000
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+import cv2
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from inference_backends import BackendResult, load_backend
+from quantization import compare_results, list_images
+from tiling import make_tiles, merge_tile_results
+
+
+def read_labels(path, width, height):
+    """Ground-truth BackendResult from a YOLO label file of 'class cx cy w h' lines, normalised"""
+    rows = np.loadtxt(path, ndmin=2) if os.path.exists(path) and os.path.getsize(path) else np.empty((0, 5))
+    cx, cy, w, h = rows[:, 1] * width, rows[:, 2] * height, rows[:, 3] * width, rows[:, 4] * height
+    boxes = np.stack([cx - w / 2, cy - h / 2, cx + w / 2, cy + h / 2], axis=1).astype(np.float32)
+    return BackendResult(boxes, np.ones(len(rows), dtype=np.float32), rows[:, 0].astype(int))
+
+
+def filter_score(result, conf):
+    keep = result.scores >= conf
+    return BackendResult(result.boxes[keep], result.scores[keep], result.class_ids[keep])
+
+
+def run_tiled(backend, image, args):
+    tiles, origins = make_tiles(image, args.tile, args.overlap)
+    if len(tiles) > 1:
+        tiles.append(image)
+        origins.append((0, 0))
+    results = []
+    for i in range(0, len(tiles), args.batch):
+        results.extend(backend.predict(tiles[i:i + args.batch]))
+    return merge_tile_results(results, origins, args.merge_threshold, min_score=args.conf)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--backend', default='ultralytics', choices=['ultralytics', 'onnx'])
+    parser.add_argument('--model', default='model/best.pt')
+    parser.add_argument('--images', default=None, help="Folder of high-resolution images")
+    parser.add_argument('--labels', default=None, help="Folder of YOLO .txt labels named like the images")
+    parser.add_argument('--width', type=int, default=6000, help="Synthetic image size without --images")
+    parser.add_argument('--height', type=int, default=4000)
+    parser.add_argument('--tile', type=int, default=640)
+    parser.add_argument('--overlap', type=float, default=0.2)
+    parser.add_argument('--merge-threshold', type=float, default=0.5)
+    parser.add_argument('--batch', type=int, default=8)
+    parser.add_argument('--conf', type=float, default=0.5)
+    args = parser.parse_args()
+
+    backend = load_backend(args.backend, args.model)
+    if args.images:
+        paths = list_images(args.images)
+        images = [cv2.imread(path) for path in paths]
+    else:
+        paths = ['synthetic']
+        images = [np.random.default_rng(42).integers(0, 255, (args.height, args.width, 3), dtype=np.uint8)]
+    backend.predict(images[:1])  # Warm up
+
+    modes = {'full-frame': lambda image: filter_score(backend.predict([image])[0], args.conf),
+             'tiled': lambda image: run_tiled(backend, image, args)}
+    outputs = {}
+    print(f"{len(images)} images, tiles of {args.tile} with {args.overlap:.0%} overlap\n")
+    print(f"{'mode':<12} {'s/image':>8} {'detections':>11}")
+    print("-" * 33)
+    for mode, run in modes.items():
+        timings, outputs[mode] = [], []
+        for image in images:
+            start = time.perf_counter()
+            outputs[mode].append(run(image))
+            timings.append(time.perf_counter() - start)
+        print(f"{mode:<12} {statistics.mean(timings):>8.2f} {sum(len(r.boxes) for r in outputs[mode]):>11}")
+
+    if args.labels:
+        truth = [read_labels(os.path.join(args.labels, os.path.splitext(os.path.basename(path))[0] + '.txt'),
+                             image.shape[1], image.shape[0]) for path, image in zip(paths, images)]
+        print(f"\n{'mode':<12} {'class':<20} {'labels':>7} {'found':>6} {'recall':>7}")
+        print("-" * 56)
+        for mode in modes:
+            for name, stats in compare_results(truth, outputs[mode], backend.names).items():
+                if not stats['reference']:
+                    continue
+                print(f"{mode:<12} {name:<20} {stats['reference']:>7} {stats['matched']:>6} {stats['recall']:>7.1%}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Benchmark in-process inference against the multi-process worker pool
+
+Concurrent clients each send one image at a time, as Flask request threads
+do. Reports throughput for the model in this process and for pools of
+increasing size; pools only help with a spare core per worker.
+
+Usage:
+    python benchmark_worker_pool.py --backend onnx --model model/best.onnx --workers 1 2 4 --clients 8
+"""
+
+import argparse
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from inference_backends import load_backend
+from worker_pool import InferenceWorkerPool
+
+
+def throughput(backend, images, clients, lock=None):
+    """Images per second with clients threads calling backend.predict one image at a time"""
+    def run(image):
+        if lock is None:
+            return backend.predict([image])
+        with lock:
+            return backend.predict([image])
+
+    run(images[0])  # Warm up
+    start = time.perf_counter()
+    with ThreadPoolExecutor(clients) as executor:
+        list(executor.map(run, images))
+    return len(images) / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--backend', default='onnx', choices=['ultralytics', 'onnx'])
+    parser.add_argument('--model', default='model/best.onnx')
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4])
+    parser.add_argument('--threads', type=int, default=0, help="Compute threads per worker")
+    parser.add_argument('--clients', type=int, default=8)
+    parser.add_argument('--images', type=int, default=64)
+    parser.add_argument('--width', type=int, default=1280)
+    parser.add_argument('--height', type=int, default=960)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(42)
+    images = [rng.integers(0, 255, (args.height, args.width, 3), dtype=np.uint8) for _ in range(args.images)]
+
+    print(f"{args.images} images of {args.width}x{args.height}, {args.clients} clients, {os.cpu_count()} CPUs\n")
+    print(f"{'setup':<16} {'img/s':>8}")
+    print("-" * 25)
+    # One shared model, calls serialised as with a single global model
+    print(f"{'in-process':<16} {throughput(load_backend(args.backend, args.model), images, args.clients, threading.Lock()):>8.1f}")
+    for workers in args.workers:
+        pool = InferenceWorkerPool(load_backend, args=(args.backend, args.model), num_workers=workers,
+                                   num_threads=args.threads).start()
+        try:
+            print(f"{f'{workers} workers':<16} {throughput(pool, images, args.clients):>8.1f}")
+        finally:
+            pool.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Benchmark Detection insert throughput under concurrent uploaders
+
+Each uploader thread saves uploads of --boxes detections as fast as it can,
+either with its own transaction per upload (add_upload and commit, as
+/detect does without write-behind) or by queueing them for the write-behind
+writer. In write-behind mode each uploader waits for its rows like the /detect
+result page does (read-your-writes), or, with 'no wait', returns at once like
+/detect_batch.
+
+Usage:
+    python benchmark_write_behind.py --uploaders 16 32 64 --uploads 20 --boxes 20
+"""
+
+import argparse
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+
+def make_detections(count):
+    return [{'fruit_type': 'Mangosteen', 'ripeness': 'ripe' if i % 2 else 'unripe', 'confidence': 0.9,
+             'class_id': i % 2, 'box': [i, i, i + 40, i + 40]} for i in range(count)]
+
+
+def run(mode, uploaders, uploads, detections, user_ids):
+    """Run uploaders threads of uploads saves each. Returns (seconds, per-upload latencies, errors)."""
+    import app as web
+
+    latencies, errors = [], []
+    lock = threading.Lock()
+    writer = None
+    if mode != 'per-request commit':
+        writer = web.WriteBehindWriter(web.app, web.db, web.write_uploads,
+                                       max_queue=web.app.config['WRITE_BEHIND_MAX_QUEUE'],
+                                       max_batch=web.app.config['WRITE_BEHIND_MAX_BATCH'],
+                                       flush_interval=web.app.config['WRITE_BEHIND_FLUSH_MS'] / 1000).start()
+
+    def uploader(user_id):
+        for i in range(uploads):
+            start = time.perf_counter()
+            try:
+                if writer is None:
+                    with web.app.app_context():
+                        web.add_upload(user_id, f"processed_bench_{user_id}_{i}.jpg", detections)
+                        web.db.session.commit()
+                else:
+                    writer.submit(user_id, web.UploadRecord(user_id, f"processed_bench_{user_id}_{i}.jpg",
+                                                            detections, None, datetime.utcnow()))
+                    if mode == 'write-behind':
+                        writer.wait(user_id)
+            except Exception as e:
+                with lock:
+                    errors.append(str(e))
+                continue
+            with lock:
+                latencies.append(time.perf_counter() - start)
+
+    threads = [threading.Thread(target=uploader, args=(user_ids[i],)) for i in range(uploaders)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    if writer is not None:
+        writer.stop()
+    return time.perf_counter() - start, latencies, errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--uploaders', type=int, nargs='+', default=[16, 32, 64], help='Concurrent uploader threads')
+    parser.add_argument('--uploads', type=int, default=20, help='Uploads per uploader')
+    parser.add_argument('--boxes', type=int, default=20, help='Detections per upload')
+    args = parser.parse_args()
+
+    folder = tempfile.mkdtemp(prefix='fruit_write_bench_')
+    os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(folder, 'bench.db')}"
+    sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+    import app as web
+
+    web.ensure_database()
+    with web.app.app_context():
+        users = [web.User(username=f"bench{i}", password_hash='-') for i in range(max(args.uploaders))]
+        web.db.session.add_all(users)
+        web.db.session.commit()
+        user_ids = [user.id for user in users]
+
+    detections = make_detections(args.boxes)
+    print(f"{args.uploads} uploads of {args.boxes} detections per uploader\n")
+    print(f"{'uploaders':>9} {'mode':<20} {'uploads/s':>10} {'rows/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'errors':>7}")
+    print("-" * 77)
+    for uploaders in args.uploaders:
+        for mode in ('per-request commit', 'write-behind', 'write-behind no wait'):
+            seconds, latencies, errors = run(mode, uploaders, args.uploads, detections, user_ids)
+            latencies.sort()
+            p50 = statistics.median(latencies) * 1000 if latencies else float('nan')
+            p95 = latencies[int(len(latencies) * 0.95) - 1] * 1000 if latencies else float('nan')
+            print(f"{uploaders:>9} {mode:<20} {len(latencies) / seconds:>10.0f} "
+                  f"{len(latencies) * args.boxes / seconds:>9.0f} {p50:>8.1f} {p95:>8.1f} {len(errors):>7}")
+    shutil.rmtree(folder, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
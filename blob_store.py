@@ -0,0 +1,94 @@
+"""
+Content-addressed storage for uploaded files
+Each file is stored once, named after the SHA-256 of its bytes, in nested
+shard directories (ab/cd/abcd...jpg). Identical uploads share one file,
+concurrent uploads can never overwrite each other, and no directory grows
+past a few hundred entries however many uploads accumulate.
+"""
+
+import hashlib
+import os
+import tempfile
+from collections import namedtuple
+
+# A stored file: its path relative to the store root, content hash, size in bytes, and whether this put wrote it
+StoredBlob = namedtuple('StoredBlob', ['path', 'digest', 'size', 'created'])
+
+
+def normalize_extension(filename):
+    """'.jpg' for 'IMG_01.JPG'; '' for names without an extension"""
+    extension = os.path.splitext(filename)[1].lower()
+    return extension if extension[1:].isalnum() else ''
+
+
+class BlobStore:
+    """Files stored under root by content hash"""
+
+    def __init__(self, root, depth=2, width=2, chunk_size=1024 * 1024):
+        """
+        Args:
+            root: Folder of the store, created if missing
+            depth: Levels of shard directories
+            width: Hex digits of the hash naming each level; depth 2 and width 2 give 65,536 leaf directories
+            chunk_size: Bytes read at a time while hashing and copying
+        """
+        self.root = os.path.abspath(root)
+        self.depth = depth
+        self.width = width
+        self.chunk_size = chunk_size
+        self.tmp_folder = os.path.join(self.root, 'tmp')
+        os.makedirs(self.tmp_folder, exist_ok=True)
+
+    def relative_path(self, digest, extension=''):
+        """Shard path of a hash, e.g. 'ab/cd/abcd...ef.jpg'; always uses '/' so it can be stored in the database"""
+        shards = [digest[i * self.width:(i + 1) * self.width] for i in range(self.depth)]
+        return '/'.join(shards + [f"{digest}{extension}"])
+
+    def path(self, relative_path):
+        """Absolute path of a stored file. Raises ValueError for paths outside the store."""
+        path = os.path.abspath(os.path.join(self.root, *relative_path.split('/')))
+        if not path.startswith(self.root + os.sep):
+            raise ValueError(f"Blob path outside the store: {relative_path}")
+        return path
+
+    def exists(self, relative_path):
+        return os.path.isfile(self.path(relative_path))
+
+    def put(self, source, extension=''):
+        """
+        Store the bytes of a readable binary file object
+
+        The bytes are hashed while they are copied to a temporary file, which is then renamed
+        into place, so a file is never visible half written. If the content is already stored
+        the copy is discarded.
+
+        Returns:
+            StoredBlob
+        """
+        sha = hashlib.sha256()
+        size = 0
+        fd, tmp_path = tempfile.mkstemp(dir=self.tmp_folder, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                for chunk in iter(lambda: source.read(self.chunk_size), b''):
+                    sha.update(chunk)
+                    f.write(chunk)
+                    size += len(chunk)
+            relative_path = self.relative_path(sha.hexdigest(), extension)
+            path = self.path(relative_path)
+            if os.path.exists(path):
+                os.remove(tmp_path)
+                return StoredBlob(relative_path, sha.hexdigest(), size, False)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Two puts of the same new content may race here; both files hold the same bytes
+            os.replace(tmp_path, path)
+            return StoredBlob(relative_path, sha.hexdigest(), size, True)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def put_file(self, path):
+        """Store a copy of the file at path, keeping its extension"""
+        with open(path, 'rb') as f:
+            return self.put(f, normalize_extension(path))
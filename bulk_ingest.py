@@ -0,0 +1,140 @@
+"""
+Resumable bulk ingestion of image folders
+Images are detected on a thread pool, which keeps the batched model busy
+(in-process or a worker pool), and results are saved in chunks. After each
+chunk is committed its paths are appended to a checkpoint file, so an
+interrupted run skips everything already saved when it is started again.
+"""
+
+import json
+import logging
+import os
+import time
+from collections import deque, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+IngestStats = namedtuple('IngestStats', ['images', 'skipped', 'processed', 'failed', 'detections', 'seconds'])
+
+
+def images_per_second(stats):
+    """Throughput of the images run in this session"""
+    return (stats.processed + stats.failed) / stats.seconds if stats.seconds else 0.0
+
+
+def find_images(folder, extensions=('png', 'jpg', 'jpeg', 'gif')):
+    """Absolute paths of the images under folder, recursively, in a stable order"""
+    paths = []
+    for root, dirs, files in os.walk(folder):
+        dirs.sort()
+        for name in sorted(files):
+            if '.' in name and name.rsplit('.', 1)[1].lower() in extensions:
+                paths.append(os.path.abspath(os.path.join(root, name)))
+    return paths
+
+
+class Checkpoint:
+    """Append-only JSON-lines record of the paths an ingest run has finished"""
+
+    def __init__(self, path):
+        self.path = path
+        self.status = {}
+        self._torn = False
+        if os.path.exists(path):
+            with open(path, encoding='utf-8') as f:
+                for line in f:
+                    self._torn = not line.endswith('\n')
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        # The last line of a run killed mid-write
+                        continue
+                    self.status[entry['path']] = entry['status']
+
+    def finished(self, retry_failed=False):
+        """Paths to skip: saved ones, and failed ones unless they are retried"""
+        return {path for path, status in self.status.items() if status == 'done' or not retry_failed}
+
+    def record(self, entries):
+        """Durably append (path, status, error) entries; called only after their rows are committed"""
+        if not entries:
+            return
+        with open(self.path, 'a', encoding='utf-8') as f:
+            if self._torn:
+                # Do not glue the first new entry onto a partly written line
+                f.write('\n')
+                self._torn = False
+            for path, status, error in entries:
+                f.write(json.dumps({'path': path, 'status': status, 'error': error}) + '\n')
+                self.status[path] = status
+            f.flush()
+            os.fsync(f.fileno())
+
+
+def ingest(paths, detect, save, checkpoint, skip=(), num_threads=8, chunk_size=64, retry_failed=False, report=None):
+    """
+    Detect and save every path not finished by an earlier run
+
+    Args:
+        paths: Image paths in the order to process them
+        detect: Callable(path) returning (detections, inference_ms); raises for images that cannot be used
+        save: Callable(list of (path, detections, inference_ms)) that stores and commits one chunk
+        checkpoint: Checkpoint of this run
+        skip: Further paths already saved, e.g. found in the database by a run whose checkpoint write was lost
+        num_threads: Images detected concurrently
+        chunk_size: Images per save() call and checkpoint write
+        retry_failed: Run images that failed in an earlier run again
+        report: Optional callable(IngestStats) called after each chunk
+
+    Returns:
+        IngestStats for this run
+    """
+    finished = checkpoint.finished(retry_failed) | set(skip)
+    pending = [path for path in paths if path not in finished]
+    counts = {'processed': 0, 'failed': 0, 'detections': 0}
+    start = time.perf_counter()
+
+    def stats():
+        return IngestStats(len(paths), len(paths) - len(pending), counts['processed'], counts['failed'],
+                           counts['detections'], time.perf_counter() - start)
+
+    def flush(saved, failed):
+        if not saved and not failed:
+            return
+        if saved:
+            save(saved)
+        checkpoint.record([(path, 'done', None) for path, _, _ in saved] + failed)
+        counts['processed'] += len(saved)
+        counts['failed'] += len(failed)
+        counts['detections'] += sum(len(detections) for _, detections, _ in saved)
+        if report:
+            report(stats())
+
+    with ThreadPoolExecutor(max_workers=num_threads, thread_name_prefix='ingest') as executor:
+        # A bounded window of submitted images keeps memory flat on folders of any size
+        window = chunk_size + 2 * num_threads
+        queued = iter(pending)
+        futures = deque()
+
+        def fill():
+            while len(futures) < window:
+                path = next(queued, None)
+                if path is None:
+                    return
+                futures.append((path, executor.submit(detect, path)))
+
+        fill()
+        saved, failed = [], []
+        while futures:
+            path, future = futures.popleft()
+            fill()
+            try:
+                detections, inference_ms = future.result()
+                saved.append((path, detections, inference_ms))
+            except Exception as e:
+                logging.warning(f"Ingest failed for {path}: {str(e)}")
+                failed.append((path, 'failed', str(e)[:255]))
+            if len(saved) + len(failed) >= chunk_size:
+                flush(saved, failed)
+                saved, failed = [], []
+        flush(saved, failed)
+    return stats()
@@ -1,7 +1,9 @@
-from app import app, db, User
+from app import app, db, ensure_database, User
 import logging
 
 def check_users():
+    # Creates the tables of a fresh database
+    ensure_database()
     with app.app_context():
         # Get all users
         users = User.query.all()
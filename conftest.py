@@ -0,0 +1,17 @@
+"""
+Shared pytest setup
+The app reads DATABASE_URL when it is imported, which test modules do while
+they are collected, so the throwaway database is chosen here, before any of them.
+"""
+
+import os
+import shutil
+import tempfile
+
+TEST_FOLDER = tempfile.mkdtemp(prefix='fruit_tests_')
+os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(TEST_FOLDER, 'test.db')}"
+os.environ['DETECTION_WRITE_BEHIND'] = 'off'
+
+
+def pytest_sessionfinish(session, exitstatus):
+    shutil.rmtree(TEST_FOLDER, ignore_errors=True)
@@ -0,0 +1,102 @@
+"""
+SQLite concurrency settings and read/write engine routing
+Every connection gets WAL journaling and tuned pragmas when it is opened, so
+long reads such as history exports no longer block uploads from committing,
+nor the reverse. Views marked read_only run their queries on a separate read
+engine with its own pool, leaving the primary engine's connections to writers.
+"""
+
+import functools
+import logging
+
+from flask import g, has_request_context
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event
+from sqlalchemy.sql import Select
+
+READ_BIND = 'read'
+
+# Applied in this order on every new connection; journal_mode is persistent, the rest are per connection
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',  # Readers see the last commit while a writer appends to the log
+    'synchronous': 'NORMAL',  # Durable across application crashes; in WAL mode only a power cut can lose the last commits
+    'busy_timeout': 5000,  # Milliseconds a writer waits for the lock instead of failing with "database is locked"
+    'cache_size': -65536,  # Page cache per connection in KiB (64 MiB)
+    'mmap_size': 268435456,  # Read pages through a 256 MiB memory map instead of read() calls
+    'temp_store': 'MEMORY',  # Sorts and temporary indexes of large history queries stay off disk
+}
+
+
+def is_sqlite(url):
+    return str(url).startswith('sqlite')
+
+
+def read_binds(url, read_url=None, read_pool_size=8):
+    """
+    SQLALCHEMY_BINDS entry adding the read engine
+
+    Args:
+        url: Primary database URL
+        read_url: URL of the read engine, e.g. a replica; for SQLite it defaults to the primary
+            database file, which WAL lets other connections read while it is being written
+        read_pool_size: Connections the read engine keeps open
+
+    Returns:
+        {'read': options}, or {} when there is nothing to split: in-memory SQLite databases,
+        which other connections cannot see, and other databases without a read_url
+    """
+    if read_url is None and not is_sqlite(url):
+        return {}
+    read_url = read_url or url
+    if is_sqlite(read_url) and read_url.rstrip('/').endswith((':memory:', 'sqlite:')):
+        return {}
+    options = {'url': read_url}
+    if is_sqlite(read_url):
+        options.update({'pool_size': read_pool_size, 'max_overflow': read_pool_size})
+    return {READ_BIND: options}
+
+
+def apply_pragmas(engine, pragmas, read_only=False):
+    """Run pragmas on each new connection of a SQLite engine; read_only connections refuse writes"""
+    if not is_sqlite(engine.url):
+        return
+
+    @event.listens_for(engine, 'connect')
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas.items():
+                cursor.execute(f"PRAGMA {name}={value}")
+            if read_only:
+                cursor.execute("PRAGMA query_only=ON")
+        finally:
+            cursor.close()
+
+
+def configure_engines(db, pragmas=SQLITE_PRAGMAS):
+    """Apply the pragmas to the primary engine and, if configured, the read engine. Needs an app context."""
+    engines = db.engines
+    apply_pragmas(engines[None], pragmas)
+    if READ_BIND in engines:
+        apply_pragmas(engines[READ_BIND], pragmas, read_only=True)
+        logging.debug(f"Read-only views use a separate engine for {engines[READ_BIND].url}")
+
+
+class RoutingSession(Session):
+    """Session that sends the SELECTs of read_only views to the read engine. Flushes and other
+    statements, and everything outside those views, use the primary engine."""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and not self._flushing and has_request_context() and g.get('read_only_db') and \
+                READ_BIND in self._db.engines and (clause is None or isinstance(clause, Select)):
+            return self._db.engines[READ_BIND]
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+def read_only(view):
+    """Route a view's queries to the read engine. The view must not write to the database."""
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        g.read_only_db = True
+        return view(*args, **kwargs)
+    return wrapper
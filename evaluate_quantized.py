@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Compare the INT8 model against the fp32 model on a held-out image folder
+
+Reports the inference speedup and, per class, how many fp32 detections the
+INT8 model also finds and how their confidence changes. Exits with status 1
+when a gate is exceeded, so it can block a rollout.
+
+Usage:
+    python evaluate_quantized.py --images data/heldout
+    python evaluate_quantized.py --images data/heldout --reference-backend ultralytics --reference model/best.pt
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from inference_backends import load_backend
+from quantization import compare_results, list_images, load_images
+
+
+def run(backend, images):
+    """Predict one image at a time, as /detect does. Returns (results, median ms)."""
+    backend.predict(images[:1])  # Warm up
+    results, latencies = [], []
+    for image in images:
+        start = time.perf_counter()
+        results.extend(backend.predict([image]))
+        latencies.append((time.perf_counter() - start) * 1000)
+    return results, statistics.median(latencies)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--images', required=True, help='Held-out images, not used for calibration')
+    parser.add_argument('--reference', default='model/best.onnx')
+    parser.add_argument('--reference-backend', default='onnx', choices=['onnx', 'ultralytics'])
+    parser.add_argument('--int8', default='model/best.int8.onnx')
+    parser.add_argument('--conf', type=float, default=0.5, help='Score threshold, as CONFIDENCE_THRESHOLD')
+    parser.add_argument('--iou', type=float, default=0.5, help='IoU for a detection to count as the same')
+    parser.add_argument('--min-recall', type=float, default=0.95, help='Gate: per-class share of fp32 detections kept')
+    parser.add_argument('--max-confidence-drop', type=float, default=0.05, help='Gate: per-class mean confidence drop')
+    args = parser.parse_args()
+
+    images = load_images(list_images(args.images))
+    if not images:
+        sys.exit(f"No images found in {args.images}")
+    reference = load_backend(args.reference_backend, args.reference, conf=args.conf)
+    candidate = load_backend('onnx', args.int8, conf=args.conf)
+    reference_results, reference_ms = run(reference, images)
+    candidate_results, candidate_ms = run(candidate, images)
+
+    print(f"{len(images)} held-out images")
+    print(f"fp32 {reference_ms:.1f} ms, int8 {candidate_ms:.1f} ms per image: {reference_ms / candidate_ms:.2f}x speedup\n")
+    print(f"{'class':<20} {'fp32':>6} {'int8':>6} {'matched':>8} {'recall':>7} {'conf delta':>11}")
+    print("-" * 62)
+    failures = []
+    for name, stats in compare_results(reference_results, candidate_results, reference.names, args.iou).items():
+        print(f"{name:<20} {stats['reference']:>6} {stats['candidate']:>6} {stats['matched']:>8} "
+              f"{stats['recall']:>7.1%} {stats['confidence_delta']:>+11.3f}")
+        if stats['recall'] < args.min_recall:
+            failures.append(f"{name}: recall {stats['recall']:.1%} below {args.min_recall:.0%}")
+        if stats['confidence_delta'] < -args.max_confidence_drop:
+            failures.append(f"{name}: confidence dropped {-stats['confidence_delta']:.3f}")
+
+    if failures:
+        print("\nGate FAILED:\n  " + "\n  ".join(failures))
+        sys.exit(1)
+    print("\nGate passed")
+
+
+if __name__ == '__main__':
+    main()
@@ -3,12 +3,15 @@ Excel Template Generator for Fruit Detection System
 Provides professional Excel export templates with consistent formatting
 """
 
-import pandas as pd
+import tempfile
 from io import BytesIO
 from datetime import datetime
 import xlsxwriter
 
 
+DETECTION_COLUMNS = ['Ripeness', 'Confidence (%)', 'Detection Date', 'Detection Time', 'Image File', 'User']
+
+
 class FruitDetectionExcelTemplate:
     """Excel template generator for Fruit Detection System exports"""
     
@@ -31,33 +34,39 @@ class FruitDetectionExcelTemplate:
             BytesIO object containing the Excel file
         """
         output = BytesIO()
+        rows = ((d.ripeness, d.confidence, d.timestamp, d.image_path) for d in detections)
+        self.write_detection_report(output, rows, user, filters, total=len(detections))
+        output.seek(0)
+        return output
+    
+    def create_detection_report_streaming(self, rows, user, filters=None, total=None):
+        """
+        Create a detection report by streaming rows straight into the workbook
         
-        with pd.ExcelWriter(output, engine='xlsxwriter') as writer:
-            # Convert detections to DataFrame
-            data = [{
-                'Ripeness': d.ripeness,
-                'Confidence (%)': round(d.confidence * 100, 2),
-                'Detection Date': d.timestamp.strftime('%Y-%m-%d'),
-                'Detection Time': d.timestamp.strftime('%H:%M:%S'),
-                'Image File': d.image_path,
-                'User': user.username
-            } for d in detections]
-            
-            df = pd.DataFrame(data)
-            
-            # Write to Excel with formatting
-            df.to_excel(writer, index=False, sheet_name='Detection Results', startrow=8)
-            
-            # Get workbook and worksheet objects
-            workbook = writer.book
-            worksheet = writer.sheets['Detection Results']
-            
-            # Apply formatting
-            self._apply_detection_formatting(workbook, worksheet, df, user, filters)
+        Rows are written in xlsxwriter's constant_memory mode to a temporary
+        file, so memory use stays flat as the number of rows grows.
         
+        Args:
+            rows: Iterable of (ripeness, confidence, timestamp, image_path) tuples, e.g. a database cursor
+            user: User object
+            filters: Dictionary of applied filters
+            total: Number of rows, shown in the report header
+            
+        Returns:
+            Temporary file object containing the Excel file
+        """
+        output = tempfile.TemporaryFile()
+        self.write_detection_report(output, rows, user, filters, total=total, constant_memory=True)
         output.seek(0)
         return output
     
+    def write_detection_report(self, output, rows, user, filters=None, total=None, constant_memory=False):
+        """Write a detection report for an iterable of (ripeness, confidence, timestamp, image_path) rows to output"""
+        workbook = xlsxwriter.Workbook(output, {'constant_memory': constant_memory})
+        worksheet = workbook.add_worksheet('Detection Results')
+        self._apply_detection_formatting(workbook, worksheet, rows, user, filters, total)
+        workbook.close()
+    
     def create_summary_report(self, summary_data, user):
         """
         Create a summary statistics report
@@ -69,6 +78,8 @@ class FruitDetectionExcelTemplate:
         Returns:
             BytesIO object containing the Excel file
         """
+        # pandas is slow to import and only used here, so load it on first export
+        import pandas as pd
         output = BytesIO()
         
         with pd.ExcelWriter(output, engine='xlsxwriter') as writer:
@@ -81,7 +92,7 @@ class FruitDetectionExcelTemplate:
         output.seek(0)
         return output
     
-    def _apply_detection_formatting(self, workbook, worksheet, df, user, filters):
+    def _apply_detection_formatting(self, workbook, worksheet, rows, user, filters, total):
         """Apply professional formatting to detection report"""
         
         # Define formats
@@ -143,7 +154,8 @@ class FruitDetectionExcelTemplate:
         worksheet.merge_range('A2:F2', 'Detection Results Report', subtitle_format)
         worksheet.merge_range('A3:F3', f'Generated on: {datetime.now().strftime("%Y-%m-%d %H:%M:%S")}', subtitle_format)
         worksheet.merge_range('A4:F4', f'User: {user.username}', subtitle_format)
-        worksheet.merge_range('A5:F5', f'Total Detections: {len(df)}', subtitle_format)
+        if total is not None:
+            worksheet.merge_range('A5:F5', f'Total Detections: {total}', subtitle_format)
         
         # Add filter information if any
         if filters:
@@ -164,23 +176,28 @@ class FruitDetectionExcelTemplate:
         worksheet.set_column('F:F', 12)  # User
         
         # Apply header formatting
-        for col_num, value in enumerate(df.columns.values):
-            worksheet.write(8, col_num, value, header_format)
-        
-        # Apply data formatting
-        for row_num in range(len(df)):
-            for col_num in range(len(df.columns)):
-                cell_value = df.iloc[row_num, col_num]
-                
-                if col_num == 0:  # Ripeness column
-                    worksheet.write(row_num + 9, col_num, cell_value, ripeness_format)
-                elif col_num == 1:  # Confidence column
-                    worksheet.write(row_num + 9, col_num, cell_value, confidence_format)
-                else:
-                    worksheet.write(row_num + 9, col_num, cell_value, data_format)
+        worksheet.write_row(8, 0, DETECTION_COLUMNS, header_format)
+        
+        # Stream data rows, keeping running totals for the summary section
+        totals = {'count': 0, 'ripe': 0, 'unripe': 0, 'confidence_sum': 0.0}
+        row_num = 9
+        username = user.username
+        for ripeness, confidence, timestamp, image_path in rows:
+            confidence = round(confidence * 100, 2)
+            worksheet.write_string(row_num, 0, ripeness, ripeness_format)
+            worksheet.write_number(row_num, 1, confidence, confidence_format)
+            worksheet.write_row(row_num, 2, (timestamp.strftime('%Y-%m-%d'), timestamp.strftime('%H:%M:%S'),
+                                             image_path, username), data_format)
+            totals['count'] += 1
+            totals['confidence_sum'] += confidence
+            if ripeness == 'ripe':
+                totals['ripe'] += 1
+            elif ripeness == 'unripe':
+                totals['unripe'] += 1
+            row_num += 1
         
         # Add summary statistics
-        self._add_summary_section(worksheet, df, len(df) + 12, header_format, data_format, title_format)
+        self._add_summary_section(worksheet, totals, totals['count'] + 12, header_format, data_format, title_format)
     
     def _apply_summary_formatting(self, workbook, worksheet, summary_data, user):
         """Apply formatting to summary report"""
@@ -233,16 +250,16 @@ class FruitDetectionExcelTemplate:
             worksheet.write(row, 1, value, data_format)
             row += 1
     
-    def _add_summary_section(self, worksheet, df, start_row, header_format, data_format, title_format):
-        """Add summary statistics section to detection report"""
+    def _add_summary_section(self, worksheet, totals, start_row, header_format, data_format, title_format):
+        """Add summary statistics section to detection report from running totals"""
         
         worksheet.merge_range(f'A{start_row}:F{start_row}', 'Summary Statistics', title_format)
         
         # Calculate statistics
-        total_detections = len(df)
-        ripe_count = len(df[df['Ripeness'] == 'ripe'])
-        unripe_count = len(df[df['Ripeness'] == 'unripe'])
-        avg_confidence = df['Confidence (%)'].mean()
+        total_detections = totals['count']
+        ripe_count = totals['ripe']
+        unripe_count = totals['unripe']
+        avg_confidence = totals['confidence_sum'] / total_detections if total_detections else 0.0
         
         # Add statistics
         worksheet.write(start_row + 1, 0, 'Total Detections:', header_format)
@@ -289,6 +306,25 @@ def create_detection_export(detections, user, filters=None):
     return output, filename
 
 
+def create_streaming_detection_export(rows, user, filters=None, total=None):
+    """
+    Convenience function to create a detection export from a row stream
+    
+    Args:
+        rows: Iterable of (ripeness, confidence, timestamp, image_path) tuples
+        user: User object
+        filters: Dictionary of applied filters
+        total: Number of rows, shown in the report header
+        
+    Returns:
+        Tuple of (temporary file object, filename)
+    """
+    template = FruitDetectionExcelTemplate()
+    output = template.create_detection_report_streaming(rows, user, filters, total)
+    filename = template.generate_filename("Detection_Report")
+    return output, filename
+
+
 def create_summary_export(summary_data, user):
     """
     Convenience function to create summary export
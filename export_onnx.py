@@ -0,0 +1,14 @@
+import argparse
+
+from ultralytics import YOLO
+
+# Exports the YOLOv8 weights to ONNX for INFERENCE_BACKEND=onnx.
+# The batch dimension is dynamic so micro-batched requests share one session run.
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export model/best.pt to model/best.onnx")
+    parser.add_argument('--model', default='model/best.pt')
+    parser.add_argument('--imgsz', type=int, default=640)
+    args = parser.parse_args()
+    path = YOLO(args.model).export(format='onnx', imgsz=args.imgsz, dynamic=True, simplify=True)
+    print(f"Exported {path}")
@@ -0,0 +1,62 @@
+"""
+Decode-once image loading for fruit detection
+Uploaded bytes are decoded a single time into the array fed to the model,
+at reduced scale when a JPEG is much larger than the model input, and
+turned upright according to its EXIF orientation like cv2.imread does
+"""
+
+from io import BytesIO
+
+import numpy as np
+from PIL import Image, ImageOps
+
+EXIF_ORIENTATION = 0x0112
+# Orientations that turn the stored image by 90 degrees, swapping its width and height
+TRANSPOSED_ORIENTATIONS = (5, 6, 7, 8)
+
+
+def exif_orientation(image):
+    """EXIF orientation of an opened image, 1 (upright) when it has none"""
+    return image.getexif().get(EXIF_ORIENTATION, 1)
+
+
+def upright(image):
+    """The image turned as its EXIF orientation says it is displayed; images without one are returned as they are"""
+    return ImageOps.exif_transpose(image) if exif_orientation(image) != 1 else image
+
+
+def upright_size(image):
+    """(width, height) of an opened image as displayed, after its EXIF orientation"""
+    width, height = image.size
+    return (height, width) if exif_orientation(image) in TRANSPOSED_ORIENTATIONS else (width, height)
+
+
+def decode_image(data, target_size=640, min_ratio=2):
+    """
+    Decode image bytes into an RGB NumPy array
+
+    JPEGs whose longer side is at least min_ratio times target_size are decoded
+    with DCT scaling (PIL draft mode), which skips most of the full-size decode work.
+
+    Args:
+        data: Encoded image bytes
+        target_size: Model input size in pixels; the decoded image is never smaller than this.
+            None decodes at full size, as tiled inference needs
+        min_ratio: How much larger than target_size a JPEG must be before it is decoded at reduced scale
+
+    Returns:
+        (array, scale) where array is HxWx3 uint8 RGB, upright, and multiplying array
+        coordinates by scale gives coordinates in the upright original image
+    """
+    image = Image.open(BytesIO(data))
+    original_width = upright_size(image)[0]
+    if target_size and image.format == 'JPEG' and max(image.size) >= min_ratio * target_size:
+        # draft picks the largest 1/2, 1/4 or 1/8 reduction that keeps both sides >= the request
+        image.draft('RGB', (target_size, target_size))
+    array = np.asarray(upright(image).convert('RGB'))
+    return array, original_width / array.shape[1]
+
+
+def image_size(data):
+    """Upright (width, height) of encoded image bytes, read from the header only"""
+    return upright_size(Image.open(BytesIO(data)))
@@ -0,0 +1,167 @@
+"""
+Inference backends for fruit detection
+detect_fruit talks to a backend instead of ultralytics directly, so the
+PyTorch model can be swapped for an exported ONNX model run on ONNX Runtime
+"""
+
+import ast
+from collections import namedtuple
+
+import numpy as np
+
+# Per-image detections: boxes is Nx4 float xyxy in input-image pixels, scores N floats, class_ids N ints
+BackendResult = namedtuple('BackendResult', ['boxes', 'scores', 'class_ids'])
+
+
+class UltralyticsBackend:
+    """Runs the .pt model through ultralytics/PyTorch"""
+
+    name = 'ultralytics'
+
+    def __init__(self, model_path, imgsz=640, conf=0.25, iou=0.7, max_det=300):
+        from ultralytics import YOLO
+        self.model_path = model_path
+        self.imgsz = imgsz
+        self.conf = conf
+        self.iou = iou
+        self.max_det = max_det
+        self.model = YOLO(model_path)
+        self.names = self.model.names
+
+    def predict(self, images, conf=None, iou=None, max_det=None, imgsz=None):
+        """Run one batched forward pass over BGR arrays. Returns one BackendResult per image.
+        conf, iou, max_det and imgsz override the backend defaults for this call."""
+        # None means the backend default; an explicit 0 threshold is kept
+        results = self.model(images, imgsz=self.imgsz if imgsz is None else imgsz,
+                             conf=self.conf if conf is None else conf, iou=self.iou if iou is None else iou,
+                             max_det=self.max_det if max_det is None else max_det, verbose=False)
+        return [BackendResult(r.boxes.xyxy.cpu().numpy(),
+                              r.boxes.conf.cpu().numpy(),
+                              r.boxes.cls.cpu().numpy().astype(int)) for r in results]
+
+
+class OnnxBackend:
+    """Runs a YOLOv8 model exported to ONNX on the ONNX Runtime CPU execution provider"""
+
+    name = 'onnx'
+
+    def __init__(self, model_path, imgsz=640, conf=0.25, iou=0.7, max_det=300, num_threads=0):
+        try:
+            import onnxruntime
+        except ImportError as e:
+            raise ImportError("The onnx inference backend needs onnxruntime (pip install onnxruntime)") from e
+        self.model_path = model_path
+        self.conf = conf
+        self.iou = iou
+        self.max_det = max_det
+        options = onnxruntime.SessionOptions()
+        if num_threads:
+            options.intra_op_num_threads = num_threads
+        self.session = onnxruntime.InferenceSession(model_path, options, providers=['CPUExecutionProvider'])
+        model_input = self.session.get_inputs()[0]
+        self.input_name = model_input.name
+        # Static exports fix the batch size and input size; dynamic ones use names instead of ints
+        self.fixed_batch = model_input.shape[0] if isinstance(model_input.shape[0], int) else None
+        # Exports with a fixed input size ignore per-call imgsz
+        self.dynamic_size = not isinstance(model_input.shape[2], int)
+        self.imgsz = imgsz if self.dynamic_size else model_input.shape[2]
+        metadata = self.session.get_modelmeta().custom_metadata_map
+        self.names = ast.literal_eval(metadata['names']) if 'names' in metadata else {}
+
+    def predict(self, images, conf=None, iou=None, max_det=None, imgsz=None):
+        """Run BGR arrays through the session, batched if the export allows it. Returns one BackendResult per image.
+        conf, iou, max_det and imgsz override the backend defaults for this call."""
+        size = imgsz if imgsz is not None and self.dynamic_size else self.imgsz
+        letterboxed = [letterbox(image, size) for image in images]
+        batch = np.stack([tensor for tensor, _, _ in letterboxed])
+        if self.fixed_batch == 1:
+            outputs = np.concatenate([self.session.run(None, {self.input_name: batch[i:i + 1]})[0]
+                                      for i in range(len(images))])
+        else:
+            outputs = self.session.run(None, {self.input_name: batch})[0]
+        return [decode_predictions(output, ratio, pad, image.shape[:2], self.conf if conf is None else conf,
+                                   self.iou if iou is None else iou, self.max_det if max_det is None else max_det)
+                for output, image, (_, ratio, pad) in zip(outputs, images, letterboxed)]
+
+
+def letterbox(image, size, color=(114, 114, 114)):
+    """
+    Resize a BGR image to fit size x size keeping its aspect ratio, pad the rest, as ultralytics does
+
+    Returns:
+        (tensor, ratio, (pad_left, pad_top)) where tensor is a 3xSxS float32 RGB array in [0, 1]
+    """
+    import cv2
+    height, width = image.shape[:2]
+    ratio = min(size / height, size / width)
+    new_width, new_height = int(round(width * ratio)), int(round(height * ratio))
+    if (new_width, new_height) != (width, height):
+        image = cv2.resize(image, (new_width, new_height), interpolation=cv2.INTER_LINEAR)
+    pad_x, pad_y = (size - new_width) / 2, (size - new_height) / 2
+    top, bottom = int(round(pad_y - 0.1)), int(round(pad_y + 0.1))
+    left, right = int(round(pad_x - 0.1)), int(round(pad_x + 0.1))
+    image = cv2.copyMakeBorder(image, top, bottom, left, right, cv2.BORDER_CONSTANT, value=color)
+    tensor = np.ascontiguousarray(image[:, :, ::-1].transpose(2, 0, 1), dtype=np.float32) / 255.0
+    return tensor, ratio, (left, top)
+
+
+def decode_predictions(output, ratio, pad, image_shape, conf=0.25, iou=0.7, max_det=300):
+    """
+    Turn one image's raw YOLOv8 output into boxes in original-image pixels
+
+    Args:
+        output: (4 + num_classes) x N array of cx, cy, w, h then per-class scores
+        ratio, pad: Letterbox scale and (left, top) padding used for the input
+        image_shape: (height, width) of the original image
+        conf: Minimum class score kept
+        iou: IoU above which boxes of the same class are suppressed
+        max_det: Most boxes returned, highest score first
+    """
+    predictions = output.T
+    class_scores = predictions[:, 4:]
+    class_ids = class_scores.argmax(axis=1)
+    scores = class_scores[np.arange(len(class_ids)), class_ids]
+    keep = scores > conf
+    predictions, scores, class_ids = predictions[keep], scores[keep], class_ids[keep]
+    boxes = np.empty((len(predictions), 4), dtype=np.float32)
+    boxes[:, :2] = predictions[:, :2] - predictions[:, 2:4] / 2
+    boxes[:, 2:] = predictions[:, :2] + predictions[:, 2:4] / 2
+    keep = non_max_suppression(boxes, scores, class_ids, iou, max_det)
+    boxes, scores, class_ids = boxes[keep], scores[keep], class_ids[keep]
+    boxes -= np.array([pad[0], pad[1], pad[0], pad[1]], dtype=np.float32)
+    boxes /= ratio
+    height, width = image_shape
+    boxes[:, [0, 2]] = boxes[:, [0, 2]].clip(0, width)
+    boxes[:, [1, 3]] = boxes[:, [1, 3]].clip(0, height)
+    return BackendResult(boxes, scores, class_ids.astype(int))
+
+
+def non_max_suppression(boxes, scores, class_ids, iou, max_det=300):
+    """Indices of at most max_det boxes kept by per-class greedy NMS, highest score first"""
+    # Offsetting each class far apart lets one pass suppress within classes only
+    offset = boxes + (class_ids[:, None] * 7680.0)
+    areas = (offset[:, 2] - offset[:, 0]) * (offset[:, 3] - offset[:, 1])
+    order = scores.argsort()[::-1]
+    keep = []
+    while order.size and len(keep) < max_det:
+        best, rest = order[0], order[1:]
+        keep.append(best)
+        top_left = np.maximum(offset[best, :2], offset[rest, :2])
+        bottom_right = np.minimum(offset[best, 2:], offset[rest, 2:])
+        intersection = np.prod((bottom_right - top_left).clip(0), axis=1)
+        overlap = intersection / (areas[best] + areas[rest] - intersection + 1e-9)
+        order = rest[overlap <= iou]
+    return np.array(keep, dtype=int)
+
+
+BACKENDS = {
+    UltralyticsBackend.name: UltralyticsBackend,
+    OnnxBackend.name: OnnxBackend,
+}
+
+
+def load_backend(name, model_path, **kwargs):
+    """Create the backend registered under name ('ultralytics' or 'onnx') for model_path"""
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown inference backend '{name}'. Choose one of: {', '.join(BACKENDS)}")
+    return BACKENDS[name](model_path, **kwargs)
@@ -0,0 +1,80 @@
+"""
+Per-request inference parameters
+Confidence, NMS IoU, max detections and model input size come from the
+user's settings and travel with each image into the model call, so
+filtering happens inside NMS. In adaptive mode the input size is picked
+per image from its resolution and a cheap estimate of how crowded it is.
+"""
+
+from collections import namedtuple
+
+import numpy as np
+
+# conf and iou are fractions; imgsz is the model input side in pixels
+InferenceParams = namedtuple('InferenceParams', ['conf', 'iou', 'max_det', 'imgsz'])
+
+DEFAULT_PARAMS = InferenceParams(conf=0.5, iou=0.7, max_det=300, imgsz=640)
+
+# (highest density, imgsz): sparse close-ups run small, only crowded scenes pay for large inputs
+ADAPTIVE_SIZES = ((0.06, 320), (0.12, 480), (0.22, 640), (1.0, 960))
+
+
+# Range of fixed model input sizes a user can choose, in pixels
+MIN_IMAGE_SIZE = 160
+MAX_IMAGE_SIZE = 1280
+
+
+def clamp(value, low, high):
+    return max(low, min(high, value))
+
+
+def normalize_image_size(pixels):
+    """A fixed model input size within MIN_IMAGE_SIZE-MAX_IMAGE_SIZE, rounded down to a multiple of 32 for the model strides"""
+    return int(clamp(int(pixels), MIN_IMAGE_SIZE, MAX_IMAGE_SIZE)) // 32 * 32
+
+
+def params_from_settings(settings, defaults=DEFAULT_PARAMS):
+    """
+    InferenceParams from a User.settings dictionary
+
+    The settings page stores confidence_threshold and iou_threshold as percentages,
+    max_detections as a count and image_size as pixels or 'auto'. imgsz is None in
+    adaptive mode, to be filled in per image by choose_image_size.
+    """
+    settings = settings or {}
+
+    def number(key, default, cast=float):
+        try:
+            return cast(settings.get(key, default))
+        except (TypeError, ValueError):
+            return default
+
+    image_size = settings.get('image_size', defaults.imgsz)
+    if image_size in ('auto', None):
+        imgsz = None
+    else:
+        imgsz = normalize_image_size(number('image_size', defaults.imgsz or DEFAULT_PARAMS.imgsz, int))
+    return InferenceParams(
+        conf=clamp(number('confidence_threshold', defaults.conf * 100) / 100, 0.01, 0.99),
+        iou=clamp(number('iou_threshold', defaults.iou * 100) / 100, 0.05, 0.95),
+        max_det=int(clamp(number('max_detections', defaults.max_det, int), 1, 1000)),
+        imgsz=imgsz
+    )
+
+
+def estimate_density(image, sample_size=96, edge_threshold=24):
+    """
+    Share of strongly textured pixels in a small sample of an HxWx3 array, from 0 (one smooth
+    close-up) towards 1 (a cluttered scene of many small objects). Costs well under a millisecond.
+    """
+    step = max(1, max(image.shape[:2]) // sample_size)
+    gray = image[::step, ::step].astype(np.int16).sum(axis=2) // 3
+    edges = (np.abs(np.diff(gray, axis=0))[:, :-1] + np.abs(np.diff(gray, axis=1))[:-1, :]) > edge_threshold
+    return float(edges.mean()) if edges.size else 0.0
+
+
+def choose_image_size(width, height, density, sizes=ADAPTIVE_SIZES):
+    """Model input size for an image: the size band of its density, never above its own resolution"""
+    imgsz = next((size for limit, size in sizes if density <= limit), sizes[-1][1])
+    # Upscaling a small source gains nothing, so cap at its longer side rounded up to a multiple of 32
+    return max(min(size for _, size in sizes), min(imgsz, -(-max(width, height) // 32) * 32))
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Detect fruit in every image under a folder and save the results for a user
+
+Images are detected concurrently and, with --workers, on a pool of model
+processes. Results are committed in chunks like uploads through the web
+form, with Upload, Detection and rollup rows. Progress is checkpointed, so
+running the same command again after an interruption resumes where it stopped.
+
+Usage:
+    python ingest_folder.py data/harvest_2024 --user alice
+    python ingest_folder.py data/harvest_2024 --user alice --workers 4 --copy
+"""
+
+import argparse
+import hashlib
+import logging
+import os
+import sys
+
+from werkzeug.utils import secure_filename
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from bulk_ingest import Checkpoint, find_images, images_per_second, ingest
+
+
+def stored_image_path(path, copy):
+    """Upload.image_path for a source image: its absolute path, or with copy the processed_ name its
+    copy in the blob store is served under, derived from the path so a resumed run finds it again"""
+    if not copy:
+        return path
+    digest = hashlib.sha1(path.encode('utf-8')).hexdigest()[:12]
+    return f"processed_ingest_{digest}_{secure_filename(os.path.basename(path))}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('folder', help='Folder searched recursively for images')
+    parser.add_argument('--user', required=True, help='Username the detections are saved for')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help='Model processes; 0 runs the model in this process')
+    parser.add_argument('--threads', type=int, default=0,
+                        help='Images read and decoded concurrently; 0 keeps every worker batch full')
+    parser.add_argument('--chunk-size', type=int, default=64, help='Images per database commit')
+    parser.add_argument('--checkpoint', default=None,
+                        help='Progress file, by default in the instance folder, named after the folder and user')
+    parser.add_argument('--copy', action='store_true',
+                        help='Copy images into the upload blob store so history pages can show them')
+    parser.add_argument('--retry-failed', action='store_true', help='Run images that failed last time again')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    # The app is imported here so --help stays fast and the worker count is set before the model loads
+    import app as web
+
+    web.app.config['INFERENCE_WORKERS'] = args.workers
+    web.ensure_database()
+    with web.app.app_context():
+        user = web.User.query.filter_by(username=args.user).first()
+        if user is None:
+            parser.error(f"No user named {args.user}")
+        user_id = user.id
+        params = web.user_inference_params(user)
+    if web.get_inference_backend() is None:
+        sys.exit("Could not load the model")
+
+    folder = os.path.abspath(args.folder)
+    paths = find_images(folder)
+    stored = {path: stored_image_path(path, args.copy) for path in paths}
+    checkpoint_path = args.checkpoint or os.path.join(
+        web.app.instance_path, f"ingest_{hashlib.sha1(folder.encode('utf-8')).hexdigest()[:12]}_{user_id}.jsonl")
+    os.makedirs(os.path.dirname(checkpoint_path) or '.', exist_ok=True)
+    checkpoint = Checkpoint(checkpoint_path)
+    with web.app.app_context():
+        # Uploads committed just before an interruption may be missing from the checkpoint
+        saved = {row.image_path for row in web.db.session.query(web.Upload.image_path).filter(
+            web.Upload.user_id == user_id)}
+    skip = [path for path in paths if stored[path] in saved]
+
+    blobs = {}
+
+    def detect(path):
+        detections, inference_ms = web.detect_fruit_timed(path, params)
+        if args.copy:
+            blobs[path] = web.get_blob_store().put_file(path)
+        return detections, inference_ms
+
+    def save(results):
+        with web.app.app_context():
+            for path, detections, inference_ms in results:
+                blob = blobs.pop(path, None)
+                web.add_upload(user_id, stored[path], detections, inference_ms, blob and blob.path, blob and blob.size)
+            web.db.session.commit()
+
+    def report(stats):
+        done = stats.skipped + stats.processed + stats.failed
+        print(f"{done}/{stats.images} images ({stats.failed} failed), {stats.detections} detections, "
+              f"{images_per_second(stats):.1f} images/s", flush=True)
+
+    threads = args.threads or max(1, args.workers) * web.app.config['INFERENCE_MAX_BATCH_SIZE']
+    finished = checkpoint.finished(args.retry_failed) | set(skip)
+    print(f"{len(paths)} images in {folder}, {sum(path in finished for path in paths)} already done; "
+          f"checkpoint {checkpoint_path}")
+    stats = ingest(paths, detect, save, checkpoint, skip=skip, num_threads=threads, chunk_size=args.chunk_size,
+                   retry_failed=args.retry_failed, report=report)
+    print(f"Ingested {stats.processed} images with {stats.detections} detections in {stats.seconds:.1f} s "
+          f"({images_per_second(stats):.1f} images/s); {stats.failed} failed, {stats.skipped} skipped")
+
+
+if __name__ == '__main__':
+    main()
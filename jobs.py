@@ -0,0 +1,160 @@
+"""
+Background job runner for asynchronous detection
+Jobs live in a database table, so queued work survives restarts
+"""
+
+import logging
+import threading
+from datetime import datetime, timedelta
+
+from sqlalchemy import and_, func, or_
+
+
+class JobRunner:
+    """Pool of worker threads that claim pending jobs from a table and run them"""
+
+    def __init__(self, app, db, job_model, handler, num_workers=2, poll_interval=1.0, max_attempts=3, lease_seconds=60):
+        """
+        Args:
+            app: Flask app, used to push an app context per job
+            db: Flask-SQLAlchemy extension
+            job_model: Model with id, status, result, error, attempts, created_at, started_at, heartbeat_at, finished_at
+            handler: Callable(job) returning a JSON-serialisable result. Rows it adds to
+                db.session are committed together with the job's completion.
+            num_workers: Number of worker threads
+            poll_interval: Seconds an idle worker sleeps before checking for new jobs
+            max_attempts: Jobs interrupted this many times are marked failed instead of retried
+            lease_seconds: A running job whose heartbeat is older than this is taken to be abandoned by a
+                process that died, and is claimed again. Runners renew the heartbeat of their jobs well
+                within the lease, so jobs still running in a sibling process are never taken over.
+        """
+        self.app = app
+        self.db = db
+        self.job_model = job_model
+        self.handler = handler
+        self.num_workers = num_workers
+        self.poll_interval = poll_interval
+        self.max_attempts = max_attempts
+        self.lease_seconds = lease_seconds
+        self._active = set()  # ids of the jobs this runner's workers are running
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+        self._threads = []
+        self._lock = threading.Lock()
+
+    @property
+    def running(self):
+        return bool(self._threads)
+
+    def start(self):
+        """Start the workers and the heartbeat thread. Jobs left running by a process that died are
+        claimed again once their lease expires."""
+        with self._lock:
+            if self._threads:
+                return
+            self._stop.clear()
+            for i in range(self.num_workers):
+                thread = threading.Thread(target=self._work, name=f"job-worker-{i}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+            thread = threading.Thread(target=self._heartbeat, name='job-heartbeat', daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self, wait=True):
+        """Stop the workers after their current job"""
+        with self._lock:
+            threads, self._threads = self._threads, []
+            self._stop.set()
+            self._wakeup.set()
+        if wait:
+            for thread in threads:
+                thread.join()
+
+    def notify(self):
+        """Wake idle workers after a job was queued"""
+        self._wakeup.set()
+
+    def _claimable(self, now):
+        """Pending jobs, and running jobs whose lease has expired; jobs from before heartbeats count from started_at"""
+        Job = self.job_model
+        last_seen = func.coalesce(Job.heartbeat_at, Job.started_at)
+        expired = and_(Job.status == 'running',
+                       or_(last_seen.is_(None), last_seen < now - timedelta(seconds=self.lease_seconds)))
+        return or_(Job.status == 'pending', expired)
+
+    def _claim(self):
+        """Atomically move the oldest claimable job to running. Returns its id or None."""
+        Job = self.job_model
+        while True:
+            now = datetime.utcnow()
+            job_id = self.db.session.query(Job.id).filter(self._claimable(now)).order_by(Job.created_at).limit(1).scalar()
+            if job_id is None:
+                return None
+            # Conditional update so two workers cannot claim the same job
+            claimed = Job.query.filter(Job.id == job_id, self._claimable(now)).update({
+                'status': 'running',
+                'started_at': now,
+                'heartbeat_at': now,
+                'attempts': Job.attempts + 1
+            }, synchronize_session=False)
+            self.db.session.commit()
+            if claimed:
+                with self._lock:
+                    self._active.add(job_id)
+                return job_id
+
+    def _heartbeat(self):
+        """Renew the lease of this runner's running jobs a few times per lease period"""
+        Job = self.job_model
+        while not self._stop.wait(self.lease_seconds / 4):
+            with self._lock:
+                active = list(self._active)
+            if not active:
+                continue
+            try:
+                with self.app.app_context():
+                    Job.query.filter(Job.id.in_(active), Job.status == 'running').update(
+                        {'heartbeat_at': datetime.utcnow()}, synchronize_session=False)
+                    self.db.session.commit()
+            except Exception as e:
+                logging.error(f"Error renewing detection job leases: {str(e)}")
+
+    def _work(self):
+        while not self._stop.is_set():
+            try:
+                with self.app.app_context():
+                    job_id = self._claim()
+                    if job_id is not None:
+                        try:
+                            self._run(job_id)
+                        finally:
+                            with self._lock:
+                                self._active.discard(job_id)
+                        continue
+            except Exception as e:
+                logging.error(f"Error in job worker: {str(e)}")
+            self._wakeup.wait(self.poll_interval)
+            self._wakeup.clear()
+
+    def _run(self, job_id):
+        job = self.db.session.get(self.job_model, job_id)
+        if job.attempts > self.max_attempts:
+            self._finish(job, 'failed', error='Job was interrupted too many times')
+            return
+        try:
+            result = self.handler(job)
+        except Exception as e:
+            self.db.session.rollback()
+            logging.error(f"Detection job {job_id} failed: {str(e)}")
+            job = self.db.session.get(self.job_model, job_id)
+            self._finish(job, 'failed', error=str(e))
+            return
+        self._finish(job, 'done', result=result)
+
+    def _finish(self, job, status, result=None, error=None):
+        job.status = status
+        job.result = result
+        job.error = error[:255] if error else None
+        job.finished_at = datetime.utcnow()
+        self.db.session.commit()
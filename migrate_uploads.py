@@ -0,0 +1,15 @@
+import argparse
+
+from app import app, ensure_database, migrate_upload_files
+
+# Moves uploads saved flat in static/uploads by older versions into the content-addressed
+# blob store and records their blob paths. Uploads already in the store are left alone.
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Move flat upload files into the blob store')
+    parser.add_argument('--keep', action='store_true', help='Keep the flat files after moving them')
+    args = parser.parse_args()
+    # Adds the blob_path columns to older databases
+    ensure_database()
+    with app.app_context():
+        print(f"Moved {migrate_upload_files(remove=not args.keep)} uploads into {app.config['BLOB_FOLDER']}")
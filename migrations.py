@@ -0,0 +1,74 @@
+"""
+Schema upgrades for existing databases
+db.create_all() only creates missing tables, so older mangosteen.db files
+are brought up to date with the current models here
+"""
+
+import logging
+
+from sqlalchemy import inspect, text
+
+# Indexes that earlier versions created and the models no longer declare, by table
+RETIRED_INDEXES = {
+    # Replaced by the single-column upload.image_path index when annotated images moved to on-demand rendering
+    'upload': ['ix_upload_user_image_path'],
+}
+
+
+def add_missing_columns(db):
+    """Add model columns that existing tables lack. Added columns are nullable. Returns their 'table.column' names."""
+    inspector = inspect(db.engine)
+    added = []
+    for table in db.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        existing = {column['name'] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in existing:
+                continue
+            logging.info(f"Adding column {column.name} to {table.name}")
+            column_type = column.type.compile(dialect=db.engine.dialect)
+            with db.engine.begin() as connection:
+                connection.execute(text(f'ALTER TABLE "{table.name}" ADD COLUMN "{column.name}" {column_type}'))
+            added.append(f"{table.name}.{column.name}")
+    return added
+
+
+def create_missing_indexes(db):
+    """Create indexes declared on the models that the database does not have yet. Returns their names."""
+    inspector = inspect(db.engine)
+    created = []
+    for table in db.metadata.sorted_tables:
+        existing = {index['name'] for index in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name not in existing:
+                logging.info(f"Creating index {index.name} on {table.name}")
+                index.create(bind=db.engine)
+                created.append(index.name)
+    return created
+
+
+def drop_retired_indexes(db, retired_indexes=RETIRED_INDEXES):
+    """Drop indexes of {table: [index names]} that the database still has, unless a model declares them again. Returns their names."""
+    inspector = inspect(db.engine)
+    dropped = []
+    for table in db.metadata.sorted_tables:
+        if table.name not in retired_indexes or not inspector.has_table(table.name):
+            continue
+        existing = {index['name'] for index in inspector.get_indexes(table.name)}
+        declared = {index.name for index in table.indexes}
+        for name in retired_indexes[table.name]:
+            if name in existing and name not in declared:
+                logging.info(f"Dropping index {name} on {table.name}")
+                with db.engine.begin() as connection:
+                    connection.execute(text(f'DROP INDEX "{name}"'))
+                dropped.append(name)
+    return dropped
+
+
+def upgrade_schema(db, retired_indexes=RETIRED_INDEXES):
+    """Create missing tables, columns and indexes and drop retired indexes. Safe to run on every startup. Returns the list of changes made."""
+    db.create_all()
+    changes = [f"column {name}" for name in add_missing_columns(db)]
+    changes += [f"dropped index {name}" for name in drop_retired_indexes(db, retired_indexes)]
+    return changes + [f"index {name}" for name in create_missing_indexes(db)]
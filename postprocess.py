@@ -0,0 +1,87 @@
+"""
+Vectorized post-processing of model detections
+Turns a backend's box, score and class arrays into detect_fruit's detection
+dictionaries with array operations on the whole result instead of per-box work
+"""
+
+from collections import namedtuple
+
+import numpy as np
+
+from tiling import overlap_matrix
+
+# Per-class lookup arrays indexed by class id, built once when the model loads
+ClassTable = namedtuple('ClassTable', ['fruit_types', 'ripeness', 'is_mangosteen'])
+
+
+def parse_class_name(class_name):
+    """Split a model class name such as 'mangosteen_ripe' into ('Mangosteen', 'ripe')"""
+    if '_' in class_name:
+        fruit_name, ripeness = class_name.split('_', 1)
+        return fruit_name.strip().title(), ripeness.lower().strip()
+    ripeness = 'unknown'
+    if 'unripe' in class_name.lower():
+        ripeness = 'unripe'
+    elif 'ripe' in class_name.lower():
+        ripeness = 'ripe'
+    return class_name.strip().title(), ripeness
+
+
+def build_class_table(names):
+    """ClassTable for a model's {class_id: name} mapping"""
+    size = max(names) + 1 if names else 0
+    fruit_types = np.full(size, 'Unknown', dtype=object)
+    ripeness = np.full(size, 'unknown', dtype=object)
+    for class_id, class_name in names.items():
+        fruit_types[class_id], ripeness[class_id] = parse_class_name(class_name)
+    is_mangosteen = np.array([fruit.lower() == 'mangosteen' for fruit in fruit_types], dtype=bool)
+    return ClassTable(fruit_types, ripeness, is_mangosteen)
+
+
+def summarize_result(result, table, threshold, scale=1.0, duplicate_iou=1.0):
+    """
+    Detection dictionaries for one BackendResult
+
+    Args:
+        result: BackendResult with boxes in model-input pixels
+        table: ClassTable from build_class_table
+        threshold: Minimum confidence kept
+        scale: Factor mapping result boxes to original-image pixels
+        duplicate_iou: IoU above which a lower-scoring box of any class is dropped as a duplicate;
+            1 drops only boxes with exactly the same pixel coordinates
+
+    Returns:
+        List of {'fruit_type', 'ripeness', 'confidence', 'is_mangosteen', 'class_id', 'box'}, highest confidence first
+    """
+    scores = np.asarray(result.scores, dtype=np.float32)
+    order = np.argsort(-scores, kind='stable')
+    order = order[scores[order] >= threshold]
+    if not len(order):
+        return []
+    # Truncate like int() did per coordinate; boxes are clipped to the image so they are never negative
+    boxes = (np.asarray(result.boxes, dtype=np.float32)[order] * scale).astype(np.int64)
+    class_ids = np.asarray(result.class_ids, dtype=int)[order]
+    scores = scores[order]
+    if duplicate_iou >= 1:
+        # Exact duplicates only: the first, highest-scoring, occurrence of each box. Packing the
+        # coordinates into one int64 key is much faster than np.unique over rows
+        if boxes.max() < 1 << 16:
+            keys = (boxes[:, 0] << 48) | (boxes[:, 1] << 32) | (boxes[:, 2] << 16) | boxes[:, 3]
+            _, first = np.unique(keys, return_index=True)
+        else:
+            _, first = np.unique(boxes, axis=0, return_index=True)
+        keep = np.sort(first)
+    else:
+        # Drop every box overlapping a higher-scoring one in a single matrix pass. Unlike greedy NMS a dropped
+        # box still suppresses, which for near-identical duplicates gives the same answer without a Python loop
+        overlaps = overlap_matrix(boxes.astype(np.float32), boxes.astype(np.float32), metric='iou')
+        keep = ~np.triu(overlaps > duplicate_iou, k=1).any(axis=0)
+    boxes, class_ids, scores = boxes[keep], class_ids[keep], scores[keep]
+    return [
+        {'fruit_type': fruit_type, 'ripeness': ripeness, 'confidence': confidence,
+         'is_mangosteen': is_mangosteen, 'class_id': class_id, 'box': box}
+        for fruit_type, ripeness, confidence, is_mangosteen, class_id, box in zip(
+            table.fruit_types[class_ids].tolist(), table.ripeness[class_ids].tolist(), scores.tolist(),
+            table.is_mangosteen[class_ids].tolist(), class_ids.tolist(), boxes.tolist())
+    ]
+
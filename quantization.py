@@ -0,0 +1,154 @@
+"""
+INT8 quantization of the exported ONNX model
+Calibrates on a folder of sample images and compares the quantized model's
+detections against the fp32 model to gate rollout
+"""
+
+import logging
+import os
+import re
+from collections import defaultdict
+
+import cv2
+import numpy as np
+
+from inference_backends import letterbox
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.gif')
+
+
+def list_images(folder):
+    """Sorted paths of the images directly inside folder"""
+    return sorted(os.path.join(folder, name) for name in os.listdir(folder)
+                  if name.lower().endswith(IMAGE_EXTENSIONS))
+
+
+def load_images(paths):
+    """Decode image files to BGR arrays, skipping unreadable ones"""
+    images = []
+    for path in paths:
+        image = cv2.imread(path)
+        if image is None:
+            logging.warning(f"Skipping unreadable image {path}")
+            continue
+        images.append(image)
+    return images
+
+
+def head_node_names(model):
+    """Names of the nodes in the last '/model.N/' layer, the YOLOv8 Detect head"""
+    layers = defaultdict(list)
+    for node in model.graph.node:
+        match = re.match(r'/model\.(\d+)/', node.name)
+        if match:
+            layers[int(match.group(1))].append(node.name)
+    return layers[max(layers)] if layers else []
+
+
+def quantize_model(model_path, output_path, calibration_folder=None, method='static', imgsz=640,
+                   max_images=200, exclude_head=True):
+    """
+    Write an INT8 copy of an exported ONNX model
+
+    Args:
+        model_path: fp32 ONNX model from export_onnx.py
+        output_path: Where to write the quantized model
+        calibration_folder: Sample images for static quantization's activation ranges
+        method: 'static' (weights and activations, calibrated) or 'dynamic' (weights only)
+        imgsz: Model input size used for calibration
+        max_images: Most calibration images used
+        exclude_head: Keep the Detect head in fp32; quantizing its box regression costs the most accuracy
+    """
+    import onnx
+    from onnxruntime.quantization import (CalibrationDataReader, QuantFormat, QuantType,
+                                          quantize_dynamic, quantize_static)
+
+    nodes_to_exclude = head_node_names(onnx.load(model_path)) if exclude_head else []
+    if method == 'dynamic':
+        quantize_dynamic(model_path, output_path, weight_type=QuantType.QUInt8, nodes_to_exclude=nodes_to_exclude)
+        return output_path
+    if method != 'static':
+        raise ValueError(f"Unknown quantization method '{method}'. Choose 'static' or 'dynamic'")
+    if not calibration_folder:
+        raise ValueError("Static quantization needs a folder of calibration images")
+
+    paths = list_images(calibration_folder)[:max_images]
+    if not paths:
+        raise ValueError(f"No calibration images found in {calibration_folder}")
+    input_name = onnx.load(model_path).graph.input[0].name
+
+    class ImageFolderReader(CalibrationDataReader):
+        """Feeds letterboxed calibration images to the calibrator one at a time"""
+
+        def __init__(self):
+            self._images = iter(paths)
+
+        def get_next(self):
+            for path in self._images:
+                image = cv2.imread(path)
+                if image is not None:
+                    return {input_name: letterbox(image, imgsz)[0][None]}
+            return None
+
+    logging.info(f"Calibrating on {len(paths)} images from {calibration_folder}")
+    quantize_static(model_path, output_path, ImageFolderReader(), quant_format=QuantFormat.QDQ,
+                    activation_type=QuantType.QUInt8, weight_type=QuantType.QInt8, per_channel=True,
+                    nodes_to_exclude=nodes_to_exclude)
+    return output_path
+
+
+def box_iou(box, boxes):
+    """IoU of one xyxy box against an Nx4 array of boxes"""
+    top_left = np.maximum(box[:2], boxes[:, :2])
+    bottom_right = np.minimum(box[2:], boxes[:, 2:])
+    intersection = np.prod((bottom_right - top_left).clip(0), axis=1)
+    areas = (boxes[:, 2] - boxes[:, 0]) * (boxes[:, 3] - boxes[:, 1])
+    return intersection / ((box[2] - box[0]) * (box[3] - box[1]) + areas - intersection + 1e-9)
+
+
+def match_detections(reference, candidate, iou=0.5):
+    """Greedily pair reference and candidate detections of the same class, best reference score first.
+    Returns (reference_index, candidate_index) pairs."""
+    pairs = []
+    unmatched = np.ones(len(candidate.boxes), dtype=bool)
+    for i in np.argsort(-reference.scores):
+        options = np.flatnonzero(unmatched & (candidate.class_ids == reference.class_ids[i]))
+        if not len(options):
+            continue
+        overlaps = box_iou(reference.boxes[i], candidate.boxes[options])
+        best = overlaps.argmax()
+        if overlaps[best] >= iou:
+            pairs.append((int(i), int(options[best])))
+            unmatched[options[best]] = False
+    return pairs
+
+
+def compare_results(reference_results, candidate_results, names, iou=0.5):
+    """
+    Per-class comparison of candidate detections against reference detections over the same images
+
+    Returns:
+        Dictionary of class name -> {'reference', 'candidate', 'matched', 'recall', 'confidence_delta'}
+        where recall is the share of reference detections the candidate also found and
+        confidence_delta the mean candidate minus reference score over matched pairs
+    """
+    totals = defaultdict(lambda: {'reference': 0, 'candidate': 0, 'matched': 0, 'delta_sum': 0.0})
+    for reference, candidate in zip(reference_results, candidate_results):
+        for class_id in reference.class_ids:
+            totals[names[class_id]]['reference'] += 1
+        for class_id in candidate.class_ids:
+            totals[names[class_id]]['candidate'] += 1
+        for i, j in match_detections(reference, candidate, iou):
+            stats = totals[names[reference.class_ids[i]]]
+            stats['matched'] += 1
+            stats['delta_sum'] += float(candidate.scores[j] - reference.scores[i])
+    comparison = {}
+    for name, stats in sorted(totals.items()):
+        comparison[name] = {
+            'reference': stats['reference'],
+            'candidate': stats['candidate'],
+            'matched': stats['matched'],
+            'recall': stats['matched'] / stats['reference'] if stats['reference'] else 1.0,
+            'confidence_delta': stats['delta_sum'] / stats['matched'] if stats['matched'] else 0.0
+        }
+    return comparison
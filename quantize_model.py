@@ -0,0 +1,22 @@
+import argparse
+import logging
+
+from quantization import quantize_model
+
+# Writes an INT8 copy of model/best.onnx for INFERENCE_BACKEND=onnx-int8.
+# Run export_onnx.py first, then check the result with evaluate_quantized.py.
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Quantize model/best.onnx to INT8")
+    parser.add_argument('--calibration', help='Folder of sample images for static quantization')
+    parser.add_argument('--model', default='model/best.onnx')
+    parser.add_argument('--output', default='model/best.int8.onnx')
+    parser.add_argument('--method', choices=['static', 'dynamic'], default='static')
+    parser.add_argument('--imgsz', type=int, default=640)
+    parser.add_argument('--max-images', type=int, default=200)
+    parser.add_argument('--quantize-head', action='store_true', help='Also quantize the Detect head')
+    args = parser.parse_args()
+    path = quantize_model(args.model, args.output, args.calibration, method=args.method, imgsz=args.imgsz,
+                          max_images=args.max_images, exclude_head=not args.quantize_head)
+    print(f"Wrote {path}")
@@ -0,0 +1,10 @@
+from app import app, ensure_database, rebuild_rollups
+
+# Recomputes the per-user daily DetectionRollup rows from the Detection table.
+# Run after importing detections outside the app or if the rollups drift.
+
+if __name__ == "__main__":
+    # Creates the detection_rollup table in databases from before the rollups
+    ensure_database()
+    with app.app_context():
+        print(f"Rebuilt {rebuild_rollups()} detection rollup rows")
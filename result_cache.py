@@ -0,0 +1,211 @@
+"""
+Content-hash result cache for fruit detection
+Repeat uploads of the same image skip inference and reuse the stored results
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+from collections import OrderedDict
+
+
+def make_cache_key(data, model_version, threshold, variant=None):
+    """Build a cache key from the image bytes, model version, confidence threshold and
+    inference variant (e.g. 'tiled'); None keeps the keys of plain full-frame inference"""
+    digest = hashlib.sha256(data).hexdigest()
+    key = f"{digest}:{model_version}:{threshold}" if variant is None else f"{digest}:{model_version}:{threshold}:{variant}"
+    return hashlib.sha256(key.encode()).hexdigest()
+
+
+def file_sha256(path, chunk_size=1024 * 1024):
+    """Hash a file without reading it into memory at once"""
+    sha = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            sha.update(chunk)
+    return sha.hexdigest()
+
+
+class MemoryLRU:
+    """In-memory LRU tier bounded by total entry size in bytes"""
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    def put(self, key, value, size):
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self.current_bytes -= self._entries.pop(key)[1]
+            self._entries[key] = (value, size)
+            self.current_bytes += size
+            while self.current_bytes > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self.current_bytes -= evicted_size
+                self.evictions += 1
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class DiskCache:
+    """On-disk tier of key -> bytes files bounded by total size, evicting least recently used"""
+
+    def __init__(self, folder, max_bytes, suffix=''):
+        self.folder = folder
+        self.max_bytes = max_bytes
+        self.suffix = suffix
+        self.current_bytes = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        os.makedirs(folder, exist_ok=True)
+        self._load_index()
+
+    def _load_index(self):
+        """Rebuild the LRU order from file modification times"""
+        files = []
+        for entry in os.scandir(self.folder):
+            if entry.is_file() and entry.name.endswith(self.suffix) and not entry.name.endswith('.tmp'):
+                stat = entry.stat()
+                files.append((stat.st_mtime, entry.name, stat.st_size))
+        for _, name, size in sorted(files):
+            self._entries[name] = size
+            self.current_bytes += size
+
+    def path_for(self, key):
+        return os.path.join(self.folder, f"{key}{self.suffix}")
+
+    def get(self, key):
+        """Return the stored bytes for key, or None"""
+        name = f"{key}{self.suffix}"
+        with self._lock:
+            if name not in self._entries:
+                return None
+            self._entries.move_to_end(name)
+        try:
+            with open(self.path_for(key), 'rb') as f:
+                data = f.read()
+            os.utime(self.path_for(key))
+            return data
+        except OSError:
+            with self._lock:
+                self.current_bytes -= self._entries.pop(name, 0)
+            return None
+
+    def contains(self, key):
+        with self._lock:
+            return f"{key}{self.suffix}" in self._entries
+
+    def put(self, key, data):
+        """Store bytes for key, writing atomically and evicting old entries past max_bytes"""
+        if len(data) > self.max_bytes:
+            return
+        name = f"{key}{self.suffix}"
+        path = self.path_for(key)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+        with self._lock:
+            self.current_bytes -= self._entries.pop(name, 0)
+            self._entries[name] = len(data)
+            self.current_bytes += len(data)
+            evicted = []
+            while self.current_bytes > self.max_bytes:
+                evicted_name, evicted_size = self._entries.popitem(last=False)
+                self.current_bytes -= evicted_size
+                self.evictions += 1
+                evicted.append(evicted_name)
+        for evicted_name in evicted:
+            try:
+                os.remove(os.path.join(self.folder, evicted_name))
+            except OSError as e:
+                logging.warning(f"Could not remove evicted cache file {evicted_name}: {str(e)}")
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class ResultCache:
+    """Two-tier (memory LRU + disk) cache of detection summaries"""
+
+    def __init__(self, folder, memory_max_bytes=64 * 1024 * 1024, disk_max_bytes=1024 * 1024 * 1024):
+        self.memory = MemoryLRU(memory_max_bytes)
+        self.disk = DiskCache(folder, disk_max_bytes, suffix='.entry')
+        self._lock = threading.Lock()
+        self._counters = {'memory_hits': 0, 'disk_hits': 0, 'misses': 0, 'stores': 0}
+
+    @staticmethod
+    def _encode(detections):
+        # Layout: 8-byte header length, then the JSON header
+        header = json.dumps({'detections': detections}).encode()
+        return len(header).to_bytes(8, 'big') + header
+
+    @staticmethod
+    def _decode(data):
+        # Entries written by older versions are followed by an annotated image, which is skipped
+        header_len = int.from_bytes(data[:8], 'big')
+        header = json.loads(data[8:8 + header_len])
+        return {'detections': header['detections']}
+
+    def _count(self, counter):
+        with self._lock:
+            self._counters[counter] += 1
+
+    def get(self, key):
+        """Return {'detections'} for key from memory, then disk, or None on a miss"""
+        entry = self.memory.get(key)
+        if entry is not None:
+            self._count('memory_hits')
+            return entry
+        data = self.disk.get(key)
+        if data is not None:
+            entry = self._decode(data)
+            self.memory.put(key, entry, len(data))
+            self._count('disk_hits')
+            return entry
+        self._count('misses')
+        return None
+
+    def put(self, key, detections):
+        """Store the detections summary in both tiers"""
+        data = self._encode(detections)
+        entry = {'detections': detections}
+        self.memory.put(key, entry, len(data))
+        try:
+            self.disk.put(key, data)
+        except OSError as e:
+            logging.warning(f"Could not write result cache entry: {str(e)}")
+        self._count('stores')
+
+    def stats(self):
+        """Return hit/miss/eviction counters and current tier sizes"""
+        with self._lock:
+            stats = dict(self._counters)
+        lookups = stats['memory_hits'] + stats['disk_hits'] + stats['misses']
+        stats['hit_rate'] = (stats['memory_hits'] + stats['disk_hits']) / lookups if lookups else 0.0
+        stats.update({
+            'memory_entries': len(self.memory),
+            'memory_bytes': self.memory.current_bytes,
+            'memory_evictions': self.memory.evictions,
+            'disk_entries': len(self.disk),
+            'disk_bytes': self.disk.current_bytes,
+            'disk_evictions': self.disk.evictions
+        })
+        return stats
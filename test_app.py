@@ -0,0 +1,568 @@
+#!/usr/bin/env python3
+"""
+Test script for the web app's routes and database helpers
+"""
+
+import sys
+import os
+import atexit
+import shutil
+import tempfile
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from io import BytesIO
+
+# Add the current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+# Never the real database; under pytest, conftest.py has already chosen one
+TEST_FOLDER = tempfile.mkdtemp(prefix='fruit_tests_')
+atexit.register(shutil.rmtree, TEST_FOLDER, True)
+os.environ.setdefault('DATABASE_URL', f"sqlite:///{os.path.join(TEST_FOLDER, 'test.db')}")
+
+import app as web
+from flask import get_flashed_messages, template_rendered
+import numpy as np
+from PIL import Image
+from sqlalchemy import event, text
+
+from inference_backends import BackendResult
+from postprocess import build_class_table
+
+# The templates are not needed to test the routes' data; minimal stand-ins keep error pages renderable
+TEMPLATES = ('404.html', '500.html', 'login.html', 'detect.html', 'result.html', 'history.html', 'dashboard.html')
+template_folder = os.path.join(TEST_FOLDER, 'templates')
+os.makedirs(template_folder, exist_ok=True)
+for name in TEMPLATES:
+    with open(os.path.join(template_folder, name), 'w') as f:
+        f.write(name)
+web.app.template_folder = template_folder
+
+
+def reset_app():
+    """Empty every table and give uploads and caches fresh folders. Returns the upload folder."""
+    folder = tempfile.mkdtemp(dir=TEST_FOLDER)
+    web.app.config.update(
+        UPLOAD_FOLDER=folder,
+        BLOB_FOLDER=os.path.join(folder, 'blobs'),
+        ANNOTATED_CACHE_FOLDER=os.path.join(folder, 'annotated'),
+        RESULT_CACHE_FOLDER=os.path.join(folder, 'result_cache')
+    )
+    web.blob_store = web.annotated_cache = web.result_cache = None
+    web.image_counts.clear()
+    web.ensure_database()
+    with web.app.app_context():
+        for table in reversed(web.db.metadata.sorted_tables):
+            web.db.session.execute(table.delete())
+        web.db.session.commit()
+    return folder
+
+
+def add_user(username):
+    with web.app.app_context():
+        user = web.User(username=username)
+        user.set_password('secret')
+        web.db.session.add(user)
+        web.db.session.commit()
+        return user.id
+
+
+def login(username):
+    """Test client logged in as username"""
+    client = web.app.test_client()
+    response = client.post('/login', data={'username': username, 'password': 'secret'})
+    assert response.status_code == 302, response.status_code
+    return client
+
+
+@contextmanager
+def rendered_contexts():
+    """List that collects the context of every template rendered inside the block"""
+    contexts = []
+
+    def record(sender, template, context, **extra):
+        contexts.append(context)
+    template_rendered.connect(record, web.app)
+    try:
+        yield contexts
+    finally:
+        template_rendered.disconnect(record, web.app)
+
+
+class StubBackend:
+    """Inference backend whose detections are spelled out by the image: its first pixel's blue value is the
+    number of ripe fruit and its green value the number of unripe fruit"""
+
+    name = 'stub'
+    names = {0: 'mangosteen_ripe', 1: 'mangosteen_unripe'}
+
+    def __init__(self):
+        self.calls = []
+
+    def predict(self, images, **params):
+        self.calls.append((len(images), params))
+        results = []
+        for image in images:
+            class_ids = [0] * int(image[0, 0, 0]) + [1] * int(image[0, 0, 1])
+            boxes = [[10 * i, 0, 10 * i + 8, 8] for i in range(len(class_ids))]
+            results.append(BackendResult(np.array(boxes, dtype=np.float32).reshape(-1, 4),
+                                         np.full(len(class_ids), 0.9, dtype=np.float32), np.array(class_ids, dtype=int)))
+        return results
+
+
+@contextmanager
+def stub_backend(backend):
+    """Run detections through backend instead of loading the model"""
+    web.inference_backend, web.model_version, web.class_table = backend, 'stub', build_class_table(backend.names)
+    try:
+        yield backend
+    finally:
+        web.inference_backend = web.model_version = web.class_table = None
+
+
+def encode_png(ripe, unripe, size=(96, 32)):
+    """PNG bytes that StubBackend reads as ripe and unripe fruit"""
+    buffer = BytesIO()
+    Image.new('RGB', size, (0, unripe, ripe)).save(buffer, format='PNG')
+    return buffer.getvalue()
+
+
+def test_list_images_pages_through_own_uploads():
+    """/list_images needs a login, lists only the user's uploads, and its cursor walks every page once"""
+    reset_app()
+    alice, bob = add_user('alice'), add_user('bob')
+    start = datetime(2024, 5, 1, 12)
+    with web.app.app_context():
+        for i in range(23):
+            # Pairs of uploads share a timestamp, so pages also break ties on id
+            web.add_upload(alice, f"processed_2024_{i:02d}.jpg", [], file_size=100 + i,
+                           blob_path=f"ab/cd/{i}.jpg").created_at = start + timedelta(minutes=i // 2)
+        for i in range(5):
+            web.add_upload(bob, f"processed_bob_{i}.jpg", [])
+        # Ingested without a stored copy: not an image the app serves
+        web.add_upload(alice, '/data/harvest/raw.jpg', [])
+        web.db.session.commit()
+
+    assert web.app.test_client().get('/list_images').status_code == 302
+    client = login('alice')
+    names, cursor, pages = [], None, 0
+    while True:
+        page = client.get('/list_images', query_string={'limit': 5, **({'before': cursor} if cursor else {})}).get_json()
+        assert page['total'] == 23 and len(page['images']) <= 5
+        names += [image['name'] for image in page['images']]
+        pages += 1
+        cursor = page['next_cursor']
+        if cursor is None:
+            break
+    assert pages == 5
+    assert names == [f"2024_{i:02d}.jpg" for i in reversed(range(23))]
+    first = client.get('/list_images?limit=1').get_json()['images'][0]
+    assert first['size'] == 122 and first['url'] == '/uploads/2024_22.jpg'
+    assert first['processed_url'] == '/uploads/processed_2024_22.jpg' and 'owner' not in first
+
+    # Limits are clamped to 1..LIST_IMAGES_MAX_PAGE_SIZE
+    assert len(client.get('/list_images?limit=0').get_json()['images']) == 1
+    web.app.config['LIST_IMAGES_MAX_PAGE_SIZE'], max_page_size = 10, web.app.config['LIST_IMAGES_MAX_PAGE_SIZE']
+    try:
+        assert len(client.get('/list_images?limit=1000').get_json()['images']) == 10
+    finally:
+        web.app.config['LIST_IMAGES_MAX_PAGE_SIZE'] = max_page_size
+
+    # Bob sees only his own uploads, whatever he asks for
+    page = login('bob').get(f"/list_images?owner={alice}").get_json()
+    assert page['total'] == 5 and all(image['name'].startswith('bob_') for image in page['images'])
+    print("✓ /list_images pages through the user's own uploads")
+
+
+def test_list_images_prefix_and_cached_count():
+    """Prefixes select exactly the names starting with them; totals are reused until LIST_IMAGES_COUNT_TTL passes"""
+    reset_app()
+    alice = add_user('alice')
+    names = ['20240501_a.jpg', '20240501_b.jpg', '20240502_a.jpg', '2024050_x.jpg', '20240501~.jpg', '3.jpg']
+    with web.app.app_context():
+        for name in names:
+            web.add_upload(alice, f"processed_{name}", [])
+        web.db.session.commit()
+    client = login('alice')
+
+    def listed(prefix):
+        page = client.get('/list_images', query_string={'prefix': prefix}).get_json()
+        assert page['total'] == len(page['images'])
+        return sorted(image['name'] for image in page['images'])
+
+    for prefix in ('20240501', '20240501_', '2024050', '2024', '3', 'z', '20240501~'):
+        assert listed(prefix) == sorted(name for name in names if name.startswith(prefix)), prefix
+    low, high = web.prefix_bounds('ab' + chr(sys.maxunicode))
+    assert low < 'ab' + chr(sys.maxunicode) + 'z' < high and high == 'ac'
+
+    # A new upload shows up in the page at once, in the total once the cached count expires
+    with web.app.app_context():
+        web.add_upload(alice, 'processed_20240501_c.jpg', [])
+        web.db.session.commit()
+    page = client.get('/list_images?prefix=20240501').get_json()
+    assert len(page['images']) == 4 and page['total'] == 3
+    web.image_counts[(alice, '20240501')] = (0, page['total'])
+    assert client.get('/list_images?prefix=20240501').get_json()['total'] == 4
+    print("✓ /list_images prefixes and cached totals")
+
+
+def rollup_rows():
+    with web.app.app_context():
+        return {(r.user_id, r.day, r.fruit_type, r.ripeness): (r.count, round(r.confidence_sum, 6))
+                for r in web.DetectionRollup.query.all()}
+
+
+def test_incremental_rollups_match_a_rebuild():
+    """Rollup upserts made while saving uploads equal rollups recomputed from the Detection table"""
+    reset_app()
+    alice, bob = add_user('alice'), add_user('bob')
+    start = datetime(2024, 2, 28, 22)
+
+    def detection(i):
+        return {'fruit_type': 'Mangosteen' if i % 4 else 'Other', 'ripeness': ('ripe', 'unripe', 'unknown')[i % 3],
+                'confidence': 0.5 + i / 100, 'class_id': i % 3, 'box': [i, i, i + 10, i + 10]}
+
+    with web.app.app_context():
+        # Several batches touch the same (user, day, fruit, ripeness) keys, across midnight and month ends
+        for batch in range(6):
+            records = [web.UploadRecord(user, f"processed_{batch}_{i}.jpg", [detection(batch + i + j) for j in range(i % 4)],
+                                        10.0, start + timedelta(hours=5 * batch + i))
+                       for i in range(5) for user in (alice, bob)]
+            web.write_uploads(records)
+            web.db.session.commit()
+    incremental = rollup_rows()
+    assert len({key[1] for key in incremental}) == 3
+    with web.app.app_context():
+        web.rebuild_rollups()
+    assert rollup_rows() == incremental
+    print("✓ Incremental rollups match a rebuild")
+
+
+def test_rollup_summary_buckets_days():
+    """Each period counts the rollup days on or after its start; totals and breakdowns cover all time"""
+    reset_app()
+    alice, bob = add_user('alice'), add_user('bob')
+    today = datetime(2024, 3, 10).date()
+    with web.app.app_context():
+        rollups = {}
+        for days_ago, ripeness, count in ((0, 'ripe', 1), (1, 'unripe', 2), (6, 'ripe', 4), (7, 'ripe', 8),
+                                          (29, 'unripe', 16), (30, 'ripe', 32), (400, 'ripe', 64)):
+            rollups[(alice, today - timedelta(days=days_ago), 'Mangosteen', ripeness)] = (count, count * 0.5)
+        rollups[(bob, today, 'Mangosteen', 'ripe')] = (128, 64.0)
+        web.update_rollups(rollups)
+        web.db.session.commit()
+        summary = web.rollup_summary(alice, {'today': today, 'week': today - timedelta(days=6),
+                                             'month': today - timedelta(days=29)})
+    assert (summary['today'], summary['week'], summary['month'], summary['total']) == (1, 7, 31, 127)
+    assert summary['by_ripeness'] == {'ripe': 109, 'unripe': 18} and summary['by_fruit'] == {'Mangosteen': 127}
+    assert summary['confidence_sum'] == 63.5
+    print("✓ Rollup summaries bucket days by period")
+
+
+def test_rollup_upserts_need_on_conflict_support():
+    """Databases without INSERT ... ON CONFLICT fail with a clear error instead of SQLite-only SQL"""
+    table = web.DetectionRollup.__table__
+    assert web.upsert_insert(table, 'sqlite').on_conflict_do_update is not None
+    assert web.upsert_insert(table, 'postgresql').on_conflict_do_update is not None
+    try:
+        web.upsert_insert(table, 'mysql')
+        raise AssertionError("mysql upsert accepted")
+    except RuntimeError as e:
+        assert 'mysql' in str(e)
+    print("✓ Rollup upserts are chosen by database dialect")
+
+
+def test_parse_date_arg():
+    """Valid dates parse, end_of_day gives the next midnight, and invalid dates are flashed and ignored"""
+    with web.app.test_request_context():
+        assert web.parse_date_arg('2024-02-28') == datetime(2024, 2, 28)
+        assert web.parse_date_arg(' 2024-02-28 ', end_of_day=True) == datetime(2024, 2, 29)
+        assert web.parse_date_arg('2024-12-31', end_of_day=True) == datetime(2025, 1, 1)
+        assert web.parse_date_arg(None) is None and web.parse_date_arg('') is None
+        for invalid in ('2024-02-30', '28/02/2024', 'yesterday'):
+            assert web.parse_date_arg(invalid) is None
+        assert [message.split('"')[1] for message in get_flashed_messages()] == ['2024-02-30', '28/02/2024', 'yesterday']
+    print("✓ Date arguments parse and invalid ones are ignored")
+
+
+def test_parse_history_cursor():
+    """Cursors round-trip as (created_at, id); malformed ones are ignored"""
+    created_at = datetime(2024, 5, 1, 12, 30, 15, 250)
+    assert web.parse_history_cursor(f"{created_at.isoformat()}_42") == (created_at, 42)
+    for invalid in (None, '', '42', '2024-05-01T12:30:15_x', 'noon_42', '2024-05-01T12:30:15'):
+        assert web.parse_history_cursor(invalid) is None, invalid
+    print("✓ History cursors parse")
+
+
+def test_history_filter_conditions():
+    """Ripeness and inclusive date filters select the matching uploads"""
+    reset_app()
+    alice = add_user('alice')
+    fruit = {'fruit_type': 'Mangosteen', 'confidence': 0.9}
+    with web.app.app_context():
+        for day, ripeness in ((1, ['ripe']), (2, ['unripe']), (3, ['ripe', 'unripe']), (4, ['unknown']), (5, [])):
+            upload = web.add_upload(alice, f"processed_{day}.jpg", [dict(fruit, ripeness=r) for r in ripeness])
+            upload.created_at = datetime(2024, 3, day, 23, 59)
+        web.db.session.commit()
+
+    def matching(**args):
+        with web.app.test_request_context():
+            conditions = web.history_filter_conditions(args)
+            return sorted(upload.image_path for upload in web.Upload.query.filter(*conditions))
+
+    assert matching() == matching(ripeness='all') == [f"processed_{day}.jpg" for day in range(1, 6)]
+    assert matching(ripeness='ripe') == ['processed_1.jpg', 'processed_3.jpg']
+    assert matching(ripeness='unripe') == ['processed_2.jpg', 'processed_3.jpg']
+    assert matching(ripeness='unknown') == ['processed_4.jpg']
+    assert matching(date_from='2024-03-02', date_to='2024-03-03') == ['processed_2.jpg', 'processed_3.jpg']
+    assert matching(ripeness='ripe', date_to='2024-03-02') == ['processed_1.jpg']
+    assert len(matching(date_from='not-a-date')) == 5
+    print("✓ History filters select the matching uploads")
+
+
+def test_history_pages_with_cursor():
+    """/history pages walk the user's filtered uploads once each, with the cursor a range on the upload index"""
+    reset_app()
+    alice, bob = add_user('alice'), add_user('bob')
+    start = datetime(2024, 5, 1, 12)
+    with web.app.app_context():
+        for i in range(25):
+            ripeness = 'ripe' if i % 3 else 'unripe'
+            # Pairs of uploads share a timestamp, so pages also break ties on id
+            web.add_upload(alice, f"processed_{i:02d}.jpg", [{'fruit_type': 'Mangosteen', 'ripeness': ripeness,
+                                                            'confidence': 0.9}]).created_at = start + timedelta(minutes=i // 2)
+        web.add_upload(bob, 'processed_bob.jpg', [{'fruit_type': 'Mangosteen', 'ripeness': 'ripe', 'confidence': 0.9}])
+        web.db.session.commit()
+
+        query = web.history_uploads_query(alice, {'ripeness': 'ripe', 'before': f"{start.isoformat()}_5"})
+        statement = query.statement.compile(web.db.engine, compile_kwargs={'literal_binds': True})
+        plan = ' '.join(row[-1] for row in web.db.session.execute(text(f"EXPLAIN QUERY PLAN {statement}")))
+        assert 'USING INDEX ix_upload_user_created (user_id=? AND created_at<?)' in plan, plan
+        assert 'TEMP B-TREE' not in plan, plan
+
+    web.app.config['HISTORY_PAGE_SIZE'], page_size = 4, web.app.config['HISTORY_PAGE_SIZE']
+    try:
+        client = login('alice')
+        for args, expected in (({}, list(range(25))), ({'ripeness': 'ripe'}, [i for i in range(25) if i % 3])):
+            names, cursor = [], None
+            with rendered_contexts() as contexts:
+                while True:
+                    assert client.get('/history', query_string={**args, **({'before': cursor} if cursor else {})}).status_code == 200
+                    context = contexts[-1]
+                    assert len(context['uploads']) <= 4 and len(context['detections']) == len(context['uploads'])
+                    names += [upload.image_path for upload in context['uploads']]
+                    cursor = context['next_cursor']
+                    if cursor is None:
+                        break
+            assert names == [f"processed_{i:02d}.jpg" for i in reversed(expected)]
+    finally:
+        web.app.config['HISTORY_PAGE_SIZE'] = page_size
+    print("✓ /history pages through the user's uploads with its cursor")
+
+
+def test_annotated_images_are_rendered_on_demand_and_cached():
+    """processed_ images are drawn from the stored original and boxes on a cache miss, then served from the cache"""
+    reset_app()
+    alice = add_user('alice')
+    buffer = BytesIO()
+    Image.new('RGB', (64, 48), (255, 255, 255)).save(buffer, format='PNG')
+    original = buffer.getvalue()
+    buffer.seek(0)
+    blob = web.get_blob_store().put(buffer, '.png')
+    with web.app.app_context():
+        web.add_upload(alice, 'processed_orchard.png', [
+            {'fruit_type': 'Mangosteen', 'ripeness': 'unripe', 'confidence': 0.9, 'box': [20, 20, 40, 40]},
+            {'fruit_type': 'Mangosteen', 'ripeness': 'ripe', 'confidence': 0.8}
+        ], blob_path=blob.path, file_size=blob.size)
+        web.db.session.commit()
+
+    client = web.app.test_client()
+    assert client.get('/uploads/orchard.png').data == original
+    assert web.get_annotated_cache().get('processed_orchard.png') is None
+    response = client.get('/uploads/processed_orchard.png')
+    assert response.status_code == 200 and response.mimetype == 'image/png'
+    rendered = response.data
+    image = Image.open(BytesIO(rendered))
+    assert image.size == (64, 48)
+    # The unripe box is drawn in green; the detection without a box is skipped
+    assert image.getpixel((30, 40)) == (0, 200, 0) and image.getpixel((5, 45)) == (255, 255, 255)
+    assert web.get_annotated_cache().get('processed_orchard.png') == rendered
+
+    # Cache hits do not need the original
+    os.remove(web.get_blob_store().path(blob.path))
+    assert client.get('/uploads/processed_orchard.png').data == rendered
+    with web.app.app_context():
+        assert web.render_annotated_image('processed_orchard.png') == rendered
+        assert web.render_annotated_image('processed_unknown.png') is None
+
+    assert client.get('/uploads/processed_unknown.png').status_code == 404
+    assert client.get('/uploads/unknown.png').status_code == 404
+    print("✓ Annotated images are rendered on demand and cached")
+
+
+def test_detect_batch_reports_each_file_and_commits_once():
+    """/detect_batch returns per-file results and errors with aggregate totals, and saves every row in one commit"""
+    reset_app()
+    alice = add_user('alice')
+    client = login('alice')
+    commits = []
+
+    def record_commit(connection):
+        commits.append(connection)
+    with web.app.app_context():
+        engine = web.db.engine
+    with stub_backend(StubBackend()) as backend:
+        event.listen(engine, 'commit', record_commit)
+        try:
+            response = client.post('/detect_batch', data={'files': [
+                (BytesIO(encode_png(2, 1)), 'a.png'),
+                (BytesIO(b'not an image'), 'notes.txt'),
+                (BytesIO(encode_png(0, 3)), 'b.png'),
+                (BytesIO(encode_png(0, 0)), 'empty.png'),
+                (BytesIO(encode_png(1, 0)), 'c.PNG'),
+            ]}, content_type='multipart/form-data')
+        finally:
+            event.remove(engine, 'commit', record_commit)
+    assert response.status_code == 200
+    result = response.get_json()
+    assert [entry['filename'] for entry in result['images']] == ['a.png', 'notes.txt', 'b.png', 'empty.png', 'c.PNG']
+    a, notes, b, empty, c = result['images']
+    assert notes == {'filename': 'notes.txt', 'error': 'Invalid file type'}
+    assert 'No valid detections' in empty['error'] and 'detections' not in empty
+    assert [(entry['total'], entry['ripe'], entry['unripe']) for entry in (a, b, c)] == [(3, 2, 1), (3, 0, 3), (1, 1, 0)]
+    assert result['summary'] == {'images': 5, 'processed': 3, 'failed': 2, 'total': 7, 'ripe': 3, 'unripe': 4}
+    assert sum(images for images, _ in backend.calls) == 4
+    assert len(commits) == 1
+
+    with web.app.app_context():
+        uploads = web.Upload.query.order_by(web.Upload.id).all()
+        assert [upload.image_path for upload in uploads] == [a['image_path'], b['image_path'], c['image_path']]
+        assert [(upload.user_id, upload.ripe_count, upload.unripe_count) for upload in uploads] == \
+            [(alice, 2, 1), (alice, 0, 3), (alice, 1, 0)]
+        assert web.Detection.query.count() == 7
+
+    response = client.post('/detect_batch', data={}, content_type='multipart/form-data')
+    assert response.status_code == 400
+    print("✓ /detect_batch reports each file and commits once")
+
+
+def test_upload_detections_filters_stored_boxes():
+    """/uploads/<id>/detections returns the user's stored boxes, re-filtered by min_confidence, and 404s for others"""
+    reset_app()
+    alice, bob = add_user('alice'), add_user('bob')
+    with web.app.app_context():
+        upload = web.add_upload(alice, 'processed_orchard.jpg', [
+            {'fruit_type': 'Mangosteen', 'ripeness': 'ripe', 'confidence': 0.9, 'class_id': 0, 'box': [1, 2, 30, 40]},
+            {'fruit_type': 'Mangosteen', 'ripeness': 'unripe', 'confidence': 0.4, 'class_id': 1, 'box': [50, 2, 80, 40]},
+            {'fruit_type': 'Mangosteen', 'ripeness': 'ripe', 'confidence': 0.6, 'class_id': 0, 'box': [90, 2, 99, 40]}
+        ])
+        web.db.session.flush()
+        # Rows saved before boxes and class ids were stored
+        web.db.session.add(web.Detection(user_id=alice, upload_id=upload.id, image_path=upload.image_path,
+                                         fruit_type='Mangosteen', ripeness='unripe', confidence=0.7))
+        web.db.session.commit()
+        upload_id = upload.id
+
+    client = login('alice')
+    result = client.get(f"/uploads/{upload_id}/detections").get_json()
+    assert result['upload_id'] == upload_id and result['image_path'] == 'processed_orchard.jpg'
+    assert [(d['confidence'], d['class_id'], d['box']) for d in result['detections']] == \
+        [(0.9, 0, [1, 2, 30, 40]), (0.4, 1, [50, 2, 80, 40]), (0.6, 0, [90, 2, 99, 40]), (0.7, None, None)]
+    filtered = client.get(f"/uploads/{upload_id}/detections?min_confidence=0.6").get_json()['detections']
+    assert [d['confidence'] for d in filtered] == [0.9, 0.6, 0.7]
+    assert filtered[-1] == {'fruit_type': 'Mangosteen', 'ripeness': 'unripe', 'confidence': 0.7, 'class_id': None, 'box': None}
+    assert client.get(f"/uploads/{upload_id}/detections?min_confidence=0.95").get_json()['detections'] == []
+    # An unparsable threshold keeps every box
+    assert len(client.get(f"/uploads/{upload_id}/detections?min_confidence=high").get_json()['detections']) == 4
+
+    assert login('bob').get(f"/uploads/{upload_id}/detections").status_code == 404
+    assert client.get(f"/uploads/{upload_id + 1}/detections").status_code == 404
+    assert web.app.test_client().get(f"/uploads/{upload_id}/detections").status_code == 302
+    print("✓ /uploads/<id>/detections filters the user's stored boxes")
+
+
+def test_run_yolo_batch_splits_items_by_params():
+    """Items with different inference parameters run as separate predict calls, each with its own kwargs"""
+    small = web.InferenceParams(conf=0.3, iou=0.5, max_det=10, imgsz=320)
+    large = small._replace(imgsz=640)
+    strict = large._replace(conf=0.8)
+    images = [np.full((32, 96, 3), (ripe, 0, 0), dtype=np.uint8) for ripe in range(1, 6)]
+    with stub_backend(StubBackend()) as backend:
+        results = web.run_yolo_batch(list(zip(images, [small, large, small, strict, large])))
+    assert backend.calls == [(2, small._asdict()), (2, large._asdict()), (1, strict._asdict())]
+    # Results come back in item order
+    assert [len(result.boxes) for result in results] == [1, 2, 3, 4, 5]
+    print("✓ Batched items are split by inference parameters")
+
+
+def test_video_uploads_are_flagged_without_an_image():
+    """Video uploads are flagged in history and the dashboard, and have no annotated image to link to"""
+    reset_app()
+    alice = add_user('alice')
+    tracked = {'fruit_type': 'Mangosteen', 'ripeness': 'ripe', 'confidence': 0.9, 'box': [1, 2, 30, 40]}
+    with web.app.app_context():
+        web.add_upload(alice, 'processed_20240501_row3.jpg', [tracked], blob_path='ab/cd/row3.jpg')
+        web.add_upload(alice, 'processed_20240501_walk.mp4', [tracked, tracked], blob_path='ab/cd/walk.mp4')
+        web.db.session.commit()
+
+    client = login('alice')
+    with rendered_contexts() as contexts:
+        assert client.get('/history').status_code == 200
+        assert client.get('/dashboard').status_code == 200
+    history, dashboard = contexts
+    assert [(upload.image_path, upload.is_video) for upload in history['uploads']] == \
+        [('processed_20240501_walk.mp4', True), ('processed_20240501_row3.jpg', False)]
+    assert [detection.is_video for detection in history['detections']] == [True, False]
+    assert [detection.is_video for detection in dashboard['recent_detections']] == [True, True, False]
+
+    images = {image['name']: image for image in client.get('/list_images').get_json()['images']}
+    assert images['20240501_walk.mp4']['processed_url'] is None and images['20240501_walk.mp4']['video']
+    assert images['20240501_row3.jpg']['processed_url'] == '/uploads/processed_20240501_row3.jpg'
+    assert not images['20240501_row3.jpg']['video']
+    assert client.get('/uploads/processed_20240501_walk.mp4').status_code == 404
+    print("✓ Video uploads are flagged and have no annotated image")
+
+
+def test_cache_variant_follows_result_settings():
+    """Result cache keys change with every setting that changes the detections"""
+    settings = ('TILE_SIZE', 'TILE_OVERLAP', 'TILE_MERGE_THRESHOLD', 'TILE_FULL_FRAME', 'DUPLICATE_IOU',
+                'ADAPTIVE_IMAGE_SIZES')
+    saved = {name: web.app.config[name] for name in settings}
+    adaptive = web.DEFAULT_PARAMS._replace(imgsz=None)
+    try:
+        assert web.cache_variant(web.DEFAULT_PARAMS, False) is None
+        for name, value in (('TILE_SIZE', 512), ('TILE_OVERLAP', 0.3), ('TILE_MERGE_THRESHOLD', 0.6),
+                            ('TILE_FULL_FRAME', False)):
+            before = web.cache_variant(web.DEFAULT_PARAMS, True)
+            web.app.config[name] = value
+            assert web.cache_variant(web.DEFAULT_PARAMS, True) != before, name
+            assert web.cache_variant(web.DEFAULT_PARAMS, False) is None, name
+        before = web.cache_variant(adaptive, False)
+        web.app.config['ADAPTIVE_IMAGE_SIZES'] = ((1.0, 480),)
+        assert web.cache_variant(adaptive, False) != before
+        web.app.config['DUPLICATE_IOU'] = 0.8
+        assert web.cache_variant(web.DEFAULT_PARAMS, False) == 'duplicate_iou=0.8'
+    finally:
+        web.app.config.update(saved)
+    print("✓ Result cache variants follow the result settings")
+
+
+if __name__ == "__main__":
+    print("Testing the web app")
+    print("=" * 60)
+    test_list_images_pages_through_own_uploads()
+    test_list_images_prefix_and_cached_count()
+    test_incremental_rollups_match_a_rebuild()
+    test_rollup_summary_buckets_days()
+    test_rollup_upserts_need_on_conflict_support()
+    test_parse_date_arg()
+    test_parse_history_cursor()
+    test_history_filter_conditions()
+    test_history_pages_with_cursor()
+    test_annotated_images_are_rendered_on_demand_and_cached()
+    test_detect_batch_reports_each_file_and_commits_once()
+    test_upload_detections_filters_stored_boxes()
+    test_run_yolo_batch_splits_items_by_params()
+    test_video_uploads_are_flagged_without_an_image()
+    test_cache_variant_follows_result_settings()
+    print("\n🎉 All app tests passed!")
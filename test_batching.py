@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Test script for the micro-batching inference scheduler
+"""
+
+import sys
+import os
+import threading
+import time
+
+# Add the current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from batching import MicroBatcher
+
+
+def test_concurrent_requests_share_batches():
+    """Concurrent submissions are grouped and each caller gets its own result"""
+    batch_sizes = []
+
+    def predict(items):
+        batch_sizes.append(len(items))
+        time.sleep(0.01)
+        return [item * 2 for item in items]
+
+    batcher = MicroBatcher(predict, max_batch_size=4, max_wait_ms=50)
+    results = {}
+
+    def client(value):
+        results[value] = batcher.predict(value, timeout=5)
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(12)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    batcher.shutdown()
+
+    assert results == {i: i * 2 for i in range(12)}
+    assert max(batch_sizes) <= 4
+    assert len(batch_sizes) < 12
+    stats = batcher.stats()
+    assert stats['items'] == 12
+    assert stats['batches'] == len(batch_sizes)
+    print(f"✓ 12 requests served in {len(batch_sizes)} batches: {batch_sizes}")
+
+
+def test_single_request_waits_at_most_max_wait():
+    """A lone request is dispatched once max_wait expires"""
+    batcher = MicroBatcher(lambda items: items, max_batch_size=8, max_wait_ms=20)
+    start = time.monotonic()
+    assert batcher.predict('only', timeout=5) == 'only'
+    elapsed = time.monotonic() - start
+    batcher.shutdown()
+    assert elapsed < 1.0
+    print(f"✓ Single request returned after {elapsed * 1000:.1f} ms")
+
+
+def test_errors_propagate_to_every_caller():
+    """A failing batch raises in each waiting request"""
+    def predict(items):
+        raise ValueError("model exploded")
+
+    batcher = MicroBatcher(predict, max_batch_size=4, max_wait_ms=5)
+    future = batcher.submit('x')
+    try:
+        future.result(timeout=5)
+    except ValueError as e:
+        assert 'model exploded' in str(e)
+    else:
+        raise AssertionError("Expected ValueError")
+    batcher.shutdown()
+    assert batcher.stats()['errors'] == 1
+    print("✓ Batch errors reach the waiting request")
+
+
+def test_shutdown_drains_queue():
+    """Items queued before shutdown are still processed"""
+    batcher = MicroBatcher(lambda items: [i + 1 for i in items], max_batch_size=2, max_wait_ms=1)
+    futures = [batcher.submit(i) for i in range(5)]
+    batcher.shutdown()
+    assert [f.result(timeout=5) for f in futures] == [1, 2, 3, 4, 5]
+    try:
+        batcher.submit(6)
+    except RuntimeError:
+        pass
+    else:
+        raise AssertionError("Expected RuntimeError after shutdown")
+    print("✓ Shutdown drains pending work")
+
+
+if __name__ == "__main__":
+    print("Testing micro-batching scheduler")
+    print("=" * 60)
+    test_concurrent_requests_share_batches()
+    test_single_request_waits_at_most_max_wait()
+    test_errors_propagate_to_every_caller()
+    test_shutdown_drains_queue()
+    print("\n🎉 All batching tests passed!")
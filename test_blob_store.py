@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Test script for content-addressed upload storage
+"""
+
+import sys
+import os
+import hashlib
+import tempfile
+import threading
+from io import BytesIO
+
+# Add the current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from blob_store import BlobStore, normalize_extension
+
+
+def test_blob_store():
+    """Files land under sharded content-hash paths, identical content is stored once, concurrent puts are safe"""
+    with tempfile.TemporaryDirectory() as folder:
+        store = BlobStore(folder, chunk_size=7)
+        data = b"mangosteen" * 100
+        digest = hashlib.sha256(data).hexdigest()
+
+        first = store.put(BytesIO(data), '.jpg')
+        assert first.path == f"{digest[:2]}/{digest[2:4]}/{digest}.jpg"
+        assert first.digest == digest and first.size == len(data) and first.created
+        with open(store.path(first.path), 'rb') as f:
+            assert f.read() == data
+
+        # Identical bytes, however they arrive, are kept once
+        source = os.path.join(folder, 'copy.JPG')
+        with open(source, 'wb') as f:
+            f.write(data)
+        second = store.put_file(source)
+        assert second.path == first.path and not second.created
+        assert normalize_extension('a.JPEG') == '.jpeg' and normalize_extension('noext') == ''
+
+        # Many uploads of distinct and identical content at once
+        blobs = []
+        def upload(i):
+            blobs.append(store.put(BytesIO(b"fruit %d" % (i % 5)), '.png'))
+        threads = [threading.Thread(target=upload, args=(i,)) for i in range(20)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert len({blob.path for blob in blobs}) == 5
+        assert all(store.exists(blob.path) for blob in blobs)
+        assert os.listdir(store.tmp_folder) == []
+
+        try:
+            store.path('../escape.jpg')
+            raise AssertionError("path outside the store was accepted")
+        except ValueError:
+            pass
+        print("✓ Blob store deduplicates and shards uploads")
+
+
+if __name__ == "__main__":
+    test_blob_store()
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Test script for resumable bulk ingestion of image folders
+"""
+
+import sys
+import os
+import tempfile
+
+# Add the current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from bulk_ingest import Checkpoint, find_images, ingest
+
+
+def make_folder(folder, count):
+    os.makedirs(os.path.join(folder, 'b'))
+    for i in range(count):
+        with open(os.path.join(folder, 'b' if i % 2 else '', f"{i:03d}.jpg"), 'wb') as f:
+            f.write(b'x')
+    open(os.path.join(folder, 'notes.txt'), 'w').close()
+
+
+def detect(path):
+    if path.endswith('007.jpg'):
+        raise ValueError("No valid detections found in the image")
+    return [{'ripeness': 'ripe'}] * 2, 1.0
+
+
+def test_interrupted_ingest_resumes_without_duplicates():
+    """A run stopped mid-way resumes after its last committed chunk; failures are skipped unless retried"""
+    with tempfile.TemporaryDirectory() as folder:
+        make_folder(folder, 25)
+        paths = find_images(folder)
+        assert len(paths) == 25 and paths == sorted(paths, key=lambda p: (os.path.dirname(p) != folder, p))
+        checkpoint_path = os.path.join(folder, 'checkpoint.jsonl')
+        saved = []
+
+        def crashing_save(results):
+            if len(saved) >= 10:
+                raise RuntimeError("killed")
+            saved.extend(path for path, _, _ in results)
+
+        try:
+            ingest(paths, detect, crashing_save, Checkpoint(checkpoint_path), num_threads=3, chunk_size=5)
+            raise AssertionError("save error was not raised")
+        except RuntimeError:
+            pass
+        assert len(saved) == 10
+
+        # A torn last line from the killed run is ignored
+        with open(checkpoint_path, 'a') as f:
+            f.write('{"path": "')
+        reports = []
+        stats = ingest(paths, detect, lambda results: saved.extend(path for path, _, _ in results),
+                       Checkpoint(checkpoint_path), num_threads=3, chunk_size=5, report=reports.append)
+        assert sorted(saved) == sorted(path for path in paths if not path.endswith('007.jpg'))
+        assert (stats.skipped, stats.processed, stats.failed, stats.detections) == (10, 14, 1, 28)
+        assert reports[-1] == stats._replace(seconds=reports[-1].seconds)
+
+        # Failed images are only retried on request, and paths already in the database are never redone
+        stats = ingest(paths, detect, saved.extend, Checkpoint(checkpoint_path), skip=paths[:3])
+        assert (stats.skipped, stats.processed, stats.failed) == (25, 0, 0)
+        stats = ingest(paths, detect, saved.extend, Checkpoint(checkpoint_path), retry_failed=True)
+        assert (stats.skipped, stats.failed) == (24, 1)
+        print("✓ Interrupted ingest resumes without duplicates")
+
+
+if __name__ == "__main__":
+    test_interrupted_ingest_resumes_without_duplicates()
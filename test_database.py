@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Test script for SQLite tuning and read/write engine routing
+"""
+
+import sys
+import os
+import tempfile
+
+# Add the current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from flask import Flask, jsonify
+from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import event, text
+
+from database import READ_BIND, RoutingSession, configure_engines, read_binds, read_only
+
+
+def make_app(folder):
+    """Standalone app with the primary and read engines on one SQLite file"""
+    app = Flask(__name__)
+    url = f"sqlite:///{os.path.join(folder, 'rows.db')}"
+    app.config['SQLALCHEMY_DATABASE_URI'] = url
+    app.config['SQLALCHEMY_BINDS'] = read_binds(url)
+    db = SQLAlchemy(app, session_options={'class_': RoutingSession})
+
+    class Row(db.Model):
+        id = db.Column(db.Integer, primary_key=True)
+        value = db.Column(db.Integer, nullable=False)
+
+    with app.app_context():
+        configure_engines(db)
+        db.create_all()
+        db.session.add_all([Row(value=i) for i in range(100)])
+        db.session.commit()
+
+    @app.route('/rows')
+    @read_only
+    def rows():
+        return jsonify(db.session.query(db.func.count(Row.id)).scalar())
+
+    @app.route('/add')
+    def add():
+        db.session.add(Row(value=-1))
+        db.session.commit()
+        return jsonify(Row.query.count())
+
+    return app, db, Row
+
+
+def test_read_binds_only_split_shareable_databases():
+    """Files and explicit replicas get a read engine; in-memory SQLite and other databases alone do not"""
+    assert read_binds('sqlite:///app.db', read_pool_size=4) == {
+        READ_BIND: {'url': 'sqlite:///app.db', 'pool_size': 4, 'max_overflow': 4}}
+    assert read_binds('sqlite://') == {} and read_binds('sqlite:///:memory:') == {}
+    assert read_binds('postgresql://db/app') == {}
+    assert read_binds('postgresql://db/app', 'postgresql://replica/app') == {READ_BIND: {'url': 'postgresql://replica/app'}}
+
+
+def test_read_only_views_use_the_read_engine():
+    """Connections run in WAL mode, read-only views query the read engine, and the read engine refuses writes"""
+    with tempfile.TemporaryDirectory() as folder:
+        app, db, Row = make_app(folder)
+        used = []
+        with app.app_context():
+            for key, engine in db.engines.items():
+                event.listen(engine, 'before_cursor_execute', lambda *args, key=key: used.append(key))
+            assert db.session.execute(text('PRAGMA journal_mode')).scalar() == 'wal'
+            assert db.session.execute(text('PRAGMA synchronous')).scalar() == 1  # NORMAL
+        client = app.test_client()
+        used.clear()
+        assert client.get('/rows').get_json() == 100 and set(used) == {READ_BIND}
+        used.clear()
+        assert client.get('/add').get_json() == 101 and set(used) == {None}
+        with app.app_context():
+            with db.engines[READ_BIND].connect() as connection:
+                try:
+                    connection.execute(text('DELETE FROM row'))
+                    raise AssertionError("read engine accepted a write")
+                except Exception as e:
+                    assert 'readonly' in str(e)
+        print("✓ Read-only views are routed to the read engine")
+
+
+def test_long_reads_do_not_block_writes():
+    """A write commits while a read on the read engine is still stepping through its rows"""
+    with tempfile.TemporaryDirectory() as folder:
+        app, db, Row = make_app(folder)
+        with app.app_context():
+            with db.engines[READ_BIND].connect() as reader:
+                rows = reader.execute(text('SELECT value FROM row ORDER BY id'))
+                assert rows.fetchone() == (0,)
+                with db.engines[None].begin() as writer:
+                    writer.execute(text('PRAGMA busy_timeout=100'))
+                    writer.execute(text('INSERT INTO row (value) VALUES (100)'))
+                # The open read keeps its snapshot
+                assert len(rows.fetchall()) == 99
+            assert Row.query.count() == 101
+        print("✓ Long reads do not block writes")
+
+
+if __name__ == "__main__":
+    test_read_binds_only_split_shareable_databases()
+    test_read_only_views_use_the_read_engine()
+    test_long_reads_do_not_block_writes()
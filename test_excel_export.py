@@ -7,10 +7,12 @@ import sys
 import os
 from datetime import datetime, timedelta
 
+import openpyxl
+
 # Add the current directory to Python path
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-from excel_template import FruitDetectionExcelTemplate, create_detection_export, create_summary_export
+from excel_template import FruitDetectionExcelTemplate, create_detection_export, create_streaming_detection_export, create_summary_export
 
 def test_excel_template():
     """Test the Excel template functionality"""
@@ -86,11 +88,62 @@ def test_excel_template():
     print("\n🎉 All Excel export tests passed!")
     return True
 
+def sheet_values(output):
+    """Cell values and merged ranges of the detection sheet of an exported workbook"""
+    workbook = openpyxl.load_workbook(output)
+    assert workbook.sheetnames == ['Detection Results']
+    sheet = workbook['Detection Results']
+    rows = [list(row) for row in sheet.iter_rows(values_only=True)]
+    for row in rows:
+        # The two files are written moments apart
+        if isinstance(row[0], str) and row[0].startswith('Generated on:'):
+            row[0] = 'Generated on:'
+    return rows, sorted(str(cell_range) for cell_range in sheet.merged_cells.ranges)
+
+def test_streaming_export_matches_in_memory_export():
+    """The streamed workbook has the same cells, summary section and layout as the in-memory one"""
+    class MockDetection:
+        def __init__(self, ripeness, confidence, timestamp, image_path):
+            self.fruit_type = "Mangosteen"
+            self.ripeness = ripeness
+            self.confidence = confidence
+            self.timestamp = timestamp
+            self.image_path = image_path
+    
+    class MockUser:
+        username = "testuser"
+        created_at = datetime(2024, 1, 1)
+    
+    start = datetime(2024, 3, 1, 8, 30)
+    detections = [MockDetection("ripe" if i % 3 else "unripe", 0.5 + (i % 50) / 100, start + timedelta(minutes=7 * i),
+                                f"processed_{i}.jpg") for i in range(500)]
+    filters = {"ripeness": "all", "date_from": "2024-03-01", "date_to": "2024-03-31"}
+    
+    output, _ = create_detection_export(detections, MockUser(), filters)
+    expected, expected_merged = sheet_values(output)
+    rows = iter([(d.ripeness, d.confidence, d.timestamp, d.image_path) for d in detections])
+    streamed, _ = create_streaming_detection_export(rows, MockUser(), filters, total=len(detections))
+    try:
+        actual, actual_merged = sheet_values(streamed)
+    finally:
+        streamed.close()
+    
+    assert actual == expected
+    assert actual_merged == expected_merged
+    # One row per detection under the header, then the summary section
+    header = expected.index(['Ripeness', 'Confidence (%)', 'Detection Date', 'Detection Time', 'Image File', 'User'])
+    assert expected[header + 1][:5] == ['unripe', 50, '2024-03-01', '08:30:00', 'processed_0.jpg']
+    summary = {row[0]: row[1] for row in expected[header + 1 + len(detections):] if row[0]}
+    assert summary['Total Detections:'] == 500
+    assert summary['Ripe Mangosteen:'] == 333 and summary['Unripe Mangosteen:'] == 167
+    print("✓ Streaming export matches the in-memory export")
+
 if __name__ == "__main__":
     print("Testing Fruit Detection System Excel Export Functionality")
     print("=" * 60)
     
     success = test_excel_template()
+    test_streaming_export_matches_in_memory_export()
     
     if success:
         print("\n✅ Excel export functionality is working correctly!")
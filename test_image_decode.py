@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Test script for decode-once image loading
+"""
+
+import sys
+import os
+from io import BytesIO
+
+# Add the current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+from PIL import Image
+
+from image_decode import decode_image, image_size
+
+
+def encode(width, height, format):
+    buffer = BytesIO()
+    Image.new('RGB', (width, height), (128, 0, 128)).save(buffer, format=format)
+    return buffer.getvalue()
+
+
+def encode_rotated_photo(width, height, orientation=6):
+    """JPEG stored sideways, as phones save portrait photos: the left half red, the right half blue,
+    with an EXIF orientation telling viewers to turn it"""
+    image = Image.new('RGB', (width, height), (255, 0, 0))
+    image.paste((0, 0, 255), (width // 2, 0, width, height))
+    exif = Image.Exif()
+    exif[0x0112] = orientation
+    buffer = BytesIO()
+    image.save(buffer, format='JPEG', exif=exif)
+    return buffer.getvalue()
+
+
+def test_large_jpeg_is_decoded_at_reduced_scale():
+    """A JPEG far larger than the model input decodes smaller, never below the input size"""
+    data = encode(4000, 3000, 'JPEG')
+    array, scale = decode_image(data, target_size=640)
+    assert array.dtype == np.uint8 and array.shape[2] == 3
+    assert min(array.shape[:2]) >= 640
+    assert array.shape[1] < 4000
+    assert array.shape[1] * scale == 4000
+    assert array.nbytes < 4000 * 3000 * 3
+    print(f"✓ 4000x3000 JPEG decoded at {array.shape[1]}x{array.shape[0]}")
+
+
+def test_small_and_non_jpeg_images_decode_at_full_size():
+    """Images near the model input size, and formats without DCT scaling, keep their size"""
+    for width, height, format in ((800, 600, 'JPEG'), (2000, 1500, 'PNG')):
+        array, scale = decode_image(encode(width, height, format), target_size=640)
+        assert array.shape == (height, width, 3)
+        assert scale == 1
+    assert tuple(array[0, 0]) == (128, 0, 128)
+    print("✓ Small JPEGs and PNGs decode at full size")
+
+
+def test_exif_orientation_is_applied():
+    """Portrait phone photos decode upright, at full and reduced scale, with scale in upright pixels"""
+    data = encode_rotated_photo(400, 200)
+    assert image_size(data) == (200, 400)
+    array, scale = decode_image(data, target_size=640)
+    assert array.shape == (400, 200, 3) and scale == 1
+    # Orientation 6 turns the stored image clockwise: its left half becomes the top
+    assert array[50, 100, 0] > 200 and array[50, 100, 2] < 50
+    assert array[350, 100, 2] > 200 and array[350, 100, 0] < 50
+
+    array, scale = decode_image(encode_rotated_photo(4000, 2000), target_size=640)
+    assert array.shape[0] > array.shape[1] and array.shape[1] < 2000
+    assert array.shape[1] * scale == 2000
+    assert array[10, array.shape[1] // 2, 0] > 200 and array[-10, array.shape[1] // 2, 2] > 200
+    print("✓ EXIF orientation is applied before detection")
+
+
+if __name__ == "__main__":
+    print("Testing image decoding")
+    print("=" * 60)
+    test_large_jpeg_is_decoded_at_reduced_scale()
+    test_small_and_non_jpeg_images_decode_at_full_size()
+    test_exif_orientation_is_applied()
+    print("\n🎉 All image decoding tests passed!")
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Test script for the import-time budget of the app and maintenance scripts
+"""
+
+import sys
+import os
+import json
+import subprocess
+import tempfile
+
+# Add the current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# Seconds a fresh interpreter may spend importing a module; generous for slow CI machines
+IMPORT_BUDGET = 3.0
+
+# Loaded on first use only: the model, its frameworks and libraries used by single routes
+HEAVY_MODULES = ('torch', 'ultralytics', 'onnxruntime', 'sklearn', 'pandas', 'cv2')
+
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(json.dumps({{'seconds': elapsed, 'loaded': [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+
+def import_in_subprocess(module, folder):
+    """Import module in a fresh interpreter against an empty database. Returns (seconds, heavy modules loaded)."""
+    env = dict(os.environ, DATABASE_URL=f"sqlite:///{os.path.join(folder, 'import.db')}")
+    output = subprocess.run([sys.executable, '-c', PROBE.format(module=module, heavy=HEAVY_MODULES)],
+                            cwd=HERE, env=env, capture_output=True, text=True, check=True).stdout
+    report = json.loads(output.strip().splitlines()[-1])
+    return report['seconds'], report['loaded']
+
+
+def check_import(module):
+    with tempfile.TemporaryDirectory() as folder:
+        # The first run warms the filesystem and bytecode caches
+        import_in_subprocess(module, folder)
+        seconds, loaded = import_in_subprocess(module, folder)
+        assert loaded == [], f"Importing {module} loaded {loaded}"
+        assert seconds < IMPORT_BUDGET, f"Importing {module} took {seconds:.2f}s, budget {IMPORT_BUDGET}s"
+        # Database preparation waits for the first request or warm_up()
+        assert not os.path.exists(os.path.join(folder, 'import.db'))
+        return seconds
+
+
+def test_app_import_is_lazy():
+    """Importing the web app loads no model, heavy library or database"""
+    check_import('app')
+
+
+def test_maintenance_script_import_is_lazy():
+    """Scripts that only touch the database do not pay for the model"""
+    for module in ('check_users', 'rebuild_rollups', 'upgrade_db'):
+        check_import(module)
+
+
+if __name__ == "__main__":
+    for module in ('app', 'check_users', 'rebuild_rollups', 'upgrade_db'):
+        print(f"{module}: {check_import(module):.2f}s")
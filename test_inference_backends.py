@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Test script for the pluggable inference backends
+"""
+
+import sys
+import os
+
+# Add the current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+
+from inference_backends import OnnxBackend, decode_predictions, letterbox, load_backend
+
+PT_MODEL = os.getenv('PARITY_PT_MODEL', 'model/best.pt')
+ONNX_MODEL = os.getenv('PARITY_ONNX_MODEL', 'model/best.onnx')
+
+
+def raw_output(boxes, num_classes=2):
+    """Build a YOLOv8-style (4 + classes) x N output from (cx, cy, w, h, class_id, score) rows"""
+    output = np.zeros((4 + num_classes, len(boxes)), dtype=np.float32)
+    for i, (cx, cy, w, h, class_id, score) in enumerate(boxes):
+        output[:4, i] = (cx, cy, w, h)
+        output[4 + class_id, i] = score
+    return output
+
+
+def test_letterbox_keeps_aspect_ratio():
+    """A 480x640 image is scaled to 480x640 inside a padded 640x640 RGB tensor"""
+    image = np.zeros((480, 640, 3), dtype=np.uint8)
+    image[..., 0] = 255  # Blue in BGR
+    tensor, ratio, pad = letterbox(image, 640)
+    assert tensor.shape == (3, 640, 640) and tensor.dtype == np.float32
+    assert ratio == 1 and pad == (0, 80)
+    assert tensor[2, 320, 320] == 1.0 and tensor[0, 320, 320] == 0.0
+    assert abs(tensor[0, 10, 320] - 114 / 255) < 1e-6
+    print("✓ Letterbox pads to a square and converts BGR to RGB")
+
+
+def test_decode_predictions_suppresses_duplicates_per_class():
+    """Overlapping boxes of one class collapse to the best; other classes and low scores are handled"""
+    output = raw_output([
+        (100, 180, 40, 40, 0, 0.9),
+        (102, 182, 40, 40, 0, 0.8),  # Duplicate of the first
+        (100, 180, 40, 40, 1, 0.7),  # Same place, other class
+        (300, 380, 20, 20, 0, 0.1),  # Below the score threshold
+    ])
+    result = decode_predictions(output, ratio=0.5, pad=(0, 80), image_shape=(960, 1280), conf=0.25, iou=0.7)
+    assert result.class_ids.tolist() == [0, 1]
+    assert np.allclose(result.scores, [0.9, 0.7])
+    # Letterbox coordinates (80, 160, 120, 200) minus padding, scaled back by 1 / ratio
+    assert np.allclose(result.boxes[0], [160, 160, 240, 240])
+    print("✓ Raw predictions decode to deduplicated boxes in original pixels")
+
+
+class FixedSession:
+    """Stands in for an ONNX Runtime session that returns the same raw output for every image"""
+
+    def __init__(self, output):
+        self.output = output
+
+    def run(self, output_names, feeds):
+        batch = next(iter(feeds.values()))
+        return [np.stack([self.output] * len(batch))]
+
+
+def test_explicit_zero_thresholds_override_backend_defaults():
+    """conf=0 and iou=0 passed to predict are used, not replaced by the load-time defaults"""
+    backend = OnnxBackend.__new__(OnnxBackend)
+    backend.conf, backend.iou, backend.max_det, backend.imgsz = 0.5, 0.7, 300, 640
+    backend.fixed_batch, backend.dynamic_size, backend.input_name = None, False, 'images'
+    backend.session = FixedSession(raw_output([
+        (100, 100, 40, 40, 0, 0.9),
+        (110, 100, 40, 40, 0, 0.8),  # Overlaps the first with an IoU of 0.6
+        (300, 300, 20, 20, 1, 0.1),
+    ]))
+    image = np.zeros((640, 640, 3), dtype=np.uint8)
+    assert len(backend.predict([image])[0].boxes) == 2
+    assert len(backend.predict([image], conf=0)[0].boxes) == 3
+    assert len(backend.predict([image], conf=0, iou=0)[0].boxes) == 2
+    print("✓ Explicit zero thresholds are passed through")
+
+
+def test_onnx_matches_ultralytics():
+    """Both backends find the same classes and boxes, within a pixel, on the same images"""
+    if not (os.path.exists(PT_MODEL) and os.path.exists(ONNX_MODEL)):
+        print(f"- Skipped backend parity: {PT_MODEL} and {ONNX_MODEL} are both needed")
+        return
+    try:
+        onnx = load_backend('onnx', ONNX_MODEL)
+    except ImportError as e:
+        print(f"- Skipped backend parity: {str(e)}")
+        return
+    pytorch = load_backend('ultralytics', PT_MODEL)
+    assert onnx.names == pytorch.names
+    rng = np.random.default_rng(0)
+    images = [rng.integers(0, 255, shape, dtype=np.uint8) for shape in ((480, 640, 3), (700, 500, 3))]
+    for image in images:
+        expected, = pytorch.predict([image])
+        actual, = onnx.predict([image])
+        for box, score, class_id in zip(expected.boxes[:20], expected.scores[:20], expected.class_ids[:20]):
+            same_class = actual.class_ids == class_id
+            assert same_class.any()
+            distance = np.abs(actual.boxes[same_class] - box).max(axis=1)
+            assert distance.min() < 1.0
+            assert abs(actual.scores[same_class][distance.argmin()] - score) < 0.02
+    print("✓ ONNX Runtime boxes and classes match ultralytics")
+
+
+if __name__ == "__main__":
+    print("Testing inference backends")
+    print("=" * 60)
+    test_letterbox_keeps_aspect_ratio()
+    test_decode_predictions_suppresses_duplicates_per_class()
+    test_explicit_zero_thresholds_override_backend_defaults()
+    test_onnx_matches_ultralytics()
+    print("\n🎉 All inference backend tests passed!")
@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+"""
+Test script for per-user inference parameters and adaptive input sizing
+"""
+
+import sys
+import os
+
+import numpy as np
+
+# Add the current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from inference_params import (DEFAULT_PARAMS, choose_image_size, estimate_density, normalize_image_size,
+                              params_from_settings)
+
+
+def test_settings_map_to_inference_params():
+    """Percentages become fractions, sizes snap to multiples of 32 and bad values fall back"""
+    params = params_from_settings({'confidence_threshold': 35, 'iou_threshold': 60, 'max_detections': 50,
+                                   'image_size': 500})
+    assert params == (0.35, 0.6, 50, 480)
+    assert params_from_settings({'image_size': 'auto'}).imgsz is None
+    assert params_from_settings(None) == DEFAULT_PARAMS
+    assert params_from_settings({'confidence_threshold': 'x', 'max_detections': 99999, 'image_size': 64}) == \
+        (0.5, 0.7, 1000, 160)
+    assert params_from_settings({}, DEFAULT_PARAMS._replace(imgsz=None)).imgsz is None
+    assert [normalize_image_size(size) for size in (64, '500', 639, 640, 5000)] == [160, 480, 608, 640, 1280]
+    print("✓ Settings mapped")
+
+
+def test_adaptive_size_follows_density_and_resolution():
+    """Smooth close-ups run small, cluttered scenes large, and small sources are never upscaled"""
+    rng = np.random.default_rng(0)
+    x = np.linspace(0, 255, 1200, dtype=np.float32)
+    smooth = np.broadcast_to(np.stack([x, x[::-1], x / 2], axis=-1)[None], (900, 1200, 3)).astype(np.uint8)
+    cluttered = rng.integers(0, 255, (900, 1200, 3), dtype=np.uint8)
+    assert estimate_density(smooth) < 0.06 < estimate_density(cluttered)
+    assert choose_image_size(1200, 900, estimate_density(smooth)) == 320
+    assert choose_image_size(1200, 900, estimate_density(cluttered)) == 960
+    assert choose_image_size(500, 400, 0.9) == 512
+    assert choose_image_size(200, 150, 0.9) == 320
+    print("✓ Adaptive sizes chosen")
+
+
+if __name__ == "__main__":
+    test_settings_map_to_inference_params()
+    test_adaptive_size_follows_density_and_resolution()
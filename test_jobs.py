@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Test script for the background detection job runner
+"""
+
+import sys
+import os
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+# Add the current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from flask import Flask
+from flask_sqlalchemy import SQLAlchemy
+
+from jobs import JobRunner
+
+
+def make_app(folder):
+    """Standalone app with a job table shaped like DetectionJob"""
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{os.path.join(folder, 'jobs.db')}"
+    db = SQLAlchemy(app)
+
+    class Job(db.Model):
+        id = db.Column(db.Integer, primary_key=True)
+        payload = db.Column(db.Integer, nullable=False)
+        status = db.Column(db.String(20), nullable=False, default='pending')
+        result = db.Column(db.JSON, nullable=True)
+        error = db.Column(db.String(255), nullable=True)
+        attempts = db.Column(db.Integer, nullable=False, default=0)
+        created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+        started_at = db.Column(db.DateTime, nullable=True)
+        heartbeat_at = db.Column(db.DateTime, nullable=True)
+        finished_at = db.Column(db.DateTime, nullable=True)
+
+    with app.app_context():
+        db.create_all()
+    return app, db, Job
+
+
+def wait_for(app, Job, predicate, timeout=10):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        with app.app_context():
+            jobs = Job.query.order_by(Job.id).all()
+            if predicate(jobs):
+                return jobs
+        time.sleep(0.05)
+    raise AssertionError("Timed out waiting for jobs")
+
+
+def handler(job):
+    if job.payload < 0:
+        raise ValueError("negative payload")
+    if job.payload >= 100:
+        # A long job, still running when its first lease period is over
+        time.sleep(job.payload / 100)
+    return {'square': job.payload ** 2}
+
+
+def test_jobs_run_and_record_results():
+    """Queued jobs finish with results; failing jobs record their error"""
+    with tempfile.TemporaryDirectory() as folder:
+        app, db, Job = make_app(folder)
+        runner = JobRunner(app, db, Job, handler, num_workers=2, poll_interval=0.05)
+        runner.start()
+        with app.app_context():
+            db.session.add_all([Job(payload=2), Job(payload=3), Job(payload=-1)])
+            db.session.commit()
+        runner.notify()
+        jobs = wait_for(app, Job, lambda jobs: all(j.status in ('done', 'failed') for j in jobs))
+        runner.stop()
+        assert [j.status for j in jobs] == ['done', 'done', 'failed']
+        assert jobs[1].result == {'square': 9}
+        assert 'negative payload' in jobs[2].error
+        assert all(j.attempts == 1 for j in jobs)
+        print("✓ Jobs complete and failures are recorded")
+
+
+def test_interrupted_jobs_resume_after_restart():
+    """Jobs left running by a crashed process are picked up again"""
+    with tempfile.TemporaryDirectory() as folder:
+        app, db, Job = make_app(folder)
+        with app.app_context():
+            db.session.add(Job(payload=4, status='running', attempts=1))
+            db.session.add(Job(payload=5, status='running', attempts=3))
+            db.session.commit()
+        runner = JobRunner(app, db, Job, handler, num_workers=1, poll_interval=0.05, max_attempts=3)
+        runner.start()
+        jobs = wait_for(app, Job, lambda jobs: all(j.status in ('done', 'failed') for j in jobs))
+        runner.stop()
+        assert jobs[0].status == 'done' and jobs[0].result == {'square': 16}
+        assert jobs[1].status == 'failed'
+        print("✓ Interrupted jobs resume, repeatedly interrupted jobs fail")
+
+
+def test_jobs_of_live_runners_are_not_taken_over():
+    """A runner started next to a live one, e.g. another gunicorn worker, leaves its running jobs alone
+    and only reclaims jobs whose lease has expired"""
+    with tempfile.TemporaryDirectory() as folder:
+        app, db, Job = make_app(folder)
+        calls = []
+
+        def counting_handler(job):
+            calls.append(job.payload)
+            return handler(job)
+
+        first = JobRunner(app, db, Job, counting_handler, num_workers=1, poll_interval=0.05, lease_seconds=0.4)
+        first.start()
+        with app.app_context():
+            db.session.add(Job(payload=150))
+            # Left by a process that died a while ago
+            stale = datetime.utcnow() - timedelta(seconds=5)
+            db.session.add(Job(payload=6, status='running', attempts=1, started_at=stale, heartbeat_at=stale))
+            db.session.commit()
+        first.notify()
+        wait_for(app, Job, lambda jobs: jobs[0].status == 'running')
+        # The long job outlives several lease periods while the second runner polls
+        second = JobRunner(app, db, Job, counting_handler, num_workers=2, poll_interval=0.05, lease_seconds=0.4)
+        second.start()
+        jobs = wait_for(app, Job, lambda jobs: all(j.status == 'done' for j in jobs))
+        first.stop()
+        second.stop()
+        assert sorted(calls) == [6, 150]
+        assert [j.attempts for j in jobs] == [1, 2]
+        assert jobs[0].result == {'square': 22500}
+        print("✓ Running jobs keep their lease; abandoned jobs are reclaimed")
+
+
+if __name__ == "__main__":
+    print("Testing background job runner")
+    print("=" * 60)
+    test_jobs_run_and_record_results()
+    test_interrupted_jobs_resume_after_restart()
+    test_jobs_of_live_runners_are_not_taken_over()
+    print("\n🎉 All job runner tests passed!")
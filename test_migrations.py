@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Test script for schema upgrades of existing databases
+"""
+
+import sys
+import os
+import sqlite3
+import tempfile
+
+# Add the current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from flask import Flask
+from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import inspect
+
+from migrations import upgrade_schema
+
+
+def make_app(folder):
+    """Standalone app whose Item model has gained a column and an index since the database was created"""
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{os.path.join(folder, 'old.db')}"
+    db = SQLAlchemy(app)
+
+    class Item(db.Model):
+        id = db.Column(db.Integer, primary_key=True)
+        name = db.Column(db.String(50), nullable=False)
+        group_id = db.Column(db.Integer, nullable=True)
+
+        __table_args__ = (db.Index('ix_item_group_name', 'group_id', 'name'),)
+
+    return app, db, Item
+
+
+def test_upgrade_adds_columns_and_indexes():
+    """Missing columns and indexes are added once and existing rows are kept"""
+    with tempfile.TemporaryDirectory() as folder:
+        conn = sqlite3.connect(os.path.join(folder, 'old.db'))
+        conn.execute("CREATE TABLE item (id INTEGER PRIMARY KEY, name VARCHAR(50) NOT NULL)")
+        conn.execute("INSERT INTO item (name) VALUES ('old')")
+        conn.commit()
+        conn.close()
+
+        app, db, Item = make_app(folder)
+        with app.app_context():
+            assert upgrade_schema(db) == ['column item.group_id', 'index ix_item_group_name']
+            assert upgrade_schema(db) == []
+            assert 'ix_item_group_name' in {index['name'] for index in inspect(db.engine).get_indexes('item')}
+            item = Item.query.one()
+            assert item.name == 'old' and item.group_id is None
+            item.group_id = 7
+            db.session.commit()
+        print("✓ Columns and indexes are added to an existing database")
+
+
+def test_upgrade_drops_retired_indexes():
+    """Retired indexes are dropped once; indexes a model declares are kept even if listed as retired"""
+    with tempfile.TemporaryDirectory() as folder:
+        conn = sqlite3.connect(os.path.join(folder, 'old.db'))
+        conn.execute("CREATE TABLE item (id INTEGER PRIMARY KEY, name VARCHAR(50) NOT NULL, group_id INTEGER)")
+        conn.execute("CREATE INDEX ix_item_name_group ON item (name, group_id)")
+        conn.execute("CREATE INDEX ix_item_group_name ON item (group_id, name)")
+        conn.commit()
+        conn.close()
+
+        app, db, Item = make_app(folder)
+        retired = {'item': ['ix_item_name_group', 'ix_item_group_name'], 'missing': ['ix_missing']}
+        with app.app_context():
+            assert upgrade_schema(db, retired) == ['dropped index ix_item_name_group']
+            assert upgrade_schema(db, retired) == []
+            assert {index['name'] for index in inspect(db.engine).get_indexes('item')} == {'ix_item_group_name'}
+        print("✓ Retired indexes are dropped from an existing database")
+
+
+if __name__ == "__main__":
+    print("Testing schema upgrades")
+    print("=" * 60)
+    test_upgrade_adds_columns_and_indexes()
+    test_upgrade_drops_retired_indexes()
+    print("\n🎉 All schema upgrade tests passed!")
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Test script for vectorized post-processing of model detections
+"""
+
+import sys
+import os
+
+import numpy as np
+
+# Add the current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from inference_backends import BackendResult
+from postprocess import build_class_table, parse_class_name, summarize_result
+
+NAMES = {0: 'mangosteen_ripe', 1: 'mangosteen_unripe', 2: 'Rambutan'}
+
+
+def test_class_names_parse_into_fruit_and_ripeness():
+    """Class names map to (fruit, ripeness) the way detect_fruit always read them"""
+    assert parse_class_name('mangosteen_ripe') == ('Mangosteen', 'ripe')
+    assert parse_class_name('mangosteen_Semi_Ripe') == ('Mangosteen', 'semi_ripe')
+    assert parse_class_name('unripe mango') == ('Unripe Mango', 'unripe')
+    assert parse_class_name('Rambutan') == ('Rambutan', 'unknown')
+    table = build_class_table(NAMES)
+    assert table.fruit_types.tolist() == ['Mangosteen', 'Mangosteen', 'Rambutan']
+    assert table.is_mangosteen.tolist() == [True, True, False]
+    print("✓ Class table built")
+
+
+def test_summary_filters_scales_and_drops_duplicates():
+    """Low scores are dropped, boxes scaled and truncated, and near-identical boxes of any class kept once"""
+    result = BackendResult(
+        np.array([[10.6, 10.2, 50.9, 50.1], [10.5, 10.2, 50.9, 50.1], [100, 100, 140, 140], [200, 200, 240, 240]],
+                 dtype=np.float32),
+        np.array([0.9, 0.8, 0.4, 0.7], dtype=np.float32),
+        np.array([0, 1, 0, 2]))
+    detections = summarize_result(result, build_class_table(NAMES), threshold=0.5, scale=2.0)
+    assert [det['box'] for det in detections] == [[21, 20, 101, 100], [400, 400, 480, 480]]
+    assert detections[0] == {'fruit_type': 'Mangosteen', 'ripeness': 'ripe', 'confidence': detections[0]['confidence'],
+                             'is_mangosteen': True, 'class_id': 0, 'box': [21, 20, 101, 100]}
+    assert abs(detections[0]['confidence'] - 0.9) < 1e-6
+    assert detections[1]['ripeness'] == 'unknown' and not detections[1]['is_mangosteen']
+    assert all(type(det['class_id']) is int and type(det['confidence']) is float for det in detections)
+    assert summarize_result(result, build_class_table(NAMES), threshold=0.95) == []
+
+    # Near-identical boxes only merge when duplicate_iou is below 1
+    near = BackendResult(np.array([[10, 10, 50, 50], [11, 10, 50, 50]], dtype=np.float32),
+                         np.array([0.6, 0.9], dtype=np.float32), np.array([0, 1]))
+    assert len(summarize_result(near, build_class_table(NAMES), threshold=0.5)) == 2
+    merged = summarize_result(near, build_class_table(NAMES), threshold=0.5, duplicate_iou=0.9)
+    assert [det['ripeness'] for det in merged] == ['unripe']
+    print("✓ Detections summarised")
+
+
+if __name__ == "__main__":
+    test_class_names_parse_into_fruit_and_ripeness()
+    test_summary_filters_scales_and_drops_duplicates()
@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+Test script for comparing quantized model detections against the fp32 model
+"""
+
+import sys
+import os
+
+# Add the current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+
+from inference_backends import BackendResult
+from quantization import compare_results, match_detections
+
+NAMES = {0: 'mangosteen_ripe', 1: 'mangosteen_unripe'}
+
+
+def result(rows):
+    """BackendResult from (x1, y1, x2, y2, score, class_id) rows"""
+    rows = np.array(rows, dtype=np.float32).reshape(-1, 6)
+    return BackendResult(rows[:, :4], rows[:, 4], rows[:, 5].astype(int))
+
+
+def test_matching_requires_same_class_and_overlap():
+    """Detections pair only with an overlapping candidate of the same class, each candidate once"""
+    reference = result([(0, 0, 10, 10, 0.9, 0), (0, 0, 10, 10, 0.8, 1), (50, 50, 60, 60, 0.7, 0)])
+    candidate = result([(1, 1, 10, 10, 0.85, 0), (0, 0, 10, 10, 0.8, 0)])
+    assert match_detections(reference, candidate) == [(0, 1)]
+    print("✓ Matching respects class and IoU, preferring the closest box")
+
+
+def test_compare_reports_recall_and_confidence_change():
+    """Per-class counts, recall and mean confidence change over several images"""
+    reference = [result([(0, 0, 10, 10, 0.9, 0), (20, 20, 30, 30, 0.6, 1)]), result([(0, 0, 10, 10, 0.8, 0)])]
+    candidate = [result([(0, 0, 10, 10, 0.8, 0)]), result([(0, 0, 10, 10, 0.7, 0), (40, 40, 50, 50, 0.6, 1)])]
+    comparison = compare_results(reference, candidate, NAMES)
+    ripe, unripe = comparison['mangosteen_ripe'], comparison['mangosteen_unripe']
+    assert (ripe['reference'], ripe['candidate'], ripe['matched']) == (2, 2, 2)
+    assert ripe['recall'] == 1.0 and abs(ripe['confidence_delta'] + 0.1) < 1e-6
+    assert (unripe['reference'], unripe['candidate'], unripe['matched']) == (1, 1, 0)
+    assert unripe['recall'] == 0.0
+    print("✓ Comparison reports per-class recall and confidence change")
+
+
+if __name__ == "__main__":
+    print("Testing quantized model comparison")
+    print("=" * 60)
+    test_matching_requires_same_class_and_overlap()
+    test_compare_reports_recall_and_confidence_change()
+    print("\n🎉 All quantization tests passed!")
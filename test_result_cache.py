@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Test script for the content-hash detection result cache
+"""
+
+import sys
+import os
+import json
+import tempfile
+
+# Add the current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from result_cache import ResultCache, make_cache_key
+
+DETECTIONS = [{'fruit_type': 'Mangosteen', 'ripeness': 'ripe', 'confidence': 0.91, 'is_mangosteen': True}]
+
+
+def test_cache_key_depends_on_model_and_threshold():
+    """Same bytes with a different model version or threshold must not collide"""
+    key = make_cache_key(b'image-bytes', 'v1', 0.5)
+    assert key == make_cache_key(b'image-bytes', 'v1', 0.5)
+    assert key != make_cache_key(b'image-bytes', 'v2', 0.5)
+    assert key != make_cache_key(b'image-bytes', 'v1', 0.6)
+    assert key != make_cache_key(b'other-bytes', 'v1', 0.5)
+    print("✓ Cache keys cover image bytes, model version and threshold")
+
+
+def test_memory_and_disk_tiers():
+    """A miss, a memory hit, then a disk hit after the memory tier is rebuilt"""
+    with tempfile.TemporaryDirectory() as folder:
+        cache = ResultCache(folder)
+        key = make_cache_key(b'photo', 'v1', 0.5)
+        assert cache.get(key) is None
+        cache.put(key, DETECTIONS)
+        assert cache.get(key) == {'detections': DETECTIONS}
+
+        # A fresh cache over the same folder only has the disk tier
+        reopened = ResultCache(folder)
+        assert reopened.get(key) == {'detections': DETECTIONS}
+        assert reopened.get(key) is not None
+
+        stats = reopened.stats()
+        assert stats['disk_hits'] == 1
+        assert stats['memory_hits'] == 1
+        assert cache.stats()['misses'] == 1
+        print(f"✓ Memory and disk tiers serve hits: {stats}")
+
+
+def test_entries_with_annotated_images_still_load():
+    """Disk entries written when annotated images were cached too load as their detections"""
+    with tempfile.TemporaryDirectory() as folder:
+        key = make_cache_key(b'photo', 'v1', 0.5)
+        header = json.dumps({'detections': DETECTIONS}).encode()
+        ResultCache(folder).disk.put(key, len(header).to_bytes(8, 'big') + header + b'annotated-jpeg')
+        assert ResultCache(folder).get(key) == {'detections': DETECTIONS}
+        print("✓ Older entries load without their images")
+
+
+def test_size_caps_evict_oldest_entries():
+    """Both tiers evict least recently used entries once their byte cap is exceeded"""
+    with tempfile.TemporaryDirectory() as folder:
+        cache = ResultCache(folder, memory_max_bytes=2500, disk_max_bytes=2500)
+        keys = [make_cache_key(bytes([i]), 'v1', 0.5) for i in range(4)]
+        for key in keys:
+            cache.put(key, [dict(DETECTIONS[0], fruit_type='x' * 1000)])
+        stats = cache.stats()
+        assert stats['memory_evictions'] == 2
+        assert stats['disk_evictions'] == 2
+        assert stats['disk_bytes'] <= 2500
+        assert len(os.listdir(folder)) == 2
+        assert cache.get(keys[0]) is None
+        assert cache.get(keys[3]) is not None
+        print(f"✓ Size caps enforced: {stats['disk_entries']} entries, {stats['disk_bytes']} bytes on disk")
+
+
+if __name__ == "__main__":
+    print("Testing detection result cache")
+    print("=" * 60)
+    test_cache_key_depends_on_model_and_threshold()
+    test_memory_and_disk_tiers()
+    test_entries_with_annotated_images_still_load()
+    test_size_caps_evict_oldest_entries()
+    print("\n🎉 All result cache tests passed!")
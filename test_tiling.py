@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Test script for tiled inference of high-resolution images
+"""
+
+import sys
+import os
+
+import numpy as np
+
+# Add the current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from inference_backends import BackendResult
+from tiling import make_tiles, merge_tile_results, tile_origins
+
+
+def result(boxes, scores, class_ids):
+    return BackendResult(np.array(boxes, dtype=np.float32).reshape(-1, 4), np.array(scores, dtype=np.float32),
+                         np.array(class_ids, dtype=int))
+
+
+def test_tiles_cover_the_image_with_overlap():
+    """Tiles reach every edge, keep the requested overlap and never exceed the tile size"""
+    assert tile_origins(500, 640, 0.2) == [0]
+    origins = tile_origins(4000, 640, 0.2)
+    assert origins[0] == 0 and origins[-1] == 4000 - 640
+    assert all(b - a <= 512 for a, b in zip(origins, origins[1:]))
+
+    image = np.zeros((1500, 2000, 3), dtype=np.uint8)
+    tiles, offsets = make_tiles(image, 640, 0.2)
+    assert all(tile.shape == (640, 640, 3) for tile in tiles)
+    assert len(tiles) == len(offsets) == len(tile_origins(1500, 640, 0.2)) * len(tile_origins(2000, 640, 0.2))
+    covered = np.zeros((1500, 2000), dtype=bool)
+    for x, y in offsets:
+        covered[y:y + 640, x:x + 640] = True
+    assert covered.all()
+    print(f"✓ {len(tiles)} tiles cover 2000x1500")
+
+
+def test_merge_maps_boxes_and_drops_cross_tile_duplicates():
+    """A fruit cut by a tile edge is kept once; neighbouring fruit and other classes survive"""
+    tile_results = [
+        # Tile at (0, 0): a fruit cut by its right edge at x=640, and a separate fruit
+        result([[600, 100, 640, 160], [100, 100, 150, 150]], [0.6, 0.9], [0, 0]),
+        # Tile at (512, 0): the same fruit whole, plus an unripe one overlapping it
+        result([[88, 100, 168, 160], [90, 105, 165, 158]], [0.8, 0.7], [0, 1]),
+    ]
+    merged = merge_tile_results(tile_results, [(0, 0), (512, 0)], threshold=0.5)
+    boxes = merged.boxes.tolist()
+    assert merged.scores.tolist() == [np.float32(0.9), np.float32(0.8), np.float32(0.7)]
+    assert boxes[1] == [600, 100, 680, 160]
+    assert merged.class_ids.tolist() == [0, 0, 1]
+    print("✓ Cross-tile duplicate merged")
+
+
+def test_merge_bounds_memory_and_filters_scores():
+    """Chunked merging gives the same answer as one block, and min_score drops weak boxes first"""
+    rng = np.random.default_rng(0)
+    corners = rng.uniform(0, 3000, (1500, 2)).astype(np.float32)
+    boxes = np.concatenate([corners, corners + rng.uniform(20, 80, (1500, 2)).astype(np.float32)], axis=1)
+    tile_results = [result(boxes, rng.uniform(0, 1, 1500), rng.integers(0, 2, 1500))]
+    whole = merge_tile_results(tile_results, [(0, 0)], chunk_size=4096)
+    chunked = merge_tile_results(tile_results, [(0, 0)], chunk_size=64)
+    assert np.array_equal(whole.boxes, chunked.boxes)
+    assert len(whole.boxes) < 1500
+    assert merge_tile_results(tile_results, [(0, 0)], min_score=0.5).scores.min() >= 0.5
+    assert len(merge_tile_results([], []).boxes) == 0
+    print(f"✓ 1500 boxes merged to {len(whole.boxes)}")
+
+
+if __name__ == "__main__":
+    test_tiles_cover_the_image_with_overlap()
+    test_merge_maps_boxes_and_drops_cross_tile_duplicates()
+    test_merge_bounds_memory_and_filters_scores()
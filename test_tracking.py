@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Test script for cross-frame fruit tracking
+"""
+
+import sys
+import os
+
+import numpy as np
+
+# Add the current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from tracking import FruitTracker, greedy_match
+
+
+def test_greedy_match_pairs_best_overlaps_once():
+    """Each track and detection is used at most once, best overlap first, and weak overlaps stay unmatched"""
+    overlaps = np.array([[0.9, 0.6, 0.0],
+                         [0.8, 0.1, 0.0]])
+    pairs, rows, columns = greedy_match(overlaps, 0.3)
+    assert pairs == [(0, 0)] and rows == [1] and columns == [1, 2]
+    assert greedy_match(np.empty((0, 2)), 0.3) == ([], [], [0, 1])
+    print("✓ Greedy matching pairs the best overlaps once")
+
+
+def test_moving_fruit_are_counted_once():
+    """Two fruit moving across 20 frames, one briefly low-confidence and one ripeness flicker, count as two;
+    a one-frame false positive is not counted"""
+    tracker = FruitTracker(high_threshold=0.5, low_threshold=0.1, max_age=5, min_hits=3)
+    for frame in range(20):
+        # Frames are not consecutive, like after frame sampling
+        index = frame * 3
+        boxes = [[10 + 6 * frame, 50, 60 + 6 * frame, 100], [300 - 5 * frame, 200, 350 - 5 * frame, 250]]
+        scores = [0.9, 0.3 if 8 <= frame < 11 else 0.8]
+        class_ids = [1 if frame == 5 else 0, 1]
+        if frame == 12:
+            boxes.append([500, 500, 540, 540])
+            scores.append(0.95)
+            class_ids.append(0)
+        tracker.update(index, boxes, scores, class_ids)
+    tracks = tracker.tracks()
+    assert [track.hits for track in tracks] == [20, 20]
+    assert [track.class_id for track in tracks] == [0, 1]
+    assert tracks[0].first_frame == 0 and tracks[0].last_frame == 57
+    print(f"✓ {len(tracks)} moving fruit counted once each over 20 frames")
+
+
+def test_occluded_fruit_keeps_its_track():
+    """A fruit missing for fewer than max_age frames continues its track; a longer gap starts a new one"""
+    tracker = FruitTracker(max_age=4, min_hits=2)
+    for index in [0, 1, 2, 5, 6]:
+        tracker.update(index, [[100 + 2 * index, 100, 150 + 2 * index, 150]], [0.9], [0])
+    assert len(tracker.tracks()) == 1
+    for index in [20, 21]:
+        tracker.update(index, [[140, 100, 190, 150]], [0.9], [0])
+    assert [track.hits for track in tracker.tracks()] == [5, 2]
+    print("✓ Short occlusions keep the track, long gaps start a new one")
+
+
+if __name__ == "__main__":
+    print("Testing cross-frame fruit tracking")
+    print("=" * 60)
+    test_greedy_match_pairs_best_overlaps_once()
+    test_moving_fruit_are_counted_once()
+    test_occluded_fruit_keeps_its_track()
+    print("\n🎉 All tracking tests passed!")
@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+Test script for the multi-process inference worker pool
+"""
+
+import sys
+import os
+import queue
+import threading
+import time
+
+import numpy as np
+
+# Add the current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from inference_backends import BackendResult
+from worker_pool import InferenceWorkerPool, share_image, worker_main
+
+
+class MeanBackend:
+    """Stand-in model: one box whose score is the image's mean pixel value. A mean of 255 kills the process."""
+
+    name = 'mean'
+    names = {0: 'ripe', 1: 'unripe'}
+
+    def predict(self, images):
+        results = []
+        for image in images:
+            mean = float(image.mean())
+            if mean == 255:
+                os._exit(1)
+            results.append(BackendResult(np.array([[0, 0, image.shape[1], image.shape[0]]], dtype=np.float32),
+                                         np.array([mean], dtype=np.float32), np.array([os.getpid()])))
+        return results
+
+
+def make_mean_backend():
+    return MeanBackend()
+
+
+class RecordingBackend:
+    """Stand-in model recording the batch size and options of each predict call; scores are mean pixel values"""
+
+    name = 'recording'
+    names = {0: 'ripe'}
+
+    def __init__(self):
+        self.calls = []
+
+    def predict(self, images, **options):
+        self.calls.append((len(images), options))
+        return [BackendResult(np.zeros((1, 4), dtype=np.float32), np.array([image.mean()], dtype=np.float32),
+                              np.zeros(1, dtype=int)) for image in images]
+
+
+class SentMessages(list):
+    """Collects what a worker sends down its result pipe"""
+
+    def send(self, message):
+        self.append(message)
+
+
+def image_of(value, size=64):
+    return np.full((size, size, 3), value, dtype=np.uint8)
+
+
+def test_workers_return_predictions_for_shared_images():
+    """Images reach the workers intact and concurrent requests spread over the processes"""
+    pool = InferenceWorkerPool(make_mean_backend, num_workers=2).start()
+    try:
+        assert pool.names == MeanBackend.names
+        results = {}
+
+        def client(value):
+            results[value] = pool.predict([image_of(value), image_of(value + 100)], timeout=30)
+
+        threads = [threading.Thread(target=client, args=(i,)) for i in range(20)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        for value, (first, second) in results.items():
+            assert first.scores[0] == value and second.scores[0] == value + 100
+        pids = {int(r.class_ids[0]) for pair in results.values() for r in pair}
+        assert len(pids) == 2
+        stats = pool.stats()
+        assert sum(w['images'] for w in stats['workers']) == 40
+        assert stats['pending'] == 0
+        print(f"✓ 40 images served by workers {sorted(pids)}")
+    finally:
+        pool.shutdown()
+
+
+def test_crashed_worker_is_restarted():
+    """A request on a crashing worker fails, the worker is replaced and the pool keeps serving"""
+    pool = InferenceWorkerPool(make_mean_backend, num_workers=1).start()
+    try:
+        try:
+            pool.predict([image_of(255)], timeout=30)
+            assert False, "Expected the crashed request to fail"
+        except RuntimeError as e:
+            assert 'crashed' in str(e)
+        deadline = time.monotonic() + 60
+        while not pool.stats()['workers'][0]['ready'] and time.monotonic() < deadline:
+            time.sleep(0.1)
+        worker = pool.stats()['workers'][0]
+        assert worker['restarts'] == 1 and worker['alive']
+        assert pool.predict([image_of(7)], timeout=30)[0].scores[0] == 7
+        print("✓ Worker restarted after a crash")
+    finally:
+        pool.shutdown()
+
+
+def test_start_fails_when_no_worker_loads():
+    """A model that cannot load surfaces as an error from start()"""
+    pool = InferenceWorkerPool(int, args=('not a number',), num_workers=1)
+    try:
+        pool.start()
+        assert False, "Expected start() to fail"
+    except RuntimeError as e:
+        assert 'ValueError' in str(e)
+    print("✓ Load errors reported by start()")
+
+
+def test_worker_splits_batches_by_options():
+    """Queued tasks with different inference options run as separate predict calls, each with its own options"""
+    backend = RecordingBackend()
+    small = {'conf': 0.3, 'iou': 0.5, 'max_det': 10, 'imgsz': 320}
+    large = dict(small, imgsz=640)
+    tasks, sent, blocks = queue.Queue(), SentMessages(), []
+    try:
+        for task_id, options in enumerate([small, large, dict(reversed(list(small.items()))), large, {}]):
+            block, shared = share_image(image_of(task_id))
+            blocks.append(block)
+            tasks.put((task_id, shared, options))
+        tasks.put(None)
+        worker_main(0, lambda: backend, (), {}, tasks, sent, max_batch_size=8, num_threads=0)
+    finally:
+        for block in blocks:
+            block.close()
+            block.unlink()
+    assert backend.calls == [(2, small), (2, large), (1, {})]
+    assert sent[0] == ('ready', 0, RecordingBackend.names)
+    done = {message[2]: message[3] for message in sent[1:]}
+    assert [message[0] for message in sent[1:]] == ['done'] * 5
+    assert [float(done[task_id].scores[0]) for task_id in range(5)] == [0, 1, 2, 3, 4]
+    print("✓ Worker batches are split by inference options")
+
+
+if __name__ == "__main__":
+    test_workers_return_predictions_for_shared_images()
+    test_crashed_worker_is_restarted()
+    test_start_fails_when_no_worker_loads()
+    test_worker_splits_batches_by_options()
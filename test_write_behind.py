@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Test script for write-behind batching of database writes
+"""
+
+import sys
+import os
+import tempfile
+import threading
+
+# Add the current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from flask import Flask
+from flask_sqlalchemy import SQLAlchemy
+
+from write_behind import WriteBehindWriter
+
+
+def make_app(folder):
+    """Standalone app with a table of (user_id, value) rows"""
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{os.path.join(folder, 'rows.db')}"
+    db = SQLAlchemy(app)
+
+    class Row(db.Model):
+        id = db.Column(db.Integer, primary_key=True)
+        user_id = db.Column(db.Integer, nullable=False)
+        value = db.Column(db.Integer, nullable=False)
+
+    with app.app_context():
+        db.create_all()
+
+    def write(items):
+        for user_id, value in items:
+            if value < 0:
+                raise ValueError("negative value")
+            db.session.add(Row(user_id=user_id, value=value))
+    return app, db, Row, write
+
+
+def test_concurrent_writes_share_transactions():
+    """Writes from many threads are committed in a few bulk flushes, and each writer reads its own rows"""
+    with tempfile.TemporaryDirectory() as folder:
+        app, db, Row, write = make_app(folder)
+        writer = WriteBehindWriter(app, db, write, max_queue=8, max_batch=64, flush_interval=0.02)
+        seen = {}
+
+        def uploader(user_id):
+            for value in range(10):
+                writer.submit(user_id, (user_id, value))
+            assert writer.wait(user_id, timeout=10)
+            with app.app_context():
+                seen[user_id] = Row.query.filter_by(user_id=user_id).count()
+
+        threads = [threading.Thread(target=uploader, args=(user_id,)) for user_id in range(16)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        writer.stop()
+        assert seen == {user_id: 10 for user_id in range(16)}
+        stats = writer.stats()
+        assert stats['writes'] == 160 and stats['flushes'] < 160 and stats['queued'] == 0
+        assert writer.wait(99)  # Nothing pending
+        print("✓ Concurrent writes are batched with read-your-writes")
+
+
+def test_stop_flushes_and_bad_writes_are_isolated():
+    """Queued writes are committed on stop; a write that keeps failing is dropped without losing its batch"""
+    with tempfile.TemporaryDirectory() as folder:
+        app, db, Row, write = make_app(folder)
+        writer = WriteBehindWriter(app, db, write, flush_interval=0.5, max_retries=2)
+        for value in [1, 2, -1, 3]:
+            writer.submit(7, (7, value))
+        writer.stop()
+        with app.app_context():
+            assert sorted(row.value for row in Row.query.all()) == [1, 2, 3]
+        assert writer.stats()['failed'] == 1
+        print("✓ Stop flushes the queue and failing writes are isolated")
+
+
+if __name__ == "__main__":
+    print("Testing write-behind writer")
+    print("=" * 60)
+    test_concurrent_writes_share_transactions()
+    test_stop_flushes_and_bad_writes_are_isolated()
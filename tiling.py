@@ -0,0 +1,101 @@
+"""
+Tiled (sliced) inference for high-resolution images
+Large orchard and drone photos are cut into overlapping model-sized tiles so
+small fruit keep enough pixels to be detected; tile detections are mapped
+back to the full image and merged with cross-tile NMS.
+"""
+
+import numpy as np
+
+from inference_backends import BackendResult
+
+
+def tile_origins(length, tile_size, overlap):
+    """Start offsets of tiles covering length pixels, neighbours sharing at least overlap of a tile"""
+    if length <= tile_size:
+        return [0]
+    stride = max(1, int(tile_size * (1 - overlap)))
+    count = -(-(length - tile_size) // stride) + 1
+    # Spread the tiles evenly so the last one ends exactly at the edge
+    return np.linspace(0, length - tile_size, count).round().astype(int).tolist()
+
+
+def make_tiles(image, tile_size=640, overlap=0.2):
+    """
+    Cut an HxWxC array into overlapping tiles
+
+    Returns:
+        (tiles, origins) where tiles are views into image and origins their (x, y) offsets
+    """
+    height, width = image.shape[:2]
+    tiles, origins = [], []
+    for y in tile_origins(height, tile_size, overlap):
+        for x in tile_origins(width, tile_size, overlap):
+            tiles.append(image[y:y + tile_size, x:x + tile_size])
+            origins.append((x, y))
+    return tiles, origins
+
+
+def overlap_matrix(rows, boxes, metric='ios'):
+    """Overlap of each of the Rx4 xyxy rows with each of the Nx4 boxes: 'iou', or 'ios' (intersection over the smaller box)"""
+    # Contiguous coordinate columns broadcast to 2-D arrays; strided columns or a trailing
+    # axis of length 2 reduced with np.prod are many times slower
+    rx1, ry1, rx2, ry2 = (column[:, None] for column in np.ascontiguousarray(rows.T))
+    x1, y1, x2, y2 = np.ascontiguousarray(boxes.T)
+    intersection = (np.minimum(rx2, x2) - np.maximum(rx1, x1)).clip(0) * (np.minimum(ry2, y2) - np.maximum(ry1, y1)).clip(0)
+    row_areas = (rx2 - rx1) * (ry2 - ry1)
+    areas = (x2 - x1) * (y2 - y1)
+    if metric == 'iou':
+        denominator = row_areas + areas - intersection
+    else:
+        denominator = np.minimum(row_areas, areas)
+    return intersection / (denominator + 1e-9)
+
+
+def merge_tile_results(results, origins, threshold=0.5, metric='ios', min_score=0.0, chunk_size=512):
+    """
+    Map per-tile BackendResults to full-image pixels and suppress cross-tile duplicates
+
+    A fruit cut by a tile edge shows up as a partial box inside the full box of a
+    neighbouring tile; their IoU is low but intersection over the smaller box is
+    high, so 'ios' is the default metric.
+
+    Args:
+        results: One BackendResult per tile, boxes in tile pixels
+        origins: (x, y) offset of each tile in the full image
+        threshold: Overlap above which the lower-scoring box of the same class is dropped
+        metric: 'ios' or 'iou'
+        min_score: Boxes scoring below this are dropped before merging
+        chunk_size: Rows of the overlap matrix computed at once, bounding memory for crowded images
+
+    Returns:
+        One BackendResult for the full image, highest score first
+    """
+    boxes = np.concatenate([r.boxes.reshape(-1, 4) + np.tile(np.asarray(origin, dtype=np.float32), 2)
+                            for r, origin in zip(results, origins)] or [np.empty((0, 4), dtype=np.float32)])
+    scores = np.concatenate([r.scores for r in results] or [np.empty(0, dtype=np.float32)])
+    class_ids = np.concatenate([r.class_ids for r in results] or [np.empty(0, dtype=int)]).astype(int)
+    order = np.argsort(-scores, kind='stable')
+    order = order[scores[order] >= min_score]
+    boxes, scores, class_ids = boxes[order].astype(np.float32), scores[order], class_ids[order]
+    suppressed = np.zeros(len(boxes), dtype=bool)
+    # Boxes only suppress boxes of their own class, so each class is swept on its own
+    for class_id in np.unique(class_ids):
+        members = np.flatnonzero(class_ids == class_id)
+        suppressed[members] = greedy_suppression(boxes[members], threshold, metric, chunk_size)
+    keep = ~suppressed
+    return BackendResult(boxes[keep], scores[keep], class_ids[keep])
+
+
+def greedy_suppression(boxes, threshold, metric='ios', chunk_size=512):
+    """Mask of the boxes, sorted by descending score, that overlap a kept higher-scoring box"""
+    suppressed = np.zeros(len(boxes), dtype=bool)
+    for start in range(0, len(boxes), chunk_size):
+        end = min(start + chunk_size, len(boxes))
+        # Overlaps of a block of rows with every lower-scoring box in one pass;
+        # the greedy sweep is then a row lookup per kept box
+        duplicates = overlap_matrix(boxes[start:end], boxes[start:], metric) > threshold
+        for i in range(start, end):
+            if not suppressed[i]:
+                suppressed[i + 1:] |= duplicates[i - start, i - start + 1:]
+    return suppressed
@@ -0,0 +1,153 @@
+"""
+Cross-frame fruit tracking for video
+A ByteTrack-style tracker: confident detections start and extend tracks, and
+low-confidence detections, which NMS-filtered per-frame counts would throw
+away, keep existing tracks alive through blur and partial occlusion. Each
+track is one physical fruit, so counting confirmed tracks gives unique
+ripe/unripe totals instead of per-frame sums.
+"""
+
+import numpy as np
+
+from tiling import overlap_matrix
+
+
+def greedy_match(overlaps, threshold):
+    """
+    Pairs (row, column) of an overlap matrix, best overlap first, each row and column used once
+
+    Returns:
+        (pairs, unmatched_rows, unmatched_columns)
+    """
+    rows, columns = np.nonzero(overlaps >= threshold)
+    order = np.argsort(-overlaps[rows, columns], kind='stable')
+    pairs, used_rows, used_columns = [], set(), set()
+    for row, column in zip(rows[order].tolist(), columns[order].tolist()):
+        if row in used_rows or column in used_columns:
+            continue
+        pairs.append((row, column))
+        used_rows.add(row)
+        used_columns.add(column)
+    unmatched_rows = [row for row in range(overlaps.shape[0]) if row not in used_rows]
+    unmatched_columns = [column for column in range(overlaps.shape[1]) if column not in used_columns]
+    return pairs, unmatched_rows, unmatched_columns
+
+
+class Track:
+    """One fruit followed across frames"""
+
+    def __init__(self, track_id, frame_index, box, score, class_id):
+        self.track_id = track_id
+        self.box = np.asarray(box, dtype=np.float32)
+        self.velocity = np.zeros(4, dtype=np.float32)  # Box corner change per frame
+        self.first_frame = self.last_frame = frame_index
+        self.hits = 0
+        self.score_sum = 0.0
+        self.best_score = 0.0
+        self.best_box = self.box
+        self.class_votes = {}
+        self.update(frame_index, box, score, class_id)
+
+    def predict(self, frame_index):
+        """Box expected at frame_index, assuming the fruit keeps moving like it did"""
+        return self.box + self.velocity * (frame_index - self.last_frame)
+
+    def update(self, frame_index, box, score, class_id):
+        box = np.asarray(box, dtype=np.float32)
+        if frame_index > self.last_frame:
+            # Smoothed so one jittery box does not throw the next prediction off
+            step = (box - self.box) / (frame_index - self.last_frame)
+            self.velocity = step if self.hits == 1 else 0.5 * self.velocity + 0.5 * step
+        self.box = box
+        self.last_frame = frame_index
+        self.hits += 1
+        self.score_sum += score
+        # Ripeness can flicker between frames; the class is the confidence-weighted vote over the track
+        self.class_votes[class_id] = self.class_votes.get(class_id, 0.0) + score
+        if score > self.best_score:
+            self.best_score, self.best_box = score, box
+
+    @property
+    def class_id(self):
+        return max(self.class_votes, key=self.class_votes.get)
+
+    @property
+    def confidence(self):
+        return self.score_sum / self.hits
+
+
+class FruitTracker:
+    """
+    Associates per-frame detections into tracks
+
+    Frames must be fed in increasing frame_index order but need not be consecutive,
+    so frames skipped by the sampler only widen the gap the motion model predicts over.
+    """
+
+    def __init__(self, high_threshold=0.5, low_threshold=0.1, match_iou=0.3, low_match_iou=0.5,
+                 max_age=30, min_hits=3):
+        """
+        Args:
+            high_threshold: Detections at or above this score can start tracks
+            low_threshold: Detections below this score are ignored entirely
+            match_iou: IoU with a track's predicted box needed to extend it with a confident detection
+            low_match_iou: Stricter IoU for extending tracks with low-confidence detections
+            max_age: Frames a track survives without a match, e.g. while occluded
+            min_hits: Matched frames before a track counts as a fruit; shorter tracks are false positives
+        """
+        self.high_threshold = high_threshold
+        self.low_threshold = low_threshold
+        self.match_iou = match_iou
+        self.low_match_iou = low_match_iou
+        self.max_age = max_age
+        self.min_hits = min_hits
+        self.active = []
+        self.finished = []
+        self._next_id = 1
+
+    def update(self, frame_index, boxes, scores, class_ids):
+        """Associate one frame's Nx4 xyxy boxes, scores and class ids with the active tracks"""
+        boxes = np.asarray(boxes, dtype=np.float32).reshape(-1, 4)
+        scores = np.asarray(scores, dtype=np.float32)
+        class_ids = np.asarray(class_ids, dtype=int)
+        high = np.flatnonzero(scores >= self.high_threshold)
+        low = np.flatnonzero((scores >= self.low_threshold) & (scores < self.high_threshold))
+        self._expire(frame_index)
+        tracks = self.active
+        predicted = np.array([track.predict(frame_index) for track in tracks], dtype=np.float32).reshape(-1, 4)
+
+        # First pass: confident detections against every active track
+        pairs, leftover, unmatched_high = greedy_match(
+            overlap_matrix(predicted, boxes[high], metric='iou'), self.match_iou)
+        for row, column in pairs:
+            index = high[column]
+            tracks[row].update(frame_index, boxes[index], float(scores[index]), int(class_ids[index]))
+        # Second pass: low-confidence detections only extend tracks the first pass left over
+        if leftover and len(low):
+            low_pairs, _, _ = greedy_match(
+                overlap_matrix(predicted[leftover], boxes[low], metric='iou'), self.low_match_iou)
+            for row, column in low_pairs:
+                index = low[column]
+                tracks[leftover[row]].update(frame_index, boxes[index], float(scores[index]), int(class_ids[index]))
+        # Unconfirmed tracks must match in every frame they are seen in, which filters one-off false positives
+        self.active = [track for track in tracks if track.hits >= self.min_hits or track.last_frame == frame_index]
+        for column in unmatched_high:
+            index = high[column]
+            self.active.append(Track(self._next_id, frame_index, boxes[index], float(scores[index]),
+                                     int(class_ids[index])))
+            self._next_id += 1
+
+    def _expire(self, frame_index):
+        """Retire tracks unseen for more than max_age frames before frame_index"""
+        active = []
+        for track in self.active:
+            if frame_index - track.last_frame <= self.max_age:
+                active.append(track)
+            elif track.hits >= self.min_hits:
+                self.finished.append(track)
+        self.active = active
+
+    def tracks(self):
+        """Confirmed tracks, finished and still active, in the order they started"""
+        confirmed = self.finished + [track for track in self.active if track.hits >= self.min_hits]
+        return sorted(confirmed, key=lambda track: track.track_id)
@@ -0,0 +1,15 @@
+from app import app, db
+from migrations import upgrade_schema
+
+# Brings an existing mangosteen.db up to date with the current models.
+# The app also runs these steps before its first request; this script reports what changed.
+
+if __name__ == "__main__":
+    with app.app_context():
+        changes = upgrade_schema(db)
+        if changes:
+            print("Applied schema changes:")
+            for change in changes:
+                print(f"  - {change}")
+        else:
+            print("Database schema is up to date")
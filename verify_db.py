@@ -1,8 +1,10 @@
-from app import app, db, User
+from app import app, db, ensure_database, User
 from sqlalchemy import text
 import logging
 
 def verify_database():
+    # Creates the tables of a fresh database
+    ensure_database()
     with app.app_context():
         try:
             # Test database connection
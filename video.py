@@ -0,0 +1,179 @@
+"""
+Streaming detection over video files
+A decoder thread samples frames into a small bounded queue while the caller
+runs them through the model in batches and feeds the results to a tracker,
+so memory stays flat however long the video is. Frames are sampled at a
+target rate, and sampled frames that barely differ from the last one run
+are skipped, since a static scene gives the tracker nothing new.
+"""
+
+import logging
+import queue
+import threading
+from collections import namedtuple
+
+import numpy as np
+
+VideoInfo = namedtuple('VideoInfo', ['fps', 'frame_count', 'width', 'height'])
+
+# One decoded frame: its index in the video, the BGR array, and the factor mapping its pixels to the original
+Frame = namedtuple('Frame', ['index', 'image', 'scale'])
+
+ALLOWED_VIDEO_EXTENSIONS = {'mp4', 'avi', 'mov', 'mkv', 'webm'}
+
+
+def is_video_file(filename):
+    """Whether a filename has a video extension"""
+    return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_VIDEO_EXTENSIONS
+
+
+def open_video(path):
+    """cv2.VideoCapture for path, raising ValueError if it cannot be read"""
+    import cv2
+
+    capture = cv2.VideoCapture(path)
+    if not capture.isOpened():
+        raise ValueError(f"Could not open video {path}")
+    return capture
+
+
+def video_info(path):
+    """VideoInfo from the container header; fps falls back to 30 when the header has none"""
+    import cv2
+
+    capture = open_video(path)
+    try:
+        return VideoInfo(capture.get(cv2.CAP_PROP_FPS) or 30.0, int(capture.get(cv2.CAP_PROP_FRAME_COUNT)),
+                         int(capture.get(cv2.CAP_PROP_FRAME_WIDTH)), int(capture.get(cv2.CAP_PROP_FRAME_HEIGHT)))
+    finally:
+        capture.release()
+
+
+def motion_signature(image, size=32):
+    """Small grayscale thumbnail used to tell whether the scene changed between frames"""
+    step = max(1, max(image.shape[:2]) // size)
+    return image[::step, ::step].astype(np.int16).sum(axis=2) // 3
+
+
+def sample_frames(path, sample_fps=10.0, max_side=None, motion_threshold=0.0, max_skip=0):
+    """
+    Yield Frames of a video, decoded one at a time
+
+    Args:
+        path: Video file
+        sample_fps: Frames per second kept; frames in between are grabbed without being converted
+        max_side: Longer side frames are shrunk to, None for full size
+        motion_threshold: Mean grey-level change from the last yielded frame below which a sampled frame
+            is skipped; 0 keeps every sampled frame
+        max_skip: Most sampled frames skipped in a row, so tracks always see the scene again before
+            they expire
+    """
+    import cv2
+
+    capture = open_video(path)
+    try:
+        fps = capture.get(cv2.CAP_PROP_FPS) or 30.0
+        stride = max(1, round(fps / sample_fps)) if sample_fps else 1
+        index, skipped, last_signature = -1, 0, None
+        while True:
+            index += 1
+            if index % stride:
+                # grab() advances without the colour conversion and copy retrieve() pays for
+                if not capture.grab():
+                    return
+                continue
+            ok, image = capture.read()
+            if not ok:
+                return
+            if motion_threshold > 0:
+                signature = motion_signature(image)
+                if last_signature is not None and skipped < max_skip and \
+                        np.abs(signature - last_signature).mean() < motion_threshold:
+                    skipped += 1
+                    continue
+                last_signature, skipped = signature, 0
+            scale = 1.0
+            if max_side and max(image.shape[:2]) > max_side:
+                scale = max(image.shape[:2]) / max_side
+                image = cv2.resize(image, (round(image.shape[1] / scale), round(image.shape[0] / scale)),
+                                   interpolation=cv2.INTER_AREA)
+            yield Frame(index, image, scale)
+    finally:
+        capture.release()
+
+
+def prefetch(iterable, max_items):
+    """Run an iterator in a background thread, holding at most max_items ready items.
+    Exceptions raised by the iterator are re-raised in the consumer."""
+    buffer = queue.Queue(maxsize=max_items)
+    done = object()
+    stop = threading.Event()
+
+    def put(item):
+        """Block until there is room, unless the consumer has stopped. Returns False if it has."""
+        while not stop.is_set():
+            try:
+                buffer.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce():
+        try:
+            for item in iterable:
+                if not put(item):
+                    return
+            put(done)
+        except Exception as e:
+            put(e)
+
+    thread = threading.Thread(target=produce, name='video-decode', daemon=True)
+    thread.start()
+    try:
+        while True:
+            item = buffer.get()
+            if item is done:
+                return
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        # Consumer gave up early: let the decoder thread notice and release the file
+        stop.set()
+        thread.join()
+
+
+def batched(frames, batch_size):
+    """Group an iterator of frames into lists of up to batch_size"""
+    batch = []
+    for frame in frames:
+        batch.append(frame)
+        if len(batch) == batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def track_video(frames, predict, tracker, batch_size=8, queue_size=16):
+    """
+    Run sampled frames through the model and the tracker as a streaming pipeline
+
+    Args:
+        frames: Iterator of Frames, e.g. from sample_frames
+        predict: Callable(list of BGR arrays) returning one BackendResult per array
+        tracker: FruitTracker updated with each frame's boxes in original-video pixels
+        batch_size: Frames per model call
+        queue_size: Decoded frames buffered ahead of the model
+
+    Returns:
+        Number of frames run through the model
+    """
+    processed = 0
+    for batch in batched(prefetch(frames, queue_size), batch_size):
+        for frame, result in zip(batch, predict([frame.image for frame in batch])):
+            tracker.update(frame.index, result.boxes * frame.scale, result.scores, result.class_ids)
+        processed += len(batch)
+    logging.debug(f"Tracked {processed} frames, {len(tracker.tracks())} confirmed tracks")
+    return processed
@@ -0,0 +1,326 @@
+"""
+Multi-process inference worker pool
+Each worker process holds its own copy of the model, so detections run on
+several cores at once. Decoded images reach the workers through shared
+memory; only the small detection arrays travel back, through a pipe per worker.
+"""
+
+import itertools
+import logging
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from multiprocessing import connection, shared_memory
+
+import numpy as np
+
+
+def share_image(image):
+    """Copy an array into a new shared memory block. Returns (block, (name, shape, dtype))."""
+    block = shared_memory.SharedMemory(create=True, size=max(1, image.nbytes))
+    np.ndarray(image.shape, dtype=image.dtype, buffer=block.buf)[...] = image
+    return block, (block.name, image.shape, image.dtype.str)
+
+
+def attach_image(name, shape, dtype):
+    """Attach to a block made by share_image. Returns (block, array viewing it); close the block when done."""
+    # Python < 3.13 registers attached blocks with the resource tracker as if this process owned them
+    block = shared_memory.SharedMemory(name=name)
+    return block, np.ndarray(shape, dtype=np.dtype(dtype), buffer=block.buf)
+
+
+def worker_main(index, factory, args, kwargs, tasks, results, max_batch_size, num_threads):
+    """Worker process loop: load the backend, then predict on tasks until a None task arrives.
+    results is this worker's end of a pipe; sends are synchronous, so dying mid-request leaves no lock held."""
+    if num_threads:
+        # Set before the backend imports torch or onnxruntime so the worker stays on its share of cores
+        os.environ['OMP_NUM_THREADS'] = str(num_threads)
+    try:
+        backend = factory(*args, **kwargs)
+    except Exception as e:
+        results.send(('failed', index, f"{type(e).__name__}: {e}"))
+        return
+    results.send(('ready', index, backend.names))
+    stop = False
+    while not stop:
+        batch = [tasks.get()]
+        if batch[0] is None:
+            break
+        # Tasks that queued up while the last batch ran share one forward pass
+        while len(batch) < max_batch_size:
+            try:
+                task = tasks.get_nowait()
+            except queue.Empty:
+                break
+            if task is None:
+                stop = True
+                break
+            batch.append(task)
+        # Only tasks with the same inference options can share a forward pass
+        groups = {}
+        for task in batch:
+            groups.setdefault(tuple(sorted(task[2].items())), []).append(task)
+        for group in groups.values():
+            run_group(index, backend, group, results)
+
+
+def run_group(index, backend, group, results):
+    """Predict on a group of (task_id, shared image, options) tasks with equal options and send the outcomes"""
+    started = time.perf_counter()
+    blocks, images = [], []
+    try:
+        for _, shared, _ in group:
+            block, image = attach_image(*shared)
+            blocks.append(block)
+            images.append(image)
+        predictions = backend.predict(images, **group[0][2])
+        outcome = [('done', task_id, prediction) for (task_id, _, _), prediction in zip(group, predictions)]
+    except Exception as e:
+        outcome = [('error', task_id, f"{type(e).__name__}: {e}") for task_id, _, _ in group]
+    finally:
+        images.clear()
+        for block in blocks:
+            try:
+                block.close()
+            except BufferError:
+                # The backend kept a view of the image; the mapping goes when that is collected
+                pass
+    busy = time.perf_counter() - started
+    for status, task_id, payload in outcome:
+        results.send((status, index, task_id, payload, busy / len(group)))
+
+
+class InferenceWorkerPool:
+    """Runs backend.predict in worker processes; a drop-in for an inference backend in the parent"""
+
+    name = 'worker-pool'
+
+    def __init__(self, factory, args=(), kwargs=None, num_workers=2, max_batch_size=8, num_threads=0,
+                 restart=True, start_timeout=120):
+        """
+        Args:
+            factory: Picklable callable creating a backend in each worker, e.g. load_backend
+            args, kwargs: Arguments for factory
+            num_workers: Number of worker processes, each holding its own model
+            max_batch_size: Most queued images one worker runs in a single forward pass
+            num_threads: Compute threads per worker (0 leaves the library default)
+            restart: Replace a worker that dies after loading the model; its in-flight requests fail either way
+            start_timeout: Seconds start() waits for the workers to load the model
+        """
+        self.factory = factory
+        self.args = tuple(args)
+        self.kwargs = dict(kwargs or {})
+        self.num_workers = max(1, int(num_workers))
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.num_threads = int(num_threads)
+        self.restart = restart
+        self.start_timeout = start_timeout
+        self.names = {}
+        # spawn, not fork: the parent runs threads and may already hold an initialised model runtime
+        self._context = multiprocessing.get_context('spawn')
+        self._lock = threading.Lock()
+        self._ready = threading.Condition(self._lock)
+        self._workers = []
+        self._pending = {}
+        self._task_ids = itertools.count()
+        self._collector = None
+        self._closed = False
+        self._stopped = False
+
+    def start(self):
+        """Start the workers and wait until each has loaded the model"""
+        with self._lock:
+            if self._collector is not None:
+                return self
+            for index in range(self.num_workers):
+                self._workers.append(self._spawn(index))
+            self._collector = threading.Thread(target=self._collect, name='inference-pool-results', daemon=True)
+            self._collector.start()
+            deadline = time.monotonic() + self.start_timeout
+            while not all(worker['ready'] or worker['error'] for worker in self._workers):
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._ready.wait(remaining)
+            errors = [worker['error'] for worker in self._workers if worker['error']]
+            ready = [worker for worker in self._workers if worker['ready']]
+        if not ready:
+            self.shutdown()
+            raise RuntimeError(f"No inference worker started: {errors[0] if errors else 'timed out'}")
+        return self
+
+    def submit(self, images, **options):
+        """Queue a list of arrays for one worker. Returns a Future resolving to one prediction per image.
+        options (conf, iou, max_det, imgsz) are passed to the backend's predict."""
+        future = Future()
+        shared = [share_image(np.ascontiguousarray(image)) for image in images]
+        with self._lock:
+            if self._closed or self._collector is None:
+                for block, _ in shared:
+                    block.close()
+                    block.unlink()
+                raise RuntimeError("Worker pool is not running")
+            usable = [worker for worker in self._workers if not worker['error']]
+            if not usable:
+                for block, _ in shared:
+                    block.close()
+                    block.unlink()
+                raise RuntimeError("No inference worker is running")
+            workers = [worker for worker in usable if worker['ready']] or usable
+            worker = min(workers, key=lambda w: len(w['in_flight']))
+            request = {'future': future, 'results': {}, 'task_ids': []}
+            for block, description in shared:
+                task_id = next(self._task_ids)
+                request['task_ids'].append(task_id)
+                self._pending[task_id] = (block, worker['index'], request)
+                worker['in_flight'].add(task_id)
+                worker['tasks'].put((task_id, description, options))
+        if not shared:
+            future.set_result([])
+        return future
+
+    def predict(self, images, timeout=None, **options):
+        """Run arrays through a worker and block for one prediction per image, like a backend's predict"""
+        return self.submit(images, **options).result(timeout)
+
+    def stats(self):
+        """Per-worker counters: pid, alive, ready, restarts, in_flight, images, errors, busy_seconds, utilisation"""
+        now = time.monotonic()
+        with self._lock:
+            workers = []
+            for worker in self._workers:
+                uptime = now - worker['started_at']
+                workers.append({
+                    'index': worker['index'],
+                    'pid': worker['process'].pid,
+                    'alive': worker['process'].is_alive(),
+                    'ready': worker['ready'],
+                    'restarts': worker['restarts'],
+                    'in_flight': len(worker['in_flight']),
+                    'images': worker['images'],
+                    'errors': worker['errors'],
+                    'busy_seconds': round(worker['busy'], 3),
+                    'utilisation': round(worker['busy'] / uptime, 3) if uptime > 0 else 0.0
+                })
+        return {'workers': workers, 'pending': sum(w['in_flight'] for w in workers)}
+
+    def shutdown(self, wait=True):
+        """Stop the workers after their queued tasks; requests still pending afterwards fail"""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            workers = list(self._workers)
+        for worker in workers:
+            worker['tasks'].put(None)
+        if wait:
+            for worker in workers:
+                worker['process'].join(10)
+                if worker['process'].is_alive():
+                    worker['process'].terminate()
+        # The collector delivers results until the workers are gone
+        self._stopped = True
+        if wait and self._collector is not None:
+            self._collector.join()
+        with self._lock:
+            for task_id in list(self._pending):
+                self._finish(task_id, error="Worker pool shut down")
+
+    def _spawn(self, index, restarts=0):
+        """Start worker process index. Call with self._lock held."""
+        tasks = self._context.Queue()
+        results, sender = self._context.Pipe(duplex=False)
+        process = self._context.Process(
+            target=worker_main, name=f'inference-worker-{index}', daemon=True,
+            args=(index, self.factory, self.args, self.kwargs, tasks, sender,
+                  self.max_batch_size, self.num_threads))
+        process.start()
+        # Only the worker writes; closing our copy lets recv() see EOF when it exits
+        sender.close()
+        return {'index': index, 'process': process, 'tasks': tasks, 'results': results, 'open': True,
+                'ready': False, 'error': None,
+                'restarts': restarts, 'in_flight': set(), 'images': 0, 'errors': 0, 'busy': 0.0,
+                'started_at': time.monotonic()}
+
+    def _collect(self):
+        """Result thread: resolve futures as workers answer and replace workers that died"""
+        last_check = time.monotonic()
+        while not self._stopped:
+            with self._lock:
+                readers = {worker['results']: worker for worker in self._workers if worker['open']}
+            if not readers:
+                time.sleep(0.5)
+            for results in connection.wait(list(readers), timeout=0.5) if readers else []:
+                worker = readers[results]
+                try:
+                    message = results.recv()
+                except (EOFError, OSError):
+                    # The worker exited; _check_workers fails its requests once the process is reaped
+                    worker['open'] = False
+                    continue
+                self._handle(worker, message)
+            if time.monotonic() - last_check >= 0.5:
+                self._check_workers()
+                last_check = time.monotonic()
+
+    def _handle(self, worker, message):
+        with self._lock:
+            kind, index = message[0], message[1]
+            if kind == 'ready':
+                worker['ready'] = True
+                self.names = message[2]
+                self._ready.notify_all()
+            elif kind == 'failed':
+                worker['error'] = message[2]
+                logging.error(f"Inference worker {index} failed to start: {message[2]}")
+                self._ready.notify_all()
+            else:
+                _, _, task_id, payload, busy = message
+                worker['busy'] += busy
+                if kind == 'done':
+                    worker['images'] += 1
+                    self._finish(task_id, result=payload)
+                else:
+                    worker['errors'] += 1
+                    self._finish(task_id, error=payload)
+
+    def _check_workers(self):
+        with self._lock:
+            if self._closed:
+                return
+            for position, worker in enumerate(self._workers):
+                if worker['process'].is_alive() or worker['error']:
+                    continue
+                logging.error(f"Inference worker {worker['index']} (pid {worker['process'].pid}) exited "
+                              f"with code {worker['process'].exitcode}")
+                for task_id in list(worker['in_flight']):
+                    self._finish(task_id, error=f"Inference worker {worker['index']} crashed")
+                # A worker that dies before loading the model would only die again
+                worker['results'].close()
+                worker['open'] = False
+                if self.restart and worker['ready']:
+                    self._workers[position] = self._spawn(worker['index'], worker['restarts'] + 1)
+                else:
+                    worker['error'] = f"exited with code {worker['process'].exitcode}"
+
+    def _finish(self, task_id, result=None, error=None):
+        """Record one image's outcome and resolve its request once all images are in. Call with self._lock held."""
+        entry = self._pending.pop(task_id, None)
+        if entry is None:
+            return
+        block, index, request = entry
+        block.close()
+        block.unlink()
+        self._workers[index]['in_flight'].discard(task_id)
+        future = request['future']
+        if future.done():
+            return
+        if error is not None:
+            future.set_exception(RuntimeError(error))
+            return
+        request['results'][task_id] = result
+        if len(request['results']) == len(request['task_ids']):
+            future.set_result([request['results'][t] for t in request['task_ids']])
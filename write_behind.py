@@ -0,0 +1,156 @@
+"""
+Write-behind batching of database writes
+Requests hand their rows to a single writer thread instead of each running
+its own transaction. The writer commits whatever has queued up, from any
+number of requests, in one transaction, so concurrent uploads on SQLite stop
+queueing for the write lock one commit at a time.
+"""
+
+import logging
+import queue
+import threading
+import time
+from collections import namedtuple
+
+# One queued write: its sequence number, the key readers wait on (a user id) and the write function's argument
+PendingWrite = namedtuple('PendingWrite', ['seq', 'key', 'item'])
+
+_STOP = object()
+
+
+class WriteBehindWriter:
+    """Thread that applies queued writes in bulk transactions"""
+
+    def __init__(self, app, db, write, max_queue=1024, max_batch=256, flush_interval=0.01, max_retries=3):
+        """
+        Args:
+            app: Flask app, used to push an app context per flush
+            db: Flask-SQLAlchemy extension
+            write: Callable(list of items) adding their rows to db.session; the writer commits
+            max_queue: Writes waiting at most; submit() blocks beyond it, slowing producers to the database's pace
+            max_batch: Writes per transaction at most
+            flush_interval: Seconds a flush waits for more writes after the first one arrives
+            max_retries: Attempts at a failing batch before falling back to one transaction per write
+        """
+        self.app = app
+        self.db = db
+        self.write = write
+        self.max_batch = max_batch
+        self.flush_interval = flush_interval
+        self.max_retries = max_retries
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._condition = threading.Condition()
+        self._submit_lock = threading.Lock()
+        self._seq = 0
+        self._flushed_seq = 0
+        self._pending = {}  # key -> sequence number of its newest write
+        self._thread = None
+        self._lock = threading.Lock()
+        self._stats = {'writes': 0, 'flushes': 0, 'largest_flush': 0, 'retries': 0, 'failed': 0}
+
+    @property
+    def running(self):
+        return self._thread is not None
+
+    def start(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='write-behind', daemon=True)
+                self._thread.start()
+        return self
+
+    def submit(self, key, item, timeout=None):
+        """Queue a write; blocks while the queue is full. Raises queue.Full after timeout seconds."""
+        if not self.running:
+            self.start()
+        # Sequence numbers must reach the queue in order, so the put happens under the lock too. It is not
+        # the condition's lock, which the writer needs to report a flush while producers wait for room
+        with self._submit_lock:
+            with self._condition:
+                self._seq += 1
+                write = PendingWrite(self._seq, key, item)
+                self._pending[key] = write.seq
+            self._queue.put(write, timeout=timeout)
+        return write.seq
+
+    def wait(self, key, timeout=None):
+        """
+        Block until every write submitted for key so far is committed (or has failed), giving its
+        reader read-your-writes. Returns immediately when key has nothing pending. Returns False on timeout.
+        """
+        with self._condition:
+            target = self._pending.get(key)
+            if target is None:
+                return True
+            done = self._condition.wait_for(lambda: self._flushed_seq >= target, timeout)
+            if done and self._pending.get(key) == target:
+                del self._pending[key]
+            return done
+
+    def flush(self, timeout=None):
+        """Block until everything submitted so far is committed. Returns False on timeout."""
+        with self._condition:
+            target = self._seq
+            return self._condition.wait_for(lambda: self._flushed_seq >= target, timeout)
+
+    def stop(self):
+        """Commit everything still queued and stop the thread"""
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            self._queue.put(_STOP)
+            thread.join()
+
+    def stats(self):
+        with self._condition:
+            return dict(self._stats, queued=self._queue.qsize())
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            first = self._queue.get()
+            if first is _STOP:
+                return
+            batch = [first]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.max_batch:
+                try:
+                    write = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+                if write is _STOP:
+                    stopping = True
+                    break
+                batch.append(write)
+            self._flush(batch)
+
+    def _flush(self, batch):
+        with self.app.app_context():
+            failed = 0
+            for attempt in range(1, self.max_retries + 1):
+                try:
+                    self.write([write.item for write in batch])
+                    self.db.session.commit()
+                    break
+                except Exception as e:
+                    self.db.session.rollback()
+                    logging.warning(f"Write-behind flush of {len(batch)} writes failed (attempt {attempt}): {str(e)}")
+                    self._stats['retries'] += 1
+                    time.sleep(0.05 * attempt)
+            else:
+                # Isolate the write that keeps failing instead of losing the whole batch
+                for write in batch:
+                    try:
+                        self.write([write.item])
+                        self.db.session.commit()
+                    except Exception as e:
+                        self.db.session.rollback()
+                        failed += 1
+                        logging.error(f"Dropped write-behind write for {write.key}: {str(e)}")
+        with self._condition:
+            self._flushed_seq = batch[-1].seq
+            self._stats['writes'] += len(batch)
+            self._stats['flushes'] += 1
+            self._stats['largest_flush'] = max(self._stats['largest_flush'], len(batch))
+            self._stats['failed'] += failed
+            self._condition.notify_all()